@@ -0,0 +1,281 @@
+# -*- coding:utf-8 -*-
+
+#本文件用于定义监测数据的分块压缩存档
+
+import os
+import zlib
+import struct
+import collections
+import numpy as np
+
+from QtGeneralUtilities import ArgumentError, SizeError
+
+__all__ = ['ChunkedArchive']
+
+class _ChunkBounds(object):
+    """
+    通道中各块的块序号、起始时刻及结束时刻，与索引记录的deque一一对应，供按时间范围读取时二分查找。
+    三者存放于同一个二维数组的各行中，有效部分为[head, tail)列；在末尾追加及从开头删除的摊销开销均为常数。
+    """
+    def __init__(self, entries = ()):
+        entries = list(entries)
+        self._data = np.empty((3, max(len(entries), 16)), dtype = np.int64)
+        self._head = 0
+        self._tail = len(entries)
+        for position, entry in enumerate(entries):
+            self._data[:, position] = entry[:3]
+
+    def append(self, chunkId, start, stop):
+        if self._tail == self._data.shape[1]:#空间用尽时移至新数组的开头，容量为有效部分的两倍
+            size = self._tail - self._head
+            data = np.empty((3, max(2 * size, 16)), dtype = np.int64)
+            data[:, :size] = self._data[:, self._head:self._tail]
+            self._data, self._head, self._tail = data, 0, size
+        self._data[:, self._tail] = (chunkId, start, stop)
+        self._tail += 1
+
+    def popleft(self):
+        self._head += 1
+
+    def chunkIds(self):
+        return self._data[0, self._head:self._tail]
+
+    def starts(self):
+        return self._data[1, self._head:self._tail]
+
+    def stops(self):
+        return self._data[2, self._head:self._tail]
+
+class ChunkedArchive(object):
+    """
+    监测数据的分块压缩时间序列存档。
+    每个通道(如掘进参数或振动加速度)的数据按chunkSize个采样点分块，每块压缩后保存为存档目录下的一个文件，并在通道的索引文件中追加一条(块序号, 起始时刻, 结束时刻, 采样点数)记录：
+        追加数据时只写入内存中的当前块，块满时压缩写盘，因此每个采样点的追加开销为常数；
+        按时间范围读取时根据索引二分查找，只读取与该范围相交的块；
+        每个通道最多保留capacity个采样点(向上取整至整块)，超出时删除最早的块(环形缓冲)。
+    时刻为int64(如纳秒时间戳)，要求各通道内单调不减；时刻经差分后压缩，等间隔采样的时刻几乎不占空间。
+    """
+    indexFormat = struct.Struct('<qqqI')#块序号, 起始时刻, 结束时刻, 采样点数
+    chunkHeaderFormat = struct.Struct('<I8s')#采样点数, 数值类型
+
+    def __init__(self, root, capacity = 1 << 24, chunkSize = 65536, compressLevel = 1):
+        """
+        构造器。存档目录不存在时新建；已存在时读取各通道的索引。
+        必要参数：
+            1. root                存档目录。
+        可选参数：
+            1. capacity            每个通道最多保留的采样点数，默认为16777216。
+            2. chunkSize           每块的采样点数，默认为65536。
+            3. compressLevel       zlib压缩级别，默认为1(速度优先)。
+        """
+        if capacity < 1 or chunkSize < 1:
+            raise ArgumentError((capacity, chunkSize))
+        self.root = root
+        self.capacity = capacity
+        self.chunkSize = chunkSize
+        self.compressLevel = compressLevel
+        self._index = {}#通道名: 索引记录的deque
+        self._bounds = {}#通道名: 各块的块序号及起止时刻的数组(_ChunkBounds)
+        self._retained = {}#通道名: 已存档的采样点数
+        self._deadRecords = {}#通道名: 索引文件中已删除块的记录数
+        self._buffers = {}#通道名: (时刻列表, 数值列表, 已缓存采样点数)
+        self._dtypes = {}
+        os.makedirs(root, exist_ok = True)
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if os.path.isdir(path):
+                try:
+                    channel = bytes.fromhex(name).decode('utf-8')
+                except ValueError:
+                    continue
+                self.openChannelIndex(channel)
+
+    def channelPath(self, channel, *names):
+        return os.path.join(self.root, channel.encode('utf-8').hex(), *names)
+
+    def chunkPath(self, channel, chunkId):
+        return self.channelPath(channel, '{0:012d}.chunk'.format(chunkId))
+
+    def openChannelIndex(self, channel):
+        """
+        读取通道的索引文件，保留仍存在的块的索引记录。
+        """
+        entries = collections.deque()
+        records = 0
+        try:
+            with open(self.channelPath(channel, 'index'), 'rb') as f:
+                data = f.read()
+        except OSError:
+            data = b''
+        size = self.indexFormat.size
+        for position in range(0, len(data) - size + 1, size):
+            entry = self.indexFormat.unpack_from(data, position)
+            records += 1
+            if os.path.exists(self.chunkPath(channel, entry[0])):
+                entries.append(entry)
+        self._index[channel] = entries
+        self._bounds[channel] = _ChunkBounds(entries)
+        self._retained[channel] = sum(entry[3] for entry in entries)
+        self._deadRecords[channel] = records - len(entries)
+
+    def rewriteIndex(self, channel):
+        """
+        以仍保留的块重写通道的索引文件，去除已删除块的记录。
+        """
+        path = self.channelPath(channel, 'index')
+        with open(path + '.tmp', 'wb') as f:
+            f.write(b''.join(self.indexFormat.pack(*entry) for entry in self._index[channel]))
+        os.replace(path + '.tmp', path)
+        self._deadRecords[channel] = 0
+
+    def channels(self):
+        """
+        返回全部通道名。
+        """
+        return sorted(set(self._index) | set(self._buffers))
+
+    def append(self, channel, times, values):
+        """
+        向通道追加数据。
+        必要参数：
+            1. channel             通道名。
+            2. times               各采样点的时刻(int64)，须单调不减且不早于该通道已有的数据，否则引发ArgumentError。
+            3. values              各采样点的数值，长度须与times一致。通道的数值类型由首次追加的数据决定。
+        times及values被复制后缓存，调用方随后可重复使用其数组。
+        """
+        times = np.array(times, dtype = np.int64).ravel()
+        values = np.asarray(values).ravel()
+        if times.shape[0] != values.shape[0]:
+            raise SizeError(values.shape[0])
+        if times.shape[0] == 0:
+            return
+        timeRange = self.timeRange(channel)
+        if (timeRange is not None and times[0] < timeRange[1]) or np.any(times[1:] < times[:-1]):#时刻倒退时二分查找的结果无意义
+            raise ArgumentError(channel)
+        if channel not in self._buffers:
+            if channel not in self._index:
+                self._index[channel] = collections.deque()
+                self._bounds[channel] = _ChunkBounds()
+                self._retained[channel] = 0
+                self._deadRecords[channel] = 0
+            self._dtypes.setdefault(channel, self.storedDtype(channel) or values.dtype)
+            self._buffers[channel] = ([], [], 0)
+            os.makedirs(self.channelPath(channel), exist_ok = True)
+        timeParts, valueParts, count = self._buffers[channel]
+        values = values.astype(self._dtypes[channel], copy = True)
+        position = 0
+        while position < times.shape[0]:
+            take = min(self.chunkSize - count, times.shape[0] - position)
+            timeParts.append(times[position:position + take])
+            valueParts.append(values[position:position + take])
+            count += take
+            position += take
+            if count == self.chunkSize:
+                self.writeChunk(channel, np.concatenate(timeParts), np.concatenate(valueParts))
+                timeParts, valueParts, count = [], [], 0
+        self._buffers[channel] = (timeParts, valueParts, count)
+
+    def storedDtype(self, channel):
+        """
+        返回通道已存档数据的数值类型，无存档数据时返回None。
+        """
+        if not self._index.get(channel):
+            return None
+        with open(self.chunkPath(channel, self._index[channel][-1][0]), 'rb') as f:
+            header = f.read(self.chunkHeaderFormat.size)
+        return np.dtype(self.chunkHeaderFormat.unpack(header)[1].rstrip(b'\0').decode('ascii'))
+
+    def writeChunk(self, channel, times, values):
+        """
+        压缩并写入一个块，追加索引记录，必要时删除最早的块。
+        """
+        entries = self._index[channel]
+        chunkId = entries[-1][0] + 1 if entries else 0
+        deltas = np.diff(times, prepend = times[:1])
+        deltas[0] = times[0]
+        payload = zlib.compress(deltas.tobytes() + np.ascontiguousarray(values).tobytes(), self.compressLevel)
+        with open(self.chunkPath(channel, chunkId), 'wb') as f:
+            f.write(self.chunkHeaderFormat.pack(times.shape[0], values.dtype.str.encode('ascii')) + payload)
+        entry = (chunkId, int(times[0]), int(times[-1]), times.shape[0])
+        with open(self.channelPath(channel, 'index'), 'ab') as f:
+            f.write(self.indexFormat.pack(*entry))
+        entries.append(entry)
+        self._bounds[channel].append(*entry[:3])
+        self._retained[channel] += entry[3]
+        while self._retained[channel] - entries[0][3] >= self.capacity:
+            oldest = entries.popleft()
+            self._bounds[channel].popleft()
+            os.remove(self.chunkPath(channel, oldest[0]))
+            self._retained[channel] -= oldest[3]
+            self._deadRecords[channel] += 1
+        if self._deadRecords[channel] > len(entries):#已删除块的记录多于保留块时重写索引文件，摊销开销为常数
+            self.rewriteIndex(channel)
+
+    def readChunk(self, channel, chunkId):
+        """
+        读取并解压一个块，返回(时刻数组, 数值数组)元组。
+        """
+        with open(self.chunkPath(channel, chunkId), 'rb') as f:
+            data = f.read()
+        count, dtype = self.chunkHeaderFormat.unpack_from(data)
+        dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+        raw = zlib.decompress(data[self.chunkHeaderFormat.size:])
+        times = np.cumsum(np.frombuffer(raw, dtype = np.int64, count = count))
+        values = np.frombuffer(raw, dtype = dtype, count = count, offset = 8 * count)
+        return times, values
+
+    def flush(self, channel = None):
+        """
+        将内存中未满的块写盘(作为一个较小的块)。未指定通道时写入全部通道。
+        """
+        for name in ([channel] if channel is not None else list(self._buffers)):
+            timeParts, valueParts, count = self._buffers.get(name, ([], [], 0))
+            if count > 0:
+                self.writeChunk(name, np.concatenate(timeParts), np.concatenate(valueParts))
+                self._buffers[name] = ([], [], 0)
+
+    def read(self, channel, start = None, stop = None):
+        """
+        读取通道在[start, stop]时段内的数据，返回(时刻数组, 数值数组)元组。只读取与该时段相交的块。
+        可选参数：
+            1. start               起始时刻，默认为None，即最早的数据。
+            2. stop                结束时刻，默认为None，即最新的数据。
+        """
+        bounds = self._bounds.get(channel)
+        if bounds is None:
+            raise ArgumentError(channel)
+        first = 0 if start is None else int(np.searchsorted(bounds.stops(), start, side = 'left'))
+        last = None if stop is None else int(np.searchsorted(bounds.starts(), stop, side = 'right'))
+        timeParts, valueParts = [], []
+        for chunkId in bounds.chunkIds()[first:last].tolist():
+            times, values = self.readChunk(channel, chunkId)
+            timeParts.append(times)
+            valueParts.append(values)
+        bufferTimes, bufferValues, count = self._buffers.get(channel, ([], [], 0))
+        if count > 0:
+            timeParts.extend(bufferTimes)
+            valueParts.extend(bufferValues)
+        if not timeParts:
+            dtype = self._dtypes.get(channel) or self.storedDtype(channel) or np.float64
+            return np.empty(0, dtype = np.int64), np.empty(0, dtype = dtype)
+        times = np.concatenate(timeParts)
+        values = np.concatenate(valueParts)
+        lower = 0 if start is None else np.searchsorted(times, start, side = 'left')
+        upper = times.shape[0] if stop is None else np.searchsorted(times, stop, side = 'right')
+        return times[lower:upper], values[lower:upper]
+
+    def timeRange(self, channel):
+        """
+        返回通道数据的(最早时刻, 最新时刻)元组，无数据时返回None。
+        """
+        entries = self._index.get(channel) or []
+        bufferTimes = self._buffers.get(channel, ([], [], 0))[0]
+        first = entries[0][1] if entries else (bufferTimes[0][0] if bufferTimes else None)
+        last = bufferTimes[-1][-1] if bufferTimes else (entries[-1][2] if entries else None)
+        return None if first is None else (int(first), int(last))
+
+    def close(self):
+        """
+        写入全部未满的块。
+        """
+        self.flush()
@@ -0,0 +1,283 @@
+# -*- coding:utf-8 -*-
+
+#本文件用于定义监测数据文件的解析及缓存工具
+#本文件不依赖Qt，多进程读取(见DataFileUtilities.readDataFiles)的子进程只需导入本文件
+
+import os
+import shutil
+import pickle
+import hashlib
+import tempfile
+import warnings
+import numpy as np
+import pandas as pd
+
+__all__ = ['DataFileCache', 'fileIdentity', 'RangePredicate', 'applyPredicate', 'predicateColumns', 'loadRawDataFile', 'parseDataFile', 'projectDataFrame', 'dataFileType']
+
+class DataFileCache(object):
+    """
+    已解析数据文件的磁盘缓存。
+    以文件的绝对路径、修改时间及大小为键，将解析所得的DataFrame按列保存为.npy文件；再次打开同一文件时直接以内存映射方式读回，无需重新解析。
+    缓存总大小超过maxBytes时，按最近访问时间淘汰最久未用的条目。
+    缓存中只保存解析所得的原始数据(不经数据类型压缩等处理)，同一文件无论以何种方式读取均得到相同的结果。
+    """
+    metaName = 'meta.pkl'
+    formatVersion = 2#缓存内容的格式版本，计入缓存键。版本1的条目可能保存了压缩数据类型后的数据
+
+    def __init__(self, cacheDir = None, maxBytes = 1 << 30):
+        """
+        构造器。
+        可选参数：
+            1. cacheDir            缓存目录，默认为系统临时目录下的AssistantBoring_cache。
+            2. maxBytes            缓存总大小上限(字节)，默认为1GB。
+        """
+        self.cacheDir = os.path.join(tempfile.gettempdir(), 'AssistantBoring_cache') if cacheDir is None else cacheDir
+        self.maxBytes = maxBytes
+
+    def key(self, filename):
+        """
+        返回文件对应的缓存键。文件不存在时返回None。
+        """
+        identity = fileIdentity(filename)
+        if identity is None:
+            return None
+        return hashlib.sha1('{0}|v{1}'.format(identity, self.formatVersion).encode('utf-8')).hexdigest()
+
+    def load(self, filename):
+        """
+        读取文件对应的缓存，返回DataFrame对象；未命中时返回None。
+        数值及时间列以写时复制的内存映射方式读回，修改不会写回缓存。
+        """
+        key = self.key(filename)
+        if key is None:
+            return None
+        entry = os.path.join(self.cacheDir, key)
+        metaPath = os.path.join(entry, self.metaName)
+        try:
+            with open(metaPath, 'rb') as f:
+                meta = pickle.load(f)
+            columns = {}
+            for i, (name, kind) in enumerate(meta):
+                path = os.path.join(entry, 'c{0}.npy'.format(i))
+                if kind == 'category':
+                    codes = np.load(path, mmap_mode = 'c')
+                    categories = np.load(os.path.join(entry, 'c{0}.categories.npy'.format(i)), allow_pickle = True)
+                    columns[i] = pd.Categorical.from_codes(codes, categories = categories)
+                elif kind == 'object':
+                    columns[i] = np.load(path, allow_pickle = True)
+                else:
+                    columns[i] = np.load(path, mmap_mode = 'c')
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            self.remove(key)
+            return None
+        os.utime(metaPath)#记录访问时间，用于淘汰
+        dataFrame = pd.DataFrame(columns, copy = False)
+        dataFrame.columns = pd.Index([name for name, kind in meta])
+        return dataFrame
+
+    def store(self, filename, dataFrame):
+        """
+        将文件解析所得的DataFrame对象写入缓存，随后按总大小淘汰旧条目。
+        """
+        key = self.key(filename)
+        if key is None:
+            return
+        os.makedirs(self.cacheDir, exist_ok = True)
+        entry = os.path.join(self.cacheDir, key)
+        staging = tempfile.mkdtemp(prefix = key + '.', dir = self.cacheDir)
+        try:
+            meta = []
+            for i, name in enumerate(dataFrame.columns):
+                series = dataFrame.iloc[:, i]
+                path = os.path.join(staging, 'c{0}.npy'.format(i))
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    np.save(path, series.cat.codes.to_numpy())
+                    np.save(os.path.join(staging, 'c{0}.categories.npy'.format(i)), series.cat.categories.to_numpy(dtype = object), allow_pickle = True)
+                    meta.append((name, 'category'))
+                elif isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM':
+                    np.save(path, series.to_numpy())
+                    meta.append((name, series.dtype.str))
+                else:
+                    np.save(path, series.to_numpy(dtype = object), allow_pickle = True)
+                    meta.append((name, 'object'))
+            with open(os.path.join(staging, self.metaName), 'wb') as f:
+                pickle.dump(meta, f)
+            self.remove(key)
+            os.replace(staging, entry)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors = True)
+            return
+        self.evict(keep = key)
+
+    def remove(self, key):
+        """
+        删除指定键的缓存条目。
+        """
+        shutil.rmtree(os.path.join(self.cacheDir, key), ignore_errors = True)
+
+    def entries(self):
+        """
+        返回全部缓存条目的(最近访问时间, 大小, 键)列表。
+        """
+        entries = []
+        if not os.path.isdir(self.cacheDir):
+            return entries
+        for key in os.listdir(self.cacheDir):
+            entry = os.path.join(self.cacheDir, key)
+            metaPath = os.path.join(entry, self.metaName)
+            if not os.path.isfile(metaPath):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            entries.append((os.path.getmtime(metaPath), size, key))
+        return entries
+
+    def totalBytes(self):
+        """
+        返回缓存总大小(字节)。
+        """
+        return sum(size for accessed, size, key in self.entries())
+
+    def evict(self, keep = None):
+        """
+        淘汰最久未用的条目，直至缓存总大小不超过maxBytes。键为keep的条目不被淘汰。
+        """
+        entries = sorted(self.entries())
+        total = sum(size for accessed, size, key in entries)
+        for accessed, size, key in entries:
+            if total <= self.maxBytes:
+                break
+            if key != keep:
+                self.remove(key)
+                total -= size
+
+    def clear(self):
+        """
+        清空缓存。
+        """
+        shutil.rmtree(self.cacheDir, ignore_errors = True)
+
+def fileIdentity(filename):
+    """
+    返回标识文件当前版本的字符串(绝对路径、修改时间及大小)。文件不存在时返回None。
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return '{0}|{1}|{2}'.format(os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+
+class RangePredicate(object):
+    """
+    行筛选条件：指定列的值位于[minimum, maximum]闭区间内(如里程或时间窗口)。
+    上下限为时间(pandas.Timestamp、datetime或numpy.datetime64)而该列尚未解析为时间时，先将其解析为时间再比较。
+    可作为readDataFile()等函数的predicate参数，可被pickle，因此也可用于多进程读取。
+    """
+    def __init__(self, column, minimum = None, maximum = None):
+        """
+        构造器。
+        必要参数：
+            1. column              列名。
+        可选参数：
+            1. minimum             下限，默认为None，即不限。
+            2. maximum             上限，默认为None，即不限。
+        """
+        self.column = column
+        self.minimum = minimum
+        self.maximum = maximum
+        self.columns = [column]#筛选所需的列
+
+    def __call__(self, dataFrame):
+        """
+        返回各行是否满足条件的布尔掩码。
+        """
+        values = dataFrame[self.column]
+        isTime = any(isinstance(bound, (pd.Timestamp, np.datetime64)) or hasattr(bound, 'isoformat') for bound in (self.minimum, self.maximum))
+        if isTime and values.dtype.kind != 'M':
+            with warnings.catch_warnings():#逐个解析格式不一致的时间字符串时会发出警告
+                warnings.simplefilter('ignore')
+                values = pd.to_datetime(values, errors = 'coerce')
+        mask = values.notna()
+        if self.minimum is not None:
+            mask &= values >= self.minimum
+        if self.maximum is not None:
+            mask &= values <= self.maximum
+        return mask.to_numpy()
+
+def applyPredicate(dataFrame, predicate):
+    """
+    返回dataFrame中满足筛选条件predicate的行。
+    predicate为接受DataFrame对象、返回布尔掩码的函数(如RangePredicate)，或由其组成的列表(各条件同时满足)。
+    """
+    if predicate is None:
+        return dataFrame
+    mask = np.ones(dataFrame.shape[0], dtype = bool)
+    for condition in (predicate if isinstance(predicate, (list, tuple)) else [predicate]):
+        mask &= np.asarray(condition(dataFrame), dtype = bool)
+    return dataFrame if mask.all() else dataFrame[mask]
+
+def predicateColumns(predicate):
+    """
+    返回筛选条件predicate所需的列名列表(由其columns属性给出)。
+    """
+    columns = []
+    for condition in (predicate if isinstance(predicate, (list, tuple)) else [predicate] if predicate is not None else []):
+        columns.extend(getattr(condition, 'columns', []))
+    return columns
+
+def loadRawDataFile(filename, filetype, cache = None, columns = None, predicate = None, chunkRows = 65536):
+    """
+    读取监测数据文件的解析结果，不作其他处理。参数见DataFileUtilities.readDataFile。
+    给定cache时优先从缓存读取，未命中且读取全部列及行时将解析结果写入缓存。
+    """
+    partial = columns is not None or predicate is not None
+    dataFrame = None if cache is None else cache.load(filename)
+    if dataFrame is not None:
+        return projectDataFrame(dataFrame, columns, predicate) if partial else dataFrame
+    dataFrame = parseDataFile(filename, filetype, columns, predicate, chunkRows)
+    if cache is not None and not partial:
+        cache.store(filename, dataFrame)
+    return dataFrame
+
+def parseDataFile(filename, filetype, columns = None, predicate = None, chunkRows = 65536):
+    """
+    解析监测数据文件，返回只含所需的列及行的DataFrame对象，不经缓存。参数见readDataFile。
+    """
+    partial = columns is not None or predicate is not None
+    usecols = None if columns is None else list(dict.fromkeys(list(columns) + predicateColumns(predicate)))
+    if filetype == 'CSV' and predicate is not None:
+        with pd.read_csv(filename, header = 'infer', usecols = usecols, chunksize = chunkRows) as reader:
+            chunks = [applyPredicate(chunk, predicate) for chunk in reader]
+        dataFrame = pd.concat(chunks, ignore_index = True) if chunks else pd.read_csv(filename, header = 'infer', usecols = usecols, nrows = 0)
+    elif filetype == 'CSV':
+        dataFrame = pd.read_csv(filename, header = 'infer', usecols = usecols)
+    else:
+        dataFrame = applyPredicate(pd.read_excel(filename, header = 0, usecols = usecols), predicate)
+    if partial:
+        dataFrame = projectDataFrame(dataFrame, columns, None)
+    return dataFrame
+
+def projectDataFrame(dataFrame, columns = None, predicate = None):
+    """
+    返回dataFrame中满足筛选条件predicate的行的指定列(按columns的顺序)，行索引重新编号。
+    """
+    dataFrame = applyPredicate(dataFrame, predicate)
+    if columns is not None:
+        dataFrame = dataFrame[list(columns)]
+    return dataFrame.reset_index(drop = True)
+
+def dataFileType(filename):
+    """
+    根据扩展名返回数据文件的类型，'CSV'或'XLS'；无法识别时返回None。
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return 'CSV'
+    elif extension in ('.xls', '.xlsx'):
+        return 'XLS'
+    return None
+
+def _readDataFileTask(filename, cache, columns, predicate):
+    """
+    进程池中执行的读取任务。
+    """
+    return loadRawDataFile(filename, dataFileType(filename), cache, columns, predicate)
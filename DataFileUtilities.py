@@ -0,0 +1,856 @@
+# -*- coding:utf-8 -*-
+
+#本文件用于定义监测数据文件的读写工具
+
+import io
+import os
+import csv
+import datetime
+import glob
+import struct
+import warnings
+import multiprocessing
+import concurrent.futures
+import numpy as np
+import pandas as pd
+
+from QtGeneralUtilities import ArgumentError, SizeError
+from DataFileParsing import DataFileCache, fileIdentity, RangePredicate, applyPredicate, predicateColumns, loadRawDataFile, parseDataFile, projectDataFrame, dataFileType, _readDataFileTask
+from SignalUtilities import MinMaxPyramid
+
+__all__ = ['CsvRowSource', 'DataFrameRowSource', 'CsvTailReader', 'RangePredicate', 'applyPredicate', 'predicateColumns', 'projectDataFrame', 'DataFileCache', 'EditJournal', 'fileIdentity', 'readDataFile', 'loadRawDataFile', 'parseDataFile', 'readDataFiles', 'findTimeColumn', 'expandDataFilePaths', 'dataFileType', 'optimizeDtypes', 'RawAcquisitionFile', 'ChunkedDataWriter', 'encodeTSV', 'decodeTSV', 'splitTSV']
+
+class CsvRowSource(object):
+    """
+    CSV文件的分块行数据源。
+    首次扫描时仅记录每个数据块起始行的字节偏移量，读取时按块定位并解析，因此内存占用与文件大小无关。
+    注意：不支持字段内含换行符的CSV文件。
+    """
+    def __init__(self, filename, chunkRows = 65536, header = True, scanBlockSize = 1 << 22):
+        """
+        构造器。
+        必要参数：
+            1. filename            CSV文件路径。
+        可选参数：
+            1. chunkRows           每个数据块的行数，默认为65536。
+            2. header              首行是否为表头。为False时列名称为P0, P1, ...
+            3. scanBlockSize       扫描换行符时每次读取的字节数，默认为4MB。
+        """
+        if chunkRows < 1:
+            raise ArgumentError(chunkRows)
+        self.filename = filename
+        self.chunkRows = chunkRows
+        self.scanBlockSize = scanBlockSize
+        with open(filename, 'rb') as f:
+            firstLine = f.readline()
+            firstColumns = pd.read_csv(filename, header = None, nrows = 1).shape[1] if firstLine.strip() else 0
+        if header:
+            self.columns = pd.read_csv(filename, nrows = 0).columns
+            dataStart = len(firstLine)
+        else:
+            self.columns = pd.Index(['P' + str(i) for i in range(firstColumns)])
+            dataStart = 0
+        self._offsets = [dataStart]#各数据块起始行的字节偏移量
+        self._rowCount = 0
+        self._scanPosition = dataStart
+        self._finished = False
+
+    def rowCount(self):
+        """
+        返回目前已扫描到的行数。
+        """
+        return self._rowCount
+
+    def isFinished(self):
+        """
+        返回是否已扫描至文件末尾。
+        """
+        return self._finished
+
+    def scan(self, maxRows = None):
+        """
+        继续向后扫描文件，记录数据块偏移量。
+        可选参数：
+            1. maxRows            本次最多扫描的行数，默认为None，即扫描至文件末尾。
+        返回本次新增的行数。
+        """
+        added = 0
+        with open(self.filename, 'rb') as f:
+            f.seek(self._scanPosition)
+            while not self._finished and (maxRows is None or added < maxRows):
+                block = f.read(self.scanBlockSize)
+                if not block:
+                    self._finished = True
+                    break
+                newlines = np.flatnonzero(np.frombuffer(block, dtype = np.uint8) == 10)
+                if maxRows is not None and newlines.shape[0] > maxRows - added:
+                    newlines = newlines[:maxRows - added]
+                if newlines.shape[0] == 0:
+                    if len(block) < self.scanBlockSize:#已至文件末尾，处理缺少换行符的最后一行
+                        if block.strip():
+                            self._appendRows(np.array([len(block) - 1]), self._scanPosition)
+                            added += 1
+                        self._scanPosition += len(block)
+                        self._finished = True
+                    else:#单行长度超过扫描块时扩大扫描块
+                        self.scanBlockSize *= 2
+                        f.seek(self._scanPosition)
+                    continue
+                self._appendRows(newlines, self._scanPosition)
+                added += newlines.shape[0]
+                self._scanPosition += int(newlines[-1]) + 1
+                f.seek(self._scanPosition)
+        return added
+
+    def _appendRows(self, newlines, blockStart):
+        """
+        根据一个扫描块中各行行尾的相对位置，更新行数及数据块偏移量。
+        """
+        rowNumbers = self._rowCount + np.arange(1, newlines.shape[0] + 1)
+        boundaries = newlines[rowNumbers % self.chunkRows == 0]
+        self._offsets.extend((blockStart + boundaries + 1).tolist())
+        self._rowCount += newlines.shape[0]
+
+    def scanAll(self):
+        """
+        扫描整个文件，返回总行数。
+        """
+        self.scan()
+        return self._rowCount
+
+    def readChunk(self, chunkIndex):
+        """
+        读取指定序号的数据块，返回DataFrame对象，其索引为全局行号。
+        """
+        start = chunkIndex * self.chunkRows
+        nrows = min(self.chunkRows, self._rowCount - start)
+        if chunkIndex < 0 or nrows <= 0:
+            raise ArgumentError(chunkIndex)
+        with open(self.filename, 'rb') as f:
+            f.seek(self._offsets[chunkIndex])
+            chunk = pd.read_csv(f, header = None, names = self.columns, nrows = nrows)
+        chunk.index = pd.RangeIndex(start, start + chunk.shape[0])
+        return chunk
+
+class DataFrameRowSource(object):
+    """
+    内存中DataFrame对象的分块行数据源。
+    接口与CsvRowSource一致，用于无法按字节偏移分块读取的文件(如Excel)。
+    """
+    def __init__(self, dataFrame, chunkRows = 65536):
+        """
+        构造器。
+        必要参数：
+            1. dataFrame           DataFrame对象。
+        可选参数：
+            1. chunkRows           每个数据块的行数，默认为65536。
+        """
+        if chunkRows < 1:
+            raise ArgumentError(chunkRows)
+        self.dataFrame = dataFrame
+        self.chunkRows = chunkRows
+        self.columns = dataFrame.columns
+
+    def rowCount(self):
+        return self.dataFrame.shape[0]
+
+    def isFinished(self):
+        return True
+
+    def scan(self, maxRows = None):
+        return 0
+
+    def scanAll(self):
+        return self.dataFrame.shape[0]
+
+    def readChunk(self, chunkIndex):
+        start = chunkIndex * self.chunkRows
+        if chunkIndex < 0 or start >= self.dataFrame.shape[0]:
+            raise ArgumentError(chunkIndex)
+        chunk = self.dataFrame.iloc[start:start + self.chunkRows]
+        return chunk.set_axis(pd.RangeIndex(start, start + chunk.shape[0]), axis = 0)
+
+class CsvTailReader(object):
+    """
+    持续增长的CSV文件(如PLC网关不断追加的记录)的增量读取器。
+    记录已读取位置的字节偏移量，每次只解析其后新追加的完整行，未以换行符结束的末行留待下次读取。
+    """
+    def __init__(self, filename):
+        """
+        构造器。
+        必要参数：
+            1. filename            CSV文件路径，首行为表头。
+        """
+        self.filename = filename
+        self.columns = None#表头写入完整前为None
+        self.offset = 0#已读取位置的字节偏移量
+
+    def readHeader(self, f):
+        """
+        读取表头。表头行尚未写入完整时返回False。
+        """
+        f.seek(0)
+        line = f.readline()
+        if not line.endswith(b'\n'):
+            return False
+        self.columns = pd.read_csv(io.BytesIO(line), nrows = 0).columns
+        self.offset = len(line)
+        return True
+
+    def readNew(self):
+        """
+        读取新追加的完整行，返回DataFrame对象(无新行时为空表)。
+        文件被截短或替换(大小小于已读取位置)时返回None，此时读取器已回到文件开头，调用方应丢弃已读取的数据后重新读取。
+        """
+        with open(self.filename, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size < self.offset:
+                self.columns = None
+                self.offset = 0
+                return None
+            if self.columns is None and not self.readHeader(f):
+                return pd.DataFrame()
+            f.seek(self.offset)
+            block = f.read(size - self.offset)
+        end = block.rfind(b'\n') + 1
+        if end == 0:
+            return pd.DataFrame(columns = self.columns)
+        chunk = pd.read_csv(io.BytesIO(block[:end]), header = None, names = self.columns)
+        self.offset += end
+        return chunk
+
+class EditJournal(object):
+    """
+    单元格编辑的追加式二进制日志。
+    每条记录为(行号, 列号, 原值, 新值)，只追加、不改写，可在重新读取原始数据后回放，从而无需另存整个修改后的数据表。
+    文件格式(小端序)：magic(4字节, b'ABEJ')  version(uint16)  数据源标识长度(uint32)  数据源标识(UTF-8)，其后为各条记录：
+        行号(uint32)  列号(uint32)  原值  新值
+    其中每个值以1字节类型标记开头：n为缺失值；b为布尔(1字节)；i为整数(int64)；f为浮点(float64)；M为时间(int64, 纳秒)；m为时间间隔(int64, 纳秒)；s为字符串(uint32长度及UTF-8字节)。
+    """
+    magic = b'ABEJ'
+    version = 1
+    recordFormat = struct.Struct('<II')
+
+    def __init__(self, filename, sourceKey = ''):
+        """
+        构造器。文件不存在时新建。
+        必要参数：
+            1. filename            日志文件路径。
+        可选参数：
+            1. sourceKey           新建日志时记录的数据源标识(如fileIdentity()的返回值)，用于回放前核对数据源是否被替换。
+        """
+        self.filename = filename
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            with open(filename, 'rb') as f:
+                header = f.read(10)
+                if len(header) < 10 or header[:4] != self.magic or struct.unpack('<H', header[4:6])[0] != self.version:
+                    raise ArgumentError(filename)
+                keyLength = struct.unpack('<I', header[6:10])[0]
+                self.sourceKey = f.read(keyLength).decode('utf-8')
+                self._dataStart = 10 + keyLength
+        else:
+            self.sourceKey = sourceKey
+            key = sourceKey.encode('utf-8')
+            with open(filename, 'wb') as f:
+                f.write(self.magic + struct.pack('<HI', self.version, len(key)) + key)
+            self._dataStart = 10 + len(key)
+
+    @staticmethod
+    def encodeValue(value):
+        """
+        将单元格的值编码为字节串。
+        """
+        if value is None or (not isinstance(value, (str, bytes)) and np.ndim(value) == 0 and pd.isna(value)):
+            return b'n'
+        if isinstance(value, (datetime.timedelta, np.timedelta64)):#须先于整数判断(np.timedelta64为np.integer的子类)，且pd.Timedelta亦有isoformat方法
+            return b'm' + struct.pack('<q', pd.Timedelta(value).value)
+        if isinstance(value, (bool, np.bool_)):
+            return b'b' + struct.pack('<?', bool(value))
+        if isinstance(value, (int, np.integer)):
+            return b'i' + struct.pack('<q', int(value))
+        if isinstance(value, (float, np.floating)):
+            return b'f' + struct.pack('<d', float(value))
+        if isinstance(value, (pd.Timestamp, np.datetime64)) or hasattr(value, 'isoformat'):
+            return b'M' + struct.pack('<q', pd.Timestamp(value).value)
+        text = str(value).encode('utf-8')
+        return b's' + struct.pack('<I', len(text)) + text
+
+    @staticmethod
+    def decodeValue(data, position):
+        """
+        从字节串data的position处解码一个值，返回(值, 下一个值的位置)元组。
+        """
+        tag = data[position:position + 1]
+        position += 1
+        if tag == b'n':
+            return None, position
+        elif tag == b'b':
+            return struct.unpack_from('<?', data, position)[0], position + 1
+        elif tag == b'i':
+            return struct.unpack_from('<q', data, position)[0], position + 8
+        elif tag == b'f':
+            return struct.unpack_from('<d', data, position)[0], position + 8
+        elif tag == b'M':
+            return pd.Timestamp(struct.unpack_from('<q', data, position)[0]), position + 8
+        elif tag == b'm':
+            return pd.Timedelta(struct.unpack_from('<q', data, position)[0]), position + 8
+        elif tag == b's':
+            length = struct.unpack_from('<I', data, position)[0]
+            position += 4
+            return data[position:position + length].decode('utf-8'), position + length
+        raise ArgumentError(tag)
+
+    def append(self, records):
+        """
+        追加若干条(行号, 列号, 原值, 新值)记录，一次写入文件末尾。
+        """
+        parts = []
+        for row, column, old, new in records:
+            parts.append(self.recordFormat.pack(row, column))
+            parts.append(EditJournal.encodeValue(old))
+            parts.append(EditJournal.encodeValue(new))
+        if parts:
+            with open(self.filename, 'ab') as f:
+                f.write(b''.join(parts))
+
+    def records(self):
+        """
+        按写入顺序返回全部记录的列表。文件末尾不完整的记录(如写入中断)被忽略。
+        """
+        with open(self.filename, 'rb') as f:
+            f.seek(self._dataStart)
+            data = f.read()
+        records = []
+        position = 0
+        try:
+            while position < len(data):
+                row, column = self.recordFormat.unpack_from(data, position)
+                old, position = EditJournal.decodeValue(data, position + self.recordFormat.size)
+                new, position = EditJournal.decodeValue(data, position)
+                records.append((row, column, old, new))
+        except (struct.error, UnicodeDecodeError, ArgumentError):
+            pass
+        return records
+
+    def cells(self):
+        """
+        返回各单元格的净修改，即{(行号, 列号): (最初的原值, 最终的新值)}字典。
+        """
+        cells = {}
+        for row, column, old, new in self.records():
+            cells[(row, column)] = (cells[(row, column)][0] if (row, column) in cells else old, new)
+        return cells
+
+    def replay(self, dataFrame):
+        """
+        将日志回放至数据表dataFrame(原位修改)。
+        按列批量写入各单元格的最终新值；单元格的当前值与其最初的原值不符(数据源已被修改)或超出数据表范围时跳过。
+        返回(已回放的单元格数, 跳过的单元格数)元组。
+        """
+        byColumn = {}
+        for (row, column), (old, new) in self.cells().items():
+            byColumn.setdefault(column, []).append((row, old, new))
+        applied = skipped = 0
+        for column, cells in byColumn.items():
+            if column >= dataFrame.shape[1]:
+                skipped += len(cells)
+                continue
+            cells = [cell for cell in cells if cell[0] < dataFrame.shape[0]]
+            skipped += len(byColumn[column]) - len(cells)
+            if not cells:
+                continue
+            rows = np.array([cell[0] for cell in cells], dtype = np.int64)
+            olds = pd.Series([cell[1] for cell in cells], dtype = object)
+            news = [cell[2] for cell in cells]
+            current = pd.Series(dataFrame.iloc[rows, column].to_numpy(), dtype = object)
+            match = ((current == olds) | (current.isna() & olds.isna())).to_numpy()
+            if match.any():
+                values = pd.Series(news, dtype = object)[match]
+                try:
+                    values = values.astype(dataFrame.dtypes.iloc[column])
+                except (ValueError, TypeError):
+                    pass
+                dataFrame.iloc[rows[match], column] = values.to_numpy()
+            applied += int(match.sum())
+            skipped += int((~match).sum())
+        return applied, skipped
+
+    def clear(self):
+        """
+        清空日志中的全部记录，保留文件头。
+        """
+        with open(self.filename, 'r+b') as f:
+            f.truncate(self._dataStart)
+
+def readDataFile(filename, filetype, cache = None, transform = None, columns = None, predicate = None, chunkRows = 65536):
+    """
+    读取监测数据文件，返回DataFrame对象。
+    必要参数：
+        1. filename            文件路径。
+        2. filetype            文件类型，'CSV'或'XLS'。
+    可选参数：
+        1. cache               DataFileCache对象。给定时优先从缓存读取，未命中时解析文件并写入缓存。
+        2. transform           对读取结果的处理函数(如optimizeDtypes)，接受并返回DataFrame对象。缓存中保存的是处理前的解析结果，命中缓存时同样调用。
+        3. columns             需要读取的列名列表，默认为None，即全部列。
+        4. predicate           行筛选条件(如RangePredicate或其列表，见applyPredicate)，默认为None，即全部行。
+        5. chunkRows           给定筛选条件时，CSV文件逐块解析并筛选的行数，默认为65536。
+    给定columns或predicate时，内存中只保留所需的列及行：命中缓存时从内存映射的缓存中选取；未命中时逐块解析并筛选，结果不写入缓存。
+    """
+    if filetype not in ('CSV', 'XLS'):
+        raise ArgumentError(filetype)
+    dataFrame = loadRawDataFile(filename, filetype, cache, columns, predicate, chunkRows)
+    if transform is not None:
+        dataFrame = transform(dataFrame)
+    return dataFrame
+
+def expandDataFilePaths(paths):
+    """
+    将文件路径、目录及通配符模式展开为数据文件路径列表(按文件名排序，去除重复)。
+    目录展开为其中的全部CSV及Excel文件。
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = [os.path.join(path, name) for name in os.listdir(path)]
+        elif glob.has_magic(path):
+            candidates = glob.glob(path)
+        else:
+            candidates = [path]
+        filenames.extend(sorted(candidate for candidate in candidates if os.path.isfile(candidate) and dataFileType(candidate) is not None))
+    return list(dict.fromkeys(filenames))
+
+def readDataFiles(paths, sortBy = None, cache = None, transform = None, processes = None, progress = None, isCanceled = None, columns = None, predicate = None, pollInterval = 0.1):
+    """
+    并行读取多个数据文件，合并为一个DataFrame对象并返回。
+    各文件在进程池中解析，按列名对齐(某文件缺少的列以缺失值填充)，合并后重新编号索引。
+    进程池以spawn方式创建子进程，因此可在后台线程(如QThread)中调用。
+    必要参数：
+        1. paths               文件路径、目录或通配符模式(或其列表)，见expandDataFilePaths。
+    可选参数：
+        1. sortBy              合并后排序所依据的列名(或列名列表)，采用稳定排序。
+                               默认为None，即按第一个时间列(见findTimeColumn)的时刻排序(无时间列时保持文件顺序)；为False时不排序。
+        2. cache               DataFileCache对象，各文件分别缓存。
+        3. transform           对合并结果的处理函数(如optimizeDtypes)，接受并返回DataFrame对象，在排序前调用。
+        4. processes           进程数，默认为CPU核数。
+        5. progress            进度回调函数，每读取完一个文件调用一次，参数为(已完成文件数, 文件总数)。
+        6. isCanceled          取消判断函数，返回True时放弃尚未开始的文件并返回None，不等待正在解析的文件。多进程读取时每隔pollInterval秒检查一次。
+        7. columns             需要读取的列名列表，默认为None，即全部列。
+        8. predicate           行筛选条件(见readDataFile)，在各文件解析时逐块执行，须可被pickle。
+        9. pollInterval        多进程读取时检查isCanceled的时间间隔(秒)，默认为0.1。
+    """
+    filenames = expandDataFilePaths(paths)
+    if not filenames:
+        raise ArgumentError(paths)
+    frames = [None] * len(filenames)
+    workers = min(processes or os.cpu_count() or 1, len(filenames))
+    if workers == 1:
+        for i, filename in enumerate(filenames):
+            if isCanceled is not None and isCanceled():
+                return None
+            frames[i] = _readDataFileTask(filename, cache, columns, predicate)
+            if progress is not None:
+                progress(i + 1, len(filenames))
+    else:
+        #在多线程进程中以fork方式创建子进程可能继承其他线程持有的锁而死锁，因此使用spawn
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers = workers, mp_context = multiprocessing.get_context('spawn'))
+        finished = False
+        try:
+            futures = {executor.submit(_readDataFileTask, filename, cache, columns, predicate): i for i, filename in enumerate(filenames)}
+            pending = set(futures)
+            while pending:
+                if isCanceled is not None and isCanceled():
+                    return None
+                completed, pending = concurrent.futures.wait(pending, timeout = pollInterval, return_when = concurrent.futures.FIRST_COMPLETED)
+                for future in completed:
+                    frames[futures[future]] = future.result()
+                    if progress is not None:
+                        progress(len(filenames) - len(pending), len(filenames))
+            finished = True
+        finally:#取消或出错时不等待正在解析的文件，并放弃尚未开始的文件
+            executor.shutdown(wait = finished, cancel_futures = not finished)
+    dataFrame = pd.concat(frames, ignore_index = True, sort = False)
+    if transform is not None:
+        dataFrame = transform(dataFrame)
+    if sortBy is None:
+        position = findTimeColumn(dataFrame)
+        if position is not None:#按解析所得的时刻排序，不改变该列的数据类型
+            with warnings.catch_warnings():#逐个解析格式不一致的时间字符串时会发出警告
+                warnings.simplefilter('ignore')
+                times = pd.to_datetime(dataFrame.iloc[:, position], errors = 'coerce').to_numpy()
+            dataFrame = dataFrame.take(np.argsort(times, kind = 'stable')).reset_index(drop = True)
+    elif sortBy is not False:
+        dataFrame = dataFrame.sort_values(sortBy, kind = 'stable', ignore_index = True)
+    return dataFrame
+
+def findTimeColumn(dataFrame, sampleSize = 100):
+    """
+    返回dataFrame中第一个时间列的列号，无时间列时返回None。
+    时间列为时间类型的列，或前sampleSize个非缺失值均可解析为时间的字符串列(CSV及Excel文件中的时间一般读取为字符串)。
+    """
+    for position in range(dataFrame.shape[1]):
+        series = dataFrame.iloc[:, position]
+        if series.dtype.kind == 'M':
+            return position
+        if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+            values = series.dropna().iloc[:sampleSize]
+            if values.shape[0] == 0 or pd.api.types.infer_dtype(values, skipna = True) != 'string':
+                continue
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                if pd.to_datetime(values, errors = 'coerce').notna().all():
+                    return position
+    return None
+
+def optimizeDtypes(dataFrame, floatDtype = np.float32, categoryRatio = 0.5, parseDates = True, sampleSize = 100):
+    """
+    推断并压缩DataFrame对象各列的数据类型，返回(新DataFrame对象, 报告)元组：
+        浮点列转为floatDtype(数值超出其范围的列除外)；
+        整数列转为可容纳其数值的最小宽度；
+        字符串列中，前sampleSize个值均可解析为时间的转为datetime64，不同取值个数不超过行数的categoryRatio倍的转为分类(categorical)类型。
+    报告为以列名为索引的DataFrame对象，包含dtypeBefore、dtypeAfter、bytesBefore及bytesAfter四列，bytesBefore及bytesAfter之和即整个数据表压缩前后的内存占用。
+    可选参数：
+        1. floatDtype          浮点列的目标类型，默认为numpy.float32；为None时不压缩浮点列。
+        2. categoryRatio       转为分类类型的不同取值比例上限，默认为0.5；为None时不转换。
+        3. parseDates          是否尝试将字符串列解析为时间，默认为True。
+        4. sampleSize          判断字符串列是否为时间时检查的值个数，默认为100。
+    """
+    columns = []
+    report = []
+    rowCount = dataFrame.shape[0]
+    for j in range(dataFrame.shape[1]):
+        series = dataFrame.iloc[:, j]
+        dtype = series.dtype
+        bytesBefore = series.memory_usage(index = False, deep = True)
+        if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+            if floatDtype is not None and dtype.itemsize > np.dtype(floatDtype).itemsize:
+                values = series.to_numpy()
+                finite = values[np.isfinite(values)]
+                if finite.shape[0] == 0 or np.abs(finite).max() <= np.finfo(floatDtype).max:
+                    series = series.astype(floatDtype)
+        elif isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+            series = pd.to_numeric(series, downcast = 'integer' if dtype.kind == 'i' else 'unsigned')
+        elif dtype == object or isinstance(dtype, pd.StringDtype):
+            values = series.dropna()
+            isText = values.shape[0] > 0 and pd.api.types.infer_dtype(values, skipna = True) == 'string'#混合类型的列保持原样
+            if isText and parseDates:
+                with warnings.catch_warnings():#逐个解析格式不一致的时间字符串时会发出警告
+                    warnings.simplefilter('ignore')
+                    if pd.to_datetime(values.iloc[:sampleSize], errors = 'coerce').notna().all():
+                        times = pd.to_datetime(series, errors = 'coerce')
+                        if times.notna().sum() == values.shape[0]:
+                            series = times
+            if isText and series.dtype.kind != 'M' and categoryRatio is not None and values.nunique() <= categoryRatio * rowCount:
+                series = series.astype('category')
+        columns.append(series)
+        report.append((dtype, series.dtype, bytesBefore, series.memory_usage(index = False, deep = True)))
+    optimized = pd.concat(columns, axis = 1) if columns else dataFrame.copy()
+    optimized.columns = dataFrame.columns
+    optimized.index = dataFrame.index
+    report = pd.DataFrame(report, index = dataFrame.columns, columns = ['dtypeBefore', 'dtypeAfter', 'bytesBefore', 'bytesAfter'])
+    return optimized, report
+
+class RawAcquisitionFile(object):
+    """
+    原始采集数据文件(如刀盘振动加速度记录)的内存映射读取器。
+    文件由定长文件头及其后按采样点交错存放的各通道原始数据(int16或float32)组成，文件头格式(小端序)：
+        magic(4字节, b'ABRW')  version(uint16)  通道数(uint16)  数据类型(4字节, b'i2\\0\\0'或b'f4\\0\\0')
+        采样频率(float64, Hz)  数据起始偏移(uint32, 字节)  各通道的(比例系数, 偏移量)(float64 x 2 x 通道数)
+    物理量 = 原始值 * 比例系数 + 偏移量。
+    数据以np.memmap映射，raw()返回的切片不复制数据，可用于处理数小时的长记录而不将其读入内存。
+    """
+    magic = b'ABRW'
+    version = 1
+    headerFormat = '<4sHH4sdI'
+    dtypes = {b'i2': np.dtype('<i2'), b'f4': np.dtype('<f4')}
+
+    def __init__(self, filename):
+        """
+        构造器。
+        必要参数：
+            1. filename            采集数据文件路径。
+        """
+        self.filename = filename
+        headerSize = struct.calcsize(self.headerFormat)
+        with open(filename, 'rb') as f:
+            header = f.read(headerSize)
+            if len(header) < headerSize:
+                raise ArgumentError(filename)
+            magic, version, channels, dtypeCode, sampleRate, dataOffset = struct.unpack(self.headerFormat, header)
+            dtypeCode = dtypeCode.rstrip(b'\0')
+            if magic != self.magic or version != self.version or dtypeCode not in self.dtypes or channels < 1 or sampleRate <= 0:
+                raise ArgumentError(filename)
+            calibration = np.frombuffer(f.read(16 * channels), dtype = '<f8')
+        if calibration.shape[0] != 2 * channels:
+            raise ArgumentError(filename)
+        self.channelCount = channels
+        self.sampleRate = sampleRate
+        self.dtype = self.dtypes[dtypeCode]
+        self.scale = calibration[0::2].copy()
+        self.offset = calibration[1::2].copy()
+        frameBytes = self.dtype.itemsize * channels
+        sampleCount = (os.path.getsize(filename) - dataOffset) // frameBytes#忽略末尾不完整的采样点(文件仍在写入时)
+        if sampleCount > 0:
+            self._data = np.memmap(filename, dtype = self.dtype, mode = 'r', offset = dataOffset, shape = (sampleCount, channels))
+        else:
+            self._data = np.empty((0, channels), dtype = self.dtype)
+
+    @classmethod
+    def create(cls, filename, data, sampleRate, scale = None, offset = None):
+        """
+        写入采集数据文件。
+        必要参数：
+            1. filename            文件路径。
+            2. data                原始数据，形状为(采样点数, 通道数)的int16或float32数组。
+            3. sampleRate          采样频率(Hz)。
+        可选参数：
+            1. scale               各通道的比例系数，默认为1。
+            2. offset              各通道的偏移量，默认为0。
+        """
+        data = np.asarray(data)
+        if data.ndim != 2:
+            raise SizeError(data.shape)
+        dtypeCode = [code for code, dtype in cls.dtypes.items() if dtype == data.dtype.newbyteorder('<')]
+        if not dtypeCode:
+            raise ArgumentError(data.dtype)
+        channels = data.shape[1]
+        scale = np.broadcast_to(np.ones(channels) if scale is None else np.asarray(scale, dtype = np.float64), (channels,))
+        offset = np.broadcast_to(np.zeros(channels) if offset is None else np.asarray(offset, dtype = np.float64), (channels,))
+        dataOffset = struct.calcsize(cls.headerFormat) + 16 * channels
+        with open(filename, 'wb') as f:
+            f.write(struct.pack(cls.headerFormat, cls.magic, cls.version, channels, dtypeCode[0], sampleRate, dataOffset))
+            f.write(np.column_stack((scale, offset)).astype('<f8').tobytes())
+            f.write(np.ascontiguousarray(data, dtype = cls.dtypes[dtypeCode[0]]).tobytes())
+        return cls(filename)
+
+    def sampleCount(self):
+        """
+        返回每个通道的采样点数。
+        """
+        return self._data.shape[0]
+
+    def duration(self):
+        """
+        返回记录时长(秒)。
+        """
+        return self._data.shape[0] / self.sampleRate
+
+    def indexAt(self, time):
+        """
+        返回时刻time(秒)对应的采样点序号，限制在[0, 采样点数]内。
+        """
+        return int(min(max(round(time * self.sampleRate), 0), self._data.shape[0]))
+
+    def raw(self, channel, start = 0, stop = None, step = 1):
+        """
+        返回指定通道[start, stop)区间内的原始数据。返回值为内存映射的跨步视图，不复制数据。
+        """
+        return self._data[start:stop:step, channel]
+
+    def samples(self, channel, start = 0, stop = None, step = 1):
+        """
+        返回指定通道[start, stop)区间内的物理量(float64)。仅复制所取区间的数据。
+        """
+        raw = self.raw(channel, start, stop, step)
+        return raw * self.scale[channel] + self.offset[channel]
+
+    def times(self, start = 0, stop = None, step = 1):
+        """
+        返回[start, stop)区间内各采样点的时刻(秒)。
+        """
+        start, stop, step = slice(start, stop, step).indices(self._data.shape[0])
+        return np.arange(start, stop, step) / self.sampleRate
+
+    def timeSlice(self, channel, startTime, stopTime, step = 1):
+        """
+        返回指定通道在[startTime, stopTime)时段内的(时刻, 物理量)元组。
+        """
+        start, stop = self.indexAt(startTime), self.indexAt(stopTime)
+        return self.times(start, stop, step), self.samples(channel, start, stop, step)
+
+    def pyramid(self, channel, filename = None):
+        """
+        返回指定通道原始数据的最值金字塔(MinMaxPyramid对象)，用于任意缩放程度的快速绘图。
+        金字塔保存在采集数据文件旁的附属文件中，文件已改变(如仍在写入)时重新计算。
+        可选参数：
+            1. filename            金字塔文件路径，默认为'<采集数据文件>.ch<通道序号>.pyr'。
+        """
+        if not 0 <= channel < self.channelCount:
+            raise ArgumentError(channel)
+        if filename is None:
+            filename = '{0}.ch{1}.pyr'.format(self.filename, channel)
+        return MinMaxPyramid.forArray(self.raw(channel), filename, fileIdentity(self.filename))
+
+    def close(self):
+        """
+        释放内存映射。
+        """
+        self._data = np.empty((0, self.channelCount), dtype = self.dtype)
+
+class ChunkedDataWriter(object):
+    """
+    数据文件的分块写入器。
+    数据以DataFrame数据块的形式逐块写入，内存占用仅与数据块大小有关：
+        CSV        逐块追加文本；
+        XLSX       使用xlsxwriter的constant_memory模式逐行写入，超出单个工作表的行数上限时续写至新工作表；
+        PARQUET    每个数据块写为一个行组(row group)，需要pyarrow。
+    """
+    filetypes = ('CSV', 'XLSX', 'PARQUET')
+    excelMaxRows = 1048576#Excel单个工作表的最大行数(含表头)
+
+    def __init__(self, filename, filetype, columns):
+        """
+        构造器。
+        必要参数：
+            1. filename            文件路径。
+            2. filetype            文件类型，'CSV'、'XLSX'或'PARQUET'。
+            3. columns             各列名称。
+        """
+        if filetype not in self.filetypes:
+            raise ArgumentError(filetype)
+        self.filename = filename
+        self.filetype = filetype
+        self.columns = pd.Index(columns)
+        self.rowCount = 0
+        if filetype == 'CSV':
+            self._file = open(filename, 'w', encoding = 'utf-8', newline = '')
+            pd.DataFrame(columns = self.columns).to_csv(self._file, index = False, lineterminator = '\n')
+        elif filetype == 'XLSX':
+            import xlsxwriter
+            self._workbook = xlsxwriter.Workbook(filename, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd hh:mm:ss'})
+            self._sheet = None
+            self._sheetRow = 0
+        else:
+            import pyarrow
+            import pyarrow.parquet
+            self._pyarrow = pyarrow
+            self._parquetModule = pyarrow.parquet
+            self._parquet = None#首个数据块写入时按其结构创建
+
+    def write(self, chunk):
+        """
+        写入一个数据块，其列数须与columns一致。
+        """
+        if chunk.shape[1] != self.columns.shape[0]:
+            raise SizeError(chunk.shape[1])
+        chunk = chunk.set_axis(self.columns, axis = 1)
+        if self.filetype == 'CSV':
+            chunk.to_csv(self._file, header = False, index = False, lineterminator = '\n')
+        elif self.filetype == 'XLSX':
+            self.writeExcelRows(chunk)
+        else:
+            chunk = chunk.set_axis([str(column) for column in self.columns], axis = 1)
+            if self._parquet is None:
+                table = self._pyarrow.Table.from_pandas(chunk, preserve_index = False)
+                self._parquet = self._parquetModule.ParquetWriter(self.filename, table.schema)
+            else:
+                table = self._pyarrow.Table.from_pandas(chunk, schema = self._parquet.schema, preserve_index = False)
+            self._parquet.write_table(table)
+        self.rowCount += chunk.shape[0]
+
+    def writeExcelRows(self, chunk):
+        """
+        将数据块逐行写入Excel工作表。缺失值写为空单元格。
+        """
+        values = chunk.to_numpy(dtype = object)
+        values[pd.isna(chunk).to_numpy()] = None
+        for row in values:
+            if self._sheet is None or self._sheetRow >= self.excelMaxRows:
+                self._sheet = self._workbook.add_worksheet()
+                self._sheet.write_row(0, 0, [str(column) for column in self.columns])
+                self._sheetRow = 1
+            self._sheet.write_row(self._sheetRow, 0, row)
+            self._sheetRow += 1
+
+    def close(self):
+        """
+        完成写入并关闭文件。
+        """
+        if self.filetype == 'CSV':
+            self._file.close()
+        elif self.filetype == 'XLSX':
+            if self._sheet is None:
+                self._workbook.add_worksheet().write_row(0, 0, [str(column) for column in self.columns])
+            self._workbook.close()
+        else:
+            if self._parquet is None:
+                self._parquetModule.write_table(self._pyarrow.Table.from_pandas(
+                    pd.DataFrame(columns = [str(column) for column in self.columns]), preserve_index = False), self.filename)
+            else:
+                self._parquet.close()
+
+    def abort(self):
+        """
+        放弃写入，关闭并删除未完成的文件。
+        """
+        try:
+            if self.filetype == 'CSV':
+                self._file.close()
+            elif self.filetype == 'PARQUET' and self._parquet is not None:
+                self._parquet.close()
+        finally:
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+
+def encodeTSV(dataFrame):
+    """
+    将DataFrame对象(或二维数组)编码为制表符分隔的文本(TSV)，不含表头及索引，可直接粘贴至Excel。
+    编码由pandas的C语言实现完成，适用于大量单元格。含双引号、制表符或换行符的单元格按最少引号规则(QUOTE_MINIMAL)加引号，与decodeTSV()一致。
+    """
+    if not isinstance(dataFrame, pd.DataFrame):
+        dataFrame = pd.DataFrame(np.asarray(dataFrame))
+    return dataFrame.to_csv(sep = '\t', header = False, index = False, lineterminator = '\n', quoting = csv.QUOTE_MINIMAL)
+
+def decodeTSV(text):
+    """
+    将制表符分隔的文本(TSV，如从Excel复制的单元格)解码为二维字符串数组(dtype = object)。
+    按最少引号规则(QUOTE_MINIMAL)解析，与encodeTSV()及Excel一致：以双引号包围的单元格可含制表符、换行符及转义的双引号("")。
+    各行长度不一时以空字符串补齐；末尾的空行被忽略。
+    不含双引号的各行一次性拆分并以数组索引填入结果，只有含双引号的行(及其引号内换行所延续的行)逐条以csv模块解析。
+    """
+    text = text.replace('\r\n', '\n').replace('\r', '\n').rstrip('\n')
+    if not text:
+        return np.empty((0, 0), dtype = object)
+    if '"' not in text:
+        return splitTSV(text)
+    lines = text.split('\n')
+    plainLines, plainRows = [], []#不含双引号的行及其在结果中的行号
+    records, recordRows = [], []#以csv模块解析的各行及其在结果中的行号
+    position = 0
+    for i in [i for i, line in enumerate(lines) if '"' in line]:
+        if i < position:#已作为前一个单元格引号内的换行被读取
+            continue
+        plainRows.extend(range(len(plainRows) + len(records), len(plainRows) + len(records) + i - position))
+        plainLines.extend(lines[position:i])
+        reader = csv.reader((lines[j] + '\n' if j < len(lines) - 1 else lines[j] for j in range(i, len(lines))), delimiter = '\t', quoting = csv.QUOTE_MINIMAL)
+        recordRows.append(len(plainRows) + len(records))
+        records.append(next(reader))
+        position = i + reader.line_num
+    plainRows.extend(range(len(plainRows) + len(records), len(plainRows) + len(records) + len(lines) - position))
+    plainLines.extend(lines[position:])
+    plain = splitTSV('\n'.join(plainLines)) if plainLines else np.empty((0, 0), dtype = object)
+    block = np.full((len(plainRows) + len(records), max([plain.shape[1]] + [len(record) for record in records])), '', dtype = object)
+    block[plainRows, :plain.shape[1]] = plain
+    for row, record in zip(recordRows, records):
+        block[row, :len(record)] = record
+    return block
+
+def splitTSV(text):
+    """
+    将不含双引号的TSV文本解码为二维字符串数组(dtype = object)，各行长度不一时以空字符串补齐。
+    全部单元格一次拆分，再按各分隔符是否为换行符求得各单元格所在的行号及列号，一次性填入数组，不逐行逐格循环。
+    """
+    fields = np.array(text.replace('\n', '\t').split('\t'), dtype = object)
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype = np.uint32)
+    separators = codes[(codes == 9) | (codes == 10)]
+    rowStarts = np.concatenate(([0], np.flatnonzero(separators == 10) + 1))#各行第一个单元格的序号
+    widths = np.diff(np.append(rowStarts, len(fields)))
+    if np.all(widths == widths[0]):#各行等长时直接变形
+        return fields.reshape(len(rowStarts), widths[0])
+    rowOf = np.repeat(np.arange(len(rowStarts)), widths)#各单元格的行号
+    columnOf = np.arange(len(fields)) - rowStarts[rowOf]
+    block = np.full((len(rowStarts), int(widths.max())), '', dtype = object)
+    block[rowOf, columnOf] = fields
+    return block
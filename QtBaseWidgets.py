@@ -1,14 +1,7 @@
 #encoding: utf-8
 
 import sys, os, random
-import matplotlib
-matplotlib.use("Qt5Agg")
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
-from matplotlib.figure import Figure
-from matplotlib import cm
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.pyplot as plt
+import types
 import PyQt5.QtCore as qtc
 import PyQt5.QtWidgets as qtw
 import PyQt5.QtGui as qtg
@@ -18,6 +11,8 @@ import pandas as pd
 from QtGeneralUtilities import *
 from QtDataModels import *
 from QtDelegates import *
+from QtWorkers import *
+from SignalUtilities import decimate, visibleSlice
 
 __all__ = ['QDataSheetWidget', 'QMatplotlibWidget']
 
@@ -39,6 +34,8 @@ class QDataSheetWidget(qtw.QWidget):
         self._iconSize = qtc.QSize(36, 24)
         self._newcolumncount = 1
         self._workFolder = None
+        self._model = None
+        self._task = None#后台读取或导出线程
         self.setupUi()
         
     def setupUi(self):
@@ -59,6 +56,11 @@ class QDataSheetWidget(qtw.QWidget):
         self.loadDataButton.setObjectName('loadDataButton')
         self.loadDataButton.setText(self.tr('load'))
         self.loadDataButton.setToolTip(self.tr('load data'))
+
+        self.exportDataButton = qtw.QToolButton(self.buttonFrame)#导出数据按钮
+        self.exportDataButton.setObjectName('exportDataButton')
+        self.exportDataButton.setText(self.tr('export'))
+        self.exportDataButton.setToolTip(self.tr('export data'))
         
         self.clearDataButton = qtw.QToolButton(self.buttonFrame)#清空数据按钮
         self.clearDataButton.setObjectName('clearDataButton')
@@ -90,7 +92,7 @@ class QDataSheetWidget(qtw.QWidget):
         self.removeRowButton.setText(self.tr('-row'))
         self.removeRowButton.setToolTip(self.tr('remove selected rows'))
 
-        self.buttons = [self.loadDataButton, self.clearDataButton, self.editDataButton, self.addColumnButton, self.addRowButton, self.removeColumnButton, self.removeRowButton]
+        self.buttons = [self.loadDataButton, self.exportDataButton, self.clearDataButton, self.editDataButton, self.addColumnButton, self.addRowButton, self.removeColumnButton, self.removeRowButton]
 
         for index, button in enumerate(self.buttons):
             button.setMinimumSize(self._iconSize)
@@ -100,15 +102,43 @@ class QDataSheetWidget(qtw.QWidget):
             self.buttonFrameLayout.addWidget(button, 0, index, 1, 1)
         self.buttonFrameLayout.addItem(spacerItemButton, 0, index+1, 1, 1)
 
+        self.taskProgressBar = qtw.QProgressBar(self.buttonFrame)#后台读取或导出进度
+        self.taskProgressBar.setRange(0, 100)
+        self.taskProgressBar.setMaximumHeight(self._iconSize.height())
+        self.taskProgressBar.hide()
+        self.cancelTaskButton = qtw.QToolButton(self.buttonFrame)#取消读取或导出按钮
+        self.cancelTaskButton.setObjectName('cancelTaskButton')
+        self.cancelTaskButton.setText(self.tr('cancel'))
+        self.cancelTaskButton.setToolTip(self.tr('cancel loading or exporting'))
+        self.cancelTaskButton.setMinimumSize(self._iconSize)
+        self.cancelTaskButton.setMaximumSize(self._iconSize)
+        self.cancelTaskButton.hide()
+        self.buttonFrameLayout.addWidget(self.taskProgressBar, 0, index+2, 1, 1)
+        self.buttonFrameLayout.addWidget(self.cancelTaskButton, 0, index+3, 1, 1)
+
         self.tableView = qtw.QTableView(self)#tableView窗体
         self.tableView.setAlternatingRowColors(True)
-        self.tableView.setSortingEnabled(False)
+        self.proxyModel = QDataFrameSortFilterProxyModel(self)#排序/筛选代理模型，点击表头即可排序
+        self.tableView.setSortingEnabled(True)
+        self.tableView.horizontalHeader().setSortIndicator(-1, qtc.Qt.AscendingOrder)
         self.tableView.horizontalHeader().setSectionResizeMode(qtw.QHeaderView.Stretch)
         self.tableView.horizontalHeader().setMinimumSectionSize(50)
         self.tableView.verticalHeader().setSectionResizeMode(qtw.QHeaderView.Fixed)
         self.tableView.verticalHeader().setDefaultSectionSize(20)
         self.tableView.verticalHeader().setSectionsMovable(False)
         
+        self.copyAction = qtw.QAction(self.tr('copy'), self.tableView)#复制选区至剪贴板
+        self.copyAction.setObjectName('copyAction')
+        self.copyAction.setShortcut(qtg.QKeySequence.Copy)
+        self.copyAction.setShortcutContext(qtc.Qt.WidgetShortcut)
+        self.pasteAction = qtw.QAction(self.tr('paste'), self.tableView)#从剪贴板粘贴
+        self.pasteAction.setObjectName('pasteAction')
+        self.pasteAction.setShortcut(qtg.QKeySequence.Paste)
+        self.pasteAction.setShortcutContext(qtc.Qt.WidgetShortcut)
+        self.tableView.addAction(self.copyAction)
+        self.tableView.addAction(self.pasteAction)
+        self.tableView.setContextMenuPolicy(qtc.Qt.ActionsContextMenu)
+        
         self.gridLayout.addWidget(self.buttonFrame, 0, 0, 1, 1)
         self.gridLayout.addWidget(self.tableView, 1, 0, 1, 1)        
         
@@ -119,64 +149,267 @@ class QDataSheetWidget(qtw.QWidget):
             self.dataFrameChanged.emit()
             
     def onModelChanged(self):
-        self.addColumnButton.setEnabled(self.tableView.model()._editable)
-        self.addRowButton.setEnabled(self.tableView.model()._editable)
-        self.removeColumnButton.setEnabled(self.tableView.model()._editable)
-        self.removeRowButton.setEnabled(self.tableView.model()._editable)        
+        self.addColumnButton.setEnabled(self.model()._editable)
+        self.addRowButton.setEnabled(self.model()._editable)
+        self.removeColumnButton.setEnabled(self.model()._editable)
+        self.removeRowButton.setEnabled(self.model()._editable)        
         
     def setModel(self, model):
         """
         为tableView控件设定数据模型。
-        等价于table.setModel()
+        模型经由排序/筛选代理模型proxyModel显示在tableView中。
         """
         if isinstance(model, QDataFrameModel):
-            self.tableView.setModel(model)
-            self.tableView.model().dataChanged.connect(self.onDataChanged)
+            self._model = model
+            self.proxyModel.setSourceModel(model)
+            self.tableView.setModel(self.proxyModel)
+            self.tableView.horizontalHeader().setSortIndicator(-1, qtc.Qt.AscendingOrder)
+            self.model().dataChanged.connect(self.onDataChanged)
             self.onModelChanged()
         else:
             raise TypeError("The input argument must be a QDataFrameModel object.")
+
+    def model(self):
+        """
+        返回tableView控件的数据模型(QDataFrameModel对象，而非代理模型)。
+        """
+        return self._model
         
+    def selectionRect(self):
+        """
+        返回tableView中选区的外接矩形(起始行, 起始列, 终止行, 终止列)，行号为代理模型中的行号。无选区时返回None。
+        """
+        selection = self.tableView.selectionModel().selection() if self.tableView.selectionModel() is not None else []
+        if not selection:
+            return None
+        return min(r.top() for r in selection), min(r.left() for r in selection), max(r.bottom() for r in selection), max(r.right() for r in selection)
+
+    @qtc.pyqtSlot()
+    def on_copyAction_triggered(self):
+        """
+        将选区(的外接矩形)中的原始数据以TSV格式复制至系统剪贴板。
+        """
+        model = self.model()
+        rect = self.selectionRect()
+        if model is None or rect is None:
+            return
+        top, left, bottom, right = rect
+        rows = self.proxyModel.sourceRows(range(top, bottom + 1))
+        text = encodeTSV(model.dataFrame.iloc[rows, left:right + 1])
+        qtw.QApplication.clipboard().setText(text)
+
+    @qtc.pyqtSlot()
+    def on_pasteAction_triggered(self):
+        """
+        将系统剪贴板中的TSV文本粘贴至以当前单元格为左上角的区域。仅在可编辑时有效。
+        """
+        model = self.model()
+        current = self.tableView.currentIndex()
+        if model is None or not model._editable or not current.isValid():
+            return
+        block = decodeTSV(qtw.QApplication.clipboard().text())
+        if block.size == 0:
+            return
+        rows = self.proxyModel.sourceRows(range(current.row(), min(current.row() + block.shape[0], self.proxyModel.rowCount())))
+        model.pasteBlock(0, current.column(), block, rows)
+
     @qtc.pyqtSlot(bool)
     def on_loadDataButton_toggled(self, triggered):
         """
         为tableView控件的数据模型读取数据。
+        数据在后台线程中分块读取，读取期间界面保持响应。选择多个文件时并行读取并合并。
         """
         if triggered:
-            model = self.tableView.model()
+            model = self.model()
             if model is not None:
-                filename, filetype = qtw.QFileDialog.getOpenFileName(self, '打开数据文件', os.getcwd() if self._workFolder == None else self._workFolder, "Microsoft Excel Spreedsheets (*.xls, *.xlsx);;Comma Separated Values (*.csv)")
-                if filetype == 'Comma Separated Values (*.csv)':
-                    self.tableView.model().readDataFrameFromFile(filename, 'CSV')
-                elif filetype == 'Microsoft Excel Spreedsheets (*.xls, *.xlsx)':
-                    self.tableView.model().readDataFrameFromFile(filename, 'XLS')
-                delegate = QDoubleSpinboxDelegate(self.tableView)
-                delegate.singleStep = 0.1#输入代理框的调整步长，可根据实际需要调整
-                self.tableView.setItemDelegate(delegate)
-                self.tableView.model().confirmEdit()#改动直接反映至DataFrameModel中的原始DataFrame中，此句可根据实际需要调整
-                self.dataFrameChanged.emit()
+                filenames, filetype = qtw.QFileDialog.getOpenFileNames(self, '打开数据文件', os.getcwd() if self._workFolder == None else self._workFolder, "Microsoft Excel Spreedsheets (*.xls, *.xlsx);;Comma Separated Values (*.csv)")
+                if len(filenames) > 1:
+                    self.loadDataFiles(filenames)
+                elif filenames:
+                    if filetype == 'Comma Separated Values (*.csv)':
+                        self.loadDataFile(filenames[0], 'CSV')
+                    elif filetype == 'Microsoft Excel Spreedsheets (*.xls, *.xlsx)':
+                        self.loadDataFile(filenames[0], 'XLS')
             self.sender().setChecked(False)
+
+    def loadDataFile(self, filename, filetype, columns = None, predicate = None):
+        """
+        在后台线程中读取数据文件，逐块追加至数据模型并显示进度。
+        必要参数：
+            1. filename            文件路径。
+            2. filetype            文件类型，'CSV'或'XLS'。
+        可选参数：
+            1. columns             需要读取的列名列表，默认为None，即全部列。
+            2. predicate           行筛选条件(如RangePredicate或其列表)，默认为None，即全部行。
+        """
+        model = self.model()
+        if model is None:
+            return
+        self.cancelTask()
+        token = model.beginStreamingLoad()
+        self._task = QDataFileLoader(filename, filetype, self, cache = model.dataFileCache, optimize = model.optimizeDtypesOnImport,
+                                     columns = columns, predicate = predicate)
+        self._task.dtypesOptimized.connect(lambda report: model.dtypesOptimized.emit(filename, report))
+        self._task.chunkLoaded.connect(lambda chunk: model.appendDataFrameChunk(chunk, token))#数据块携带读取标识，被取消的读取中延迟送达的数据块将被丢弃
+        self._task.loadFinished.connect(self.onLoadFinished)
+        self._task.loadCanceled.connect(self.onLoadAborted)
+        self._task.loadFailed.connect(self.onLoadAborted)
+        self.startTask()
+
+    def loadDataFiles(self, paths, sortBy = None, columns = None, predicate = None):
+        """
+        在后台并行读取多个数据文件，合并后存入数据模型并显示进度。
+        必要参数：
+            1. paths               文件路径、目录或通配符模式(或其列表)。
+        可选参数：
+            1. sortBy              合并后排序所依据的列名，默认为None，即按第一个时间列排序。
+            2. columns             需要读取的列名列表，默认为None，即全部列。
+            3. predicate           行筛选条件(如RangePredicate或其列表)，默认为None，即全部行。
+        """
+        model = self.model()
+        if model is None:
+            return
+        self.cancelTask()
+        token = model.beginStreamingLoad()
+        self._task = QMultiFileLoader(paths, self, sortBy, cache = model.dataFileCache, optimize = model.optimizeDtypesOnImport,
+                                      columns = columns, predicate = predicate)
+        self._task.chunkLoaded.connect(lambda chunk: model.appendDataFrameChunk(chunk, token))#数据块携带读取标识，被取消的读取中延迟送达的数据块将被丢弃
+        self._task.dtypesOptimized.connect(lambda report: model.dtypesOptimized.emit(str(paths), report))
+        self._task.loadFinished.connect(self.onLoadFinished)
+        self._task.loadCanceled.connect(self.onLoadAborted)
+        self._task.loadFailed.connect(self.onLoadAborted)
+        self.startTask()
+
+    @qtc.pyqtSlot(bool)
+    def on_exportDataButton_toggled(self, triggered):
+        """
+        将tableView控件的数据模型中的数据导出至文件。
+        数据在后台线程中分块写入，导出期间界面保持响应。
+        """
+        if triggered:
+            model = self.model()
+            if model is not None:
+                filename, filetype = qtw.QFileDialog.getSaveFileName(self, '导出数据文件', os.getcwd() if self._workFolder == None else self._workFolder, "Comma Separated Values (*.csv);;Microsoft Excel Spreedsheets (*.xlsx);;Apache Parquet (*.parquet)")
+                if filename:
+                    if filetype == 'Comma Separated Values (*.csv)':
+                        self.exportDataFile(filename, 'CSV')
+                    elif filetype == 'Microsoft Excel Spreedsheets (*.xlsx)':
+                        self.exportDataFile(filename, 'XLSX')
+                    elif filetype == 'Apache Parquet (*.parquet)':
+                        self.exportDataFile(filename, 'PARQUET')
+            self.sender().setChecked(False)
+
+    def exportDataFile(self, filename, filetype):
+        """
+        在后台线程中将数据模型中的数据分块导出至文件并显示进度。
+        必要参数：
+            1. filename            文件路径。
+            2. filetype            文件类型，'CSV'、'XLSX'或'PARQUET'。
+        """
+        model = self.model()
+        if model is None:
+            return
+        self.cancelTask()
+        self._task = QDataExporter(model.rowSource(), filename, filetype, self)
+        self._task.exportFinished.connect(self.finishTask)
+        self._task.exportCanceled.connect(self.finishTask)
+        self._task.exportFailed.connect(self.onExportFailed)
+        self.startTask()
+
+    def startTask(self):
+        """
+        启动后台任务线程，显示进度条及取消按钮。
+        """
+        self._task.progressChanged.connect(self.taskProgressBar.setValue)
+        self.taskProgressBar.setValue(0)
+        self.taskProgressBar.show()
+        self.cancelTaskButton.show()
+        self.loadDataButton.setEnabled(False)
+        self.exportDataButton.setEnabled(False)
+        self._task.start()
+
+    def cancelTask(self):
+        """
+        取消正在进行的后台任务。不等待其线程结束(以免正在解析或写入的数据块阻塞界面)，线程结束后自行删除。
+        """
+        if self._task is not None:
+            task = self._task
+            task.cancel()
+            task.disconnect()#断开全部信号：任务线程已发出及此后发出的信号不再触发槽函数，以免干扰随后开始的任务
+            task.finished.connect(task.deleteLater)
+            if task.isFinished():
+                task.deleteLater()
+            if isinstance(task, (QDataFileLoader, QMultiFileLoader)) and self.model() is not None:
+                self.onLoadAborted()#恢复读取前的数据，并丢弃尚未送达数据模型的数据块
+            else:
+                self.finishTask()
+
+    @qtc.pyqtSlot()
+    def on_cancelTaskButton_clicked(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def onLoadFinished(self):
+        """
+        后台读取完成时调用的槽函数。
+        """
+        delegate = QDoubleSpinboxDelegate(self.tableView)
+        delegate.singleStep = 0.1#输入代理框的调整步长，可根据实际需要调整
+        self.tableView.setItemDelegate(delegate)
+        self.model().confirmEdit()#改动直接反映至DataFrameModel中的原始DataFrame中，此句可根据实际需要调整
+        if isinstance(self._task, QDataFileLoader) and not self._task.isPartial():#只读取部分行列时，日志中的行列号不适用
+            self.model().attachFileJournal(self._task.filename)#回放该文件此前确认的编辑，此后确认的编辑追加至日志
+        else:
+            self.model().detachJournal()
+        self.finishTask()
+        self.dataFrameChanged.emit()
+
+    def onLoadAborted(self, message = None):
+        """
+        后台读取被取消或出错时调用的槽函数。恢复读取前的数据。
+        """
+        self.model().refuteEdit()
+        self.finishTask()
+        if message:
+            qtw.QMessageBox.warning(self, self.tr('load data'), message)
+
+    def onExportFailed(self, message):
+        """
+        后台导出出错时调用的槽函数。
+        """
+        self.finishTask()
+        qtw.QMessageBox.warning(self, self.tr('export data'), message)
+
+    def finishTask(self):
+        if isinstance(self._task, (QDataFileLoader, QMultiFileLoader)) and self.model() is not None:
+            self.model().endStreamingLoad()
+        self.taskProgressBar.hide()
+        self.cancelTaskButton.hide()
+        self.loadDataButton.setEnabled(True)
+        self.exportDataButton.setEnabled(True)
+        self._task = None
             
     @qtc.pyqtSlot(bool)
     def on_clearDataButton_toggled(self, triggered):
         if triggered:
-            model = self.tableView.model()
+            model = self.model()
             if model is not None:
-                self.tableView.model().layoutAboutToBeChanged.emit()
-                QDataFrameModel.clearDataFrameAndReshape(self.tableView.model().dataFrame, (0, 0))
-                self.tableView.model().layoutChanged.emit()
-                #self.tableView.model().confirmEdit()#改动直接反映至DataFrameModel中的原始DataFrame中，此句可根据实际需要调整
+                self.model().layoutAboutToBeChanged.emit()
+                QDataFrameModel.clearDataFrameAndReshape(self.model().dataFrame, (0, 0))
+                self.model().layoutChanged.emit()
+                #self.model().confirmEdit()#改动直接反映至DataFrameModel中的原始DataFrame中，此句可根据实际需要调整
                 self.dataFrameChanged.emit()
             self.sender().setChecked(False)
             
     @qtc.pyqtSlot(bool)
     def on_editDataButton_toggled(self, triggered):
-        model = self.tableView.model()
+        model = self.model()
         if model is not None:
             if triggered:
-                self.tableView.model()._editable = True
+                self.model()._editable = True
             else:
-                self.tableView.model()._editable = False
-                self.tableView.model().confirmEdit()#改动直接反映至DataFrameModel中的原始DataFrame中，此句可根据实际需要调整
+                self.model()._editable = False
+                self.model().confirmEdit()#改动直接反映至DataFrameModel中的原始DataFrame中，此句可根据实际需要调整
                 self.dataFrameChanged.emit()
             self.onModelChanged()
         else:
@@ -205,7 +438,7 @@ class QDataSheetWidget(qtw.QWidget):
                 activated, the row will be appended to the end.
         """
         if triggered:
-            model = self.tableView.model()
+            model = self.model()
             if model is not None:
                 status = model.addDataFrameColumn('New Column' + str(self._newcolumncount), float, 0.0)
                 if status:
@@ -227,7 +460,7 @@ class QDataSheetWidget(qtw.QWidget):
                 activated, the row will be appended to the end.
         """
         if triggered:
-            model = self.tableView.model()
+            model = self.model()
             if model is not None:
                 status = model.addDataFrameRows()
                 if status:
@@ -246,11 +479,11 @@ class QDataSheetWidget(qtw.QWidget):
                 from the model.
         """
         if triggered:
-            model = self.tableView.model()
+            model = self.model()
             if model is not None:
                 selection = self.tableView.selectedIndexes()
     
-                rows = [index.row() for index in selection]
+                rows = self.proxyModel.sourceRows(set(index.row() for index in selection))
                 status = model.removeDataFrameRows(set(rows))
                 if status:
                     self.onDataChanged()
@@ -268,7 +501,7 @@ class QDataSheetWidget(qtw.QWidget):
                 from the model.
         """
         if triggered:
-            model = self.tableView.model()
+            model = self.model()
             if model is not None:
                 selection = self.tableView.selectedIndexes()            
         
@@ -278,62 +511,422 @@ class QDataSheetWidget(qtw.QWidget):
                     self.onDataChanged()
             self.sender().setChecked(False)
             
-class MyMplCanvas(FigureCanvas):
+#中文字体的候选列表，按优先顺序排列，只使用已安装的字体
+CJK_FONT_FAMILIES = ('SimHei', 'Microsoft YaHei', 'Noto Sans CJK SC', 'Source Han Sans SC', 'WenQuanYi Micro Hei')
+
+_matplotlib = None#延迟导入的matplotlib相关类
+
+def importMatplotlib():
     """
-    用于PyQt5的Matplotlib画布。
-    FigureCanvas的最终的父类其实是QWidget。
+    导入matplotlib(Qt5Agg后端)并配置中文字体，返回包含Figure、FigureCanvas、NavigationToolbar及MyMplCanvas的命名空间。
+    matplotlib的导入开销较大，因此延迟至首个画布创建时才导入，程序启动时不必等待；仅首次调用时导入及配置，之后返回缓存的结果。
     """
+    global _matplotlib
+    if _matplotlib is not None:
+        return _matplotlib
+    import matplotlib
+    matplotlib.use("Qt5Agg")
+    from matplotlib import font_manager
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+    from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+    from matplotlib.figure import Figure
 
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
+    # 配置中文显示(全局仅一次)。只列出已安装的中文字体，避免每次绘制文字时查找缺失的字体
+    installed = {font.name for font in font_manager.fontManager.ttflist}
+    families = [family for family in CJK_FONT_FAMILIES if family in installed]
+    matplotlib.rcParams['font.sans-serif'] = families + [family for family in matplotlib.rcParams['font.sans-serif'] if family not in families]
+    matplotlib.rcParams['font.family'] = ['sans-serif']  # 用来正常显示中文标签
+    matplotlib.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
 
-        # 配置中文显示
-        plt.rcParams['font.family'] = ['SimHei']  # 用来正常显示中文标签
-        plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
-        
-        #plt.ion()  # 打开交互式绘图
+    class MyMplCanvas(FigureCanvas):
+        """
+        用于PyQt5的Matplotlib画布。
+        FigureCanvas的最终的父类其实是QWidget。
+        """
 
-        self.fig = Figure(figsize=(width, height), dpi=dpi)  # 新建一个figure
-        #self.axes = self.fig.add_subplot(111)  # 建立一个子图，如果要建立复合图，可以在这里修改
+        def __init__(self, parent=None, width=5, height=4, dpi=100):
 
-        #self.axes.hold(False)  # 每次绘图的时候不保留上一次绘图的结果
+            self.fig = Figure(figsize=(width, height), dpi=dpi)  # 新建一个figure
 
-        FigureCanvas.__init__(self, self.fig)
-        self.setParent(parent)
+            FigureCanvas.__init__(self, self.fig)
+            self.setParent(parent)
 
-        '''定义FigureCanvas的尺寸策略，这部分的意思是设置FigureCanvas，使之尽可能的向外填充空间。'''
-        FigureCanvas.setSizePolicy(self,
-                                   qtw.QSizePolicy.Expanding,
-                                   qtw.QSizePolicy.Expanding)
-        FigureCanvas.updateGeometry(self)
+            '''定义FigureCanvas的尺寸策略，这部分的意思是设置FigureCanvas，使之尽可能的向外填充空间。'''
+            FigureCanvas.setSizePolicy(self,
+                                       qtw.QSizePolicy.Expanding,
+                                       qtw.QSizePolicy.Expanding)
+            FigureCanvas.updateGeometry(self)
+
+    _matplotlib = types.SimpleNamespace(Figure = Figure, FigureCanvas = FigureCanvas, NavigationToolbar = NavigationToolbar, MyMplCanvas = MyMplCanvas)
+    return _matplotlib
+
+def __getattr__(name):
+    """
+    按需导入matplotlib相关类，使QtBaseWidgets.MyMplCanvas等名称仍可直接访问。
+    """
+    if name in ('Figure', 'FigureCanvas', 'NavigationToolbar', 'MyMplCanvas'):
+        return getattr(importMatplotlib(), name)
+    raise AttributeError(name)
 
 class QMatplotlibWidget(qtw.QWidget):
     """
     用于PyQt5的Matplotlib窗体。
+    实时曲线(addLiveSeries创建)只创建一次，更新数据后以refreshLiveSeries()局部重绘(blitting)：
+        整体重绘(draw)时缓存不含实时曲线的背景；
+        局部重绘时恢复背景，只重绘实时曲线并刷新画布，不重新绘制坐标轴、刻度及文字。
+    缩放、平移、改变窗体尺寸等操作会触发整体重绘，背景随之更新。
+    长时间序列以plotDecimated()绘制：窗体保留完整数据，曲线只显示当前横坐标范围内的数据按坐标轴像素宽度降采样后的结果，
+    缩放、平移(坐标范围改变)或改变窗体尺寸时重新计算，绘制开销只与屏幕像素数有关，与数据长度无关。
+    超长的等间隔采样记录(如振动加速度)以plotPyramid()绘制，按可见范围从预先计算的最值金字塔(MinMaxPyramid)中选取合适的层，不必扫描可见范围内的全部数据。
+    画布在窗体首次绘制后或首次访问画布(fig、add_subplot、draw等)时才创建，未打开的选项卡中的窗体不导入matplotlib，也不创建画布。
+    渲染耗时的静态图形(如三维曲面、时频图)可用renderInBackground()在后台线程中渲染(见QFigureRenderer)，渲染期间界面仍可响应操作。
     """
     def __init__(self, parent=None, ntb_on = False):
         super(QMatplotlibWidget, self).__init__(parent)
+        self.liveSeries = []#实时曲线(Line2D对象)列表
+        self._liveAutoscale = {}#实时曲线: 是否自动扩展坐标范围
+        self._background = None#不含实时曲线的背景缓存
+        self._decimated = {}#降采样曲线: (横坐标数值数组, 纵坐标数组, 降采样方法)
+        self._pyramids = {}#金字塔曲线: (MinMaxPyramid对象, 采样频率, 起始时刻, 比例系数, 偏移量)
+        self._decimatedAxes = set()#已连接坐标范围改变回调的子图
+        self._canvas = None
+        self._navigationToolbar = None
+        self._renderer = None#后台渲染线程
+        self._renderRequest = None#后台渲染模式下最新的(绘图函数, 位置参数, 关键字参数)
+        self._renderedImage = None#后台渲染的结果，(QImage对象, 像素数据缓冲区)
+        self._renderError = None
         self.initUi(ntb_on)
 
     def initUi(self, ntb_on):
         self.layout = qtw.QVBoxLayout(self)
-        self.matplotlibCanvas = MyMplCanvas(self, width=5, height=4, dpi=100)
         self.axesList = []
-        self.fig = self.matplotlibCanvas.fig
-        self.add_subplot = self.matplotlibCanvas.fig.add_subplot
-        self.draw = self.matplotlibCanvas.draw
-        self.navigationToolbar = NavigationToolbar(self.matplotlibCanvas, self)  # 添加完整的 toolbar
-        self.layout.addWidget(self.matplotlibCanvas)
-        if ntb_on:
-            self.layout.addWidget(self.navigationToolbar)
-            
+        self._ntbOn = ntb_on
+
+    def ensureCanvas(self):
+        """
+        创建画布及导航工具栏(仅首次调用时)，返回画布。
+        """
+        if self._canvas is None:
+            mpl = importMatplotlib()
+            self._canvas = mpl.MyMplCanvas(self, width=5, height=4, dpi=100)
+            self._navigationToolbar = mpl.NavigationToolbar(self._canvas, self)  # 添加完整的 toolbar
+            self.layout.addWidget(self._canvas)
+            if self._ntbOn:
+                self.layout.addWidget(self._navigationToolbar)
+            else:
+                self._navigationToolbar.hide()
+            self._canvas.mpl_connect('draw_event', self.onCanvasDrawn)
+            self._canvas.mpl_connect('resize_event', self.onCanvasResized)
+            if self._renderRequest is not None:#后台渲染模式下不显示画布
+                self._canvas.hide()
+                self._navigationToolbar.hide()
+        return self._canvas
+
+    @property
+    def matplotlibCanvas(self):
+        return self.ensureCanvas()
+
+    @property
+    def navigationToolbar(self):
+        self.ensureCanvas()
+        return self._navigationToolbar
+
+    @property
+    def fig(self):
+        return self.ensureCanvas().fig
+
+    @property
+    def add_subplot(self):
+        return self.ensureCanvas().fig.add_subplot
+
+    @property
+    def draw(self):
+        return self.ensureCanvas().draw
+
+    def paintEvent(self, event):
+        """
+        窗体首次绘制后创建画布。
+        画布在本次绘制完成后的事件循环中创建，使窗口先显示出来，再导入matplotlib。
+        后台渲染模式下绘制渲染完成的图像，窗体尺寸改变后、新的图像渲染完成前将原图像缩放显示。
+        """
+        super(QMatplotlibWidget, self).paintEvent(event)
+        if self._renderRequest is not None:
+            painter = qtg.QPainter(self)
+            if self._renderedImage is not None:
+                painter.setRenderHint(qtg.QPainter.SmoothPixmapTransform)
+                painter.drawImage(qtc.QRectF(self.rect()), self._renderedImage[0])
+            if self._renderError is not None:
+                painter.drawText(self.rect(), qtc.Qt.AlignCenter | qtc.Qt.TextWordWrap, self._renderError)
+            painter.end()
+        elif self._canvas is None:
+            qtc.QTimer.singleShot(0, self.ensureCanvas)
+
+    def resizeEvent(self, event):
+        super(QMatplotlibWidget, self).resizeEvent(event)
+        if self._renderRequest is not None:
+            self.requestRender()
+
+    def renderInBackground(self, drawFunction, *args, **kwargs):
+        """
+        以后台渲染模式显示图形。
+        绘图函数在后台线程中以drawFunction(figure, *args, **kwargs)的形式对一个新的Figure对象绘图，渲染完成的图像按窗体尺寸显示；
+        多次调用或连续改变窗体尺寸时，只渲染最新的一次。绘图函数只能操作传入的Figure对象，参数应为数据的快照。
+        后台渲染模式下不显示交互画布及导航工具栏，调用showCanvas()恢复。
+        必要参数：
+            1. drawFunction        绘图函数。
+        可选参数：
+            1. *args, **kwargs     绘图函数的其他参数。
+        """
+        if self._renderer is None:
+            importMatplotlib()#配置中文字体
+            self._renderer = QFigureRenderer(self)
+            self._renderer.figureRendered.connect(self.onFigureRendered)
+            self._renderer.renderFailed.connect(self.onRenderFailed)
+            qtw.QApplication.instance().aboutToQuit.connect(self._renderer.stop)
+            self._renderer.start()
+        self._renderRequest = (drawFunction, args, kwargs)
+        if self._canvas is not None:
+            self._canvas.hide()
+            self._navigationToolbar.hide()
+        self.requestRender()
+
+    def requestRender(self):
+        """
+        按当前窗体尺寸请求后台渲染最新的图形。
+        """
+        drawFunction, args, kwargs = self._renderRequest
+        ratio = self.devicePixelRatioF()
+        self._renderer.request(drawFunction, max(int(self.width() * ratio), 1), max(int(self.height() * ratio), 1), args, kwargs, dpi = 100 * ratio)
+
+    def onFigureRendered(self, image, buffer):
+        """
+        后台渲染完成时调用的槽函数。
+        """
+        if self._renderRequest is None:#已退出后台渲染模式
+            return
+        image.setDevicePixelRatio(self.devicePixelRatioF())
+        self._renderedImage = (image, buffer)#保持缓冲区的引用，QImage直接引用其中的像素数据
+        self._renderError = None
+        self.update()
+
+    def onRenderFailed(self, message):
+        """
+        后台渲染出错时调用的槽函数。在窗体中显示错误信息。
+        """
+        self._renderError = message
+        self.update()
+
+    def showCanvas(self):
+        """
+        退出后台渲染模式，恢复显示交互画布。
+        """
+        self._renderRequest = None
+        self._renderedImage = None
+        self._renderError = None
+        canvas = self.ensureCanvas()
+        canvas.show()
+        if self._ntbOn:
+            self._navigationToolbar.show()
+        self.update()
+
     def clear(self):
-        self.matplotlibCanvas.fig.clf()
+        if self._canvas is not None:
+            self._canvas.fig.clf()
         self.axesList.clear()
+        self.liveSeries.clear()
+        self._liveAutoscale.clear()
+        self._background = None
+        self._decimated.clear()
+        self._pyramids.clear()
+        self._decimatedAxes.clear()
+
+    def addLiveSeries(self, axesindex, *args, autoscale = True, headroom = 0.25, **kwargs):
+        """
+        在子图中创建一条实时曲线，返回其Line2D对象。
+        必要参数：
+            1. axesindex           子图在axesList中的序号。
+        可选参数：
+            1. autoscale           数据超出坐标范围时是否自动扩展，默认为True。
+            2. headroom            自动扩展时额外预留的范围(占数据范围的比例)，默认为0.25，使扩展(整体重绘)不会每次更新都发生。
+            3. *args, **kwargs     原始的Axes.plot的参数，默认以空数据创建。
+        """
+        if not args:
+            args = ([], [])
+        line, = self.axesList[axesindex].plot(*args, animated = True, **kwargs)
+        self.liveSeries.append(line)
+        self._liveAutoscale[line] = headroom if autoscale else None
+        self._background = None
+        return line
+
+    def removeLiveSeries(self, line):
+        """
+        删除一条实时曲线。
+        """
+        self.liveSeries.remove(line)
+        del self._liveAutoscale[line]
+        line.remove()
+        self._background = None
+
+    def setLiveData(self, line, xdata, ydata):
+        """
+        原位更新实时曲线的数据。需调用refreshLiveSeries()显示。
+        """
+        line.set_data(xdata, ydata)
+
+    def onCanvasDrawn(self, event):
+        """
+        整体重绘完成时调用的槽函数。
+        缓存背景，并在其上绘制实时曲线。
+        """
+        canvas = self.matplotlibCanvas
+        self._background = canvas.copy_from_bbox(self.fig.bbox)
+        for line in self.liveSeries:
+            line.axes.draw_artist(line)
+
+    def refreshLiveSeries(self):
+        """
+        局部重绘全部实时曲线。
+        背景尚未缓存或某条曲线的数据超出坐标范围(且允许自动扩展)时整体重绘。
+        """
+        canvas = self.matplotlibCanvas
+        if self.expandLiveLimits() or self._background is None:
+            canvas.draw()
+            return
+        canvas.restore_region(self._background)
+        for line in self.liveSeries:
+            line.axes.draw_artist(line)
+        canvas.blit(self.fig.bbox)
+
+    def expandLiveLimits(self):
+        """
+        数据超出坐标范围时，将子图的范围重设为数据范围并在两端预留余量。返回是否有子图的范围被重设。
+        """
+        expanded = False
+        for line in self.liveSeries:
+            headroom = self._liveAutoscale[line]
+            if headroom is None:
+                continue
+            axes = line.axes
+            for data, getLimits, setLimits in ((line.get_xdata(orig = False), axes.get_xlim, axes.set_xlim), (line.get_ydata(orig = False), axes.get_ylim, axes.set_ylim)):#时间等数据取转换后的数值
+                data = np.asarray(data, dtype = np.float64)
+                if data.shape[0] == 0:
+                    continue
+                low, high = np.nanmin(data), np.nanmax(data)
+                if not (np.isfinite(low) and np.isfinite(high)):
+                    continue
+                lower, upper = sorted(getLimits())
+                if low >= lower and high <= upper:
+                    continue
+                span = max(high - low, abs(high) * 1e-6, 1e-12)
+                setLimits(low - span * headroom, high + span * headroom)
+                expanded = True
+        return expanded
         
     def plotLine(self, axesindex, *args, **kwargs):
         obj = self.axesList[axesindex].plot(*args, **kwargs)
         return obj
         
+    def plotDecimated(self, axesindex, x, y, method = 'minmax', **kwargs):
+        """
+        绘制降采样的长时间序列曲线，返回其Line2D对象。
+        必要参数：
+            1. axesindex           子图在axesList中的序号。
+            2. x                   单调不减的横坐标数组(数值或时间)。
+            3. y                   纵坐标数组。
+        可选参数：
+            1. method              降采样方法，'minmax'(最值包络，不丢失尖峰)或'lttb'，默认为'minmax'。
+            2. **kwargs            原始的Axes.plot的参数。
+        """
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if x.shape[0] != y.shape[0]:
+            raise SizeError(y.shape[0])
+        if method not in ('minmax', 'lttb'):
+            raise ArgumentError(method)
+        axes = self.axesList[axesindex]
+        line, = axes.plot(x[:1], y[:1], **kwargs)#以首个点创建曲线，同时确定横坐标的单位(如时间)
+        xdata = np.asarray(axes.convert_xunits(x), dtype = np.float64)
+        self._decimated[line] = (xdata, y, method)
+        if xdata.shape[0] > 0:
+            finite = y[np.isfinite(y)] if y.dtype.kind == 'f' else y
+            self.setDecimatedLimits(axes, xdata[0], xdata[-1], *((finite.min(), finite.max()) if finite.shape[0] > 0 else (0, 0)))
+        self.connectDecimated(axes)
+        return line
+
+    def plotPyramid(self, axesindex, pyramid, sampleRate = 1.0, startTime = 0.0, scale = 1.0, offset = 0.0, **kwargs):
+        """
+        以最值金字塔绘制等间隔采样的超长记录，返回其Line2D对象。任意缩放程度下的绘制点数都只与坐标轴的像素宽度有关。
+        必要参数：
+            1. axesindex           子图在axesList中的序号。
+            2. pyramid             MinMaxPyramid对象(如RawAcquisitionFile.pyramid()的返回值)。
+        可选参数：
+            1. sampleRate          采样频率，默认为1，即横坐标为采样点序号。
+            2. startTime           首个采样点的时刻，默认为0。
+            3. scale               比例系数，物理量 = 原始值 * 比例系数 + 偏移量，默认为1。
+            4. offset              偏移量，默认为0。
+            5. **kwargs            原始的Axes.plot的参数。
+        """
+        if sampleRate <= 0:
+            raise ArgumentError(sampleRate)
+        axes = self.axesList[axesindex]
+        line, = axes.plot([], [], **kwargs)
+        self._pyramids[line] = (pyramid, sampleRate, startTime, scale, offset)
+        extrema = pyramid.extrema()
+        if extrema is not None:
+            bottom, top = sorted(value * scale + offset for value in extrema)
+            self.setDecimatedLimits(axes, startTime, startTime + (pyramid.sampleCount - 1) / sampleRate, bottom, top)
+        self.connectDecimated(axes)
+        return line
+
+    def setDecimatedLimits(self, axes, left, right, bottom, top):
+        """
+        曲线只含部分数据，按完整数据的范围扩展子图的数据范围。
+        """
+        axes.update_datalim([(left, bottom), (right, top)])
+        axes.autoscale_view()
+
+    def connectDecimated(self, axes):
+        """
+        连接子图的坐标范围改变回调，并计算曲线的数据。
+        """
+        if axes not in self._decimatedAxes:
+            axes.callbacks.connect('xlim_changed', self.onXLimitsChanged)
+            self._decimatedAxes.add(axes)
+        self.updateDecimated(axes)
+
+    def updateDecimated(self, axes = None):
+        """
+        按当前横坐标范围及坐标轴像素宽度重新计算降采样曲线及金字塔曲线的数据。未指定子图时更新全部子图。
+        """
+        for line, (xdata, ydata, method) in self._decimated.items():
+            if axes is not None and line.axes is not axes:
+                continue
+            lower, upper = sorted(line.axes.get_xlim())
+            visible = visibleSlice(xdata, lower, upper)
+            bins = max(int(line.axes.bbox.width), 1)
+            line.set_data(*decimate(xdata[visible], ydata[visible], bins, method))
+        for line, (pyramid, sampleRate, startTime, scale, offset) in self._pyramids.items():
+            if axes is not None and line.axes is not axes:
+                continue
+            lower, upper = sorted(line.axes.get_xlim())
+            start = int(np.floor((lower - startTime) * sampleRate)) - 1#两端各多取一个点，使曲线延伸至坐标轴边缘
+            stop = int(np.ceil((upper - startTime) * sampleRate)) + 2
+            indices, values = pyramid.query(start, stop, max(int(line.axes.bbox.width), 1))
+            line.set_data(startTime + indices / sampleRate, values * scale + offset)
+
+    def onXLimitsChanged(self, axes):
+        """
+        子图横坐标范围改变(缩放、平移)时调用的回调函数。
+        """
+        self.updateDecimated(axes)
+
+    def onCanvasResized(self, event):
+        """
+        画布尺寸改变时调用的回调函数。
+        """
+        if self._decimated or self._pyramids:
+            self.updateDecimated()
+
     def plotBar(self, axesindex, *args, **kwargs):
         obj = self.axesList[axesindex].bar(*args, **kwargs)
         return obj
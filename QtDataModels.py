@@ -3,26 +3,202 @@
 import PyQt5.QtCore as qtc
 import PyQt5.QtWidgets as qtw
 import PyQt5.QtGui as qtg
+import os
+import hashlib
+import collections
+import contextlib
+import warnings
 import numpy as np
 import pandas as pd
 
 from QtGeneralUtilities import *
+from DataFileUtilities import *
 
-class QNumpyArray2Model(qtc.QAbstractTableModel):
+#各数据模型共用的角色分派表及常量，避免在data()中重复构造对象
+TEXT_ROLES = frozenset((qtc.Qt.DisplayRole, qtc.Qt.EditRole))#返回单元格文本的角色
+CELL_ALIGNMENT = qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter#单元格及表头的对齐方式
+EMPTY_VARIANT = qtc.QVariant()
+
+def mergeRectangles(rectangles, maxCount = 64):
+    """
+    合并单元格矩形区域列表，返回覆盖范围不变、数量尽量少的矩形列表。
+    每个矩形为(起始行, 起始列, 终止行, 终止列)元组(均含端点)。
+    先合并列范围相同且行范围相接或重叠的矩形，再合并行范围相同且列范围相接或重叠的矩形，反复进行直至不再减少。
+    合并后仍多于maxCount个时，返回其外接矩形。
+    """
+    rectangles = list(set(rectangles))
+    while True:
+        count = len(rectangles)
+        for key, span in ((lambda r: (r[1], r[3], r[0]), (0, 2)), (lambda r: (r[0], r[2], r[1]), (1, 3))):
+            merged = []
+            for rect in sorted(rectangles, key = key):
+                last = merged[-1] if merged else None
+                if last is not None and all(last[k] == rect[k] for k in range(4) if k not in span) and rect[span[0]] <= last[span[1]] + 1:
+                    last = list(last)
+                    last[span[1]] = max(last[span[1]], rect[span[1]])
+                    merged[-1] = tuple(last)
+                else:
+                    merged.append(rect)
+            rectangles = merged
+        if len(rectangles) == count:
+            break
+    if len(rectangles) > maxCount:
+        return [(min(r[0] for r in rectangles), min(r[1] for r in rectangles), max(r[2] for r in rectangles), max(r[3] for r in rectangles))]
+    return rectangles
+
+class DataChangedBatcher(qtc.QObject):
+    """
+    数据模型的dataChanged信号合并器。
+    在批量更新期间收集发生变化的矩形区域，结束时合并后统一发出dataChanged信号。
+    开启节流后，信号的发出频率不超过显示器的刷新率。
+    """
+    def __init__(self, model):
+        """
+        构造器。
+        必要参数：
+            1. model            所属的数据模型。
+        """
+        super(DataChangedBatcher, self).__init__(model)
+        self.model = model
+        self._depth = 0#批量更新的嵌套层数
+        self._rectangles = []
+        self._throttle = False
+        self._interval = DataChangedBatcher.refreshInterval()
+        self._timer = qtc.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._lastFlush = qtc.QElapsedTimer()
+
+    @staticmethod
+    def refreshInterval():
+        """
+        返回主显示器的刷新间隔(毫秒)。无法获取时按60Hz计算。
+        """
+        screen = qtg.QGuiApplication.primaryScreen() if qtg.QGuiApplication.instance() is not None else None
+        refreshRate = screen.refreshRate() if screen is not None else 0
+        return int(1000 / (refreshRate if refreshRate > 0 else 60))
+
+    def setThrottle(self, enabled, interval = None):
+        """
+        开启或关闭节流。
+        可选参数：
+            1. interval            两次发出信号的最小间隔(毫秒)，默认为显示器的刷新间隔。
+        """
+        self._throttle = enabled
+        if interval is not None:
+            self._interval = interval
+        if not enabled:
+            self.flush()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        批量更新的上下文管理器，可嵌套。
+        """
+        self._depth += 1
+        try:
+            yield self.model
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self.requestFlush()
+
+    def notify(self, top, left, bottom, right):
+        """
+        登记一个发生变化的矩形区域。
+        不在批量更新中且未开启节流时，立即发出dataChanged信号。
+        """
+        if bottom < top or right < left:
+            return
+        if self._depth == 0 and not self._throttle:
+            self.model.dataChanged.emit(self.model.index(top, left), self.model.index(bottom, right))
+            return
+        self._rectangles.append((top, left, bottom, right))
+        if self._depth == 0:
+            self.requestFlush()
+
+    def requestFlush(self):
+        """
+        请求发出已登记的信号。开启节流且距上次发出不足刷新间隔时，推迟至间隔结束。
+        """
+        if not self._rectangles:
+            return
+        if self._throttle and self._lastFlush.isValid():
+            remaining = self._interval - self._lastFlush.elapsed()
+            if remaining > 0:
+                if not self._timer.isActive():
+                    self._timer.start(remaining)
+                return
+        self.flush()
+
+    def flush(self):
+        """
+        合并已登记的矩形区域并发出dataChanged信号。超出模型当前范围的部分将被裁去。
+        """
+        self._timer.stop()
+        rectangles, self._rectangles = self._rectangles, []
+        if not rectangles:
+            return
+        rowCount, columnCount = self.model.rowCount(), self.model.columnCount()
+        for top, left, bottom, right in mergeRectangles(rectangles):
+            bottom, right = min(bottom, rowCount - 1), min(right, columnCount - 1)
+            if top <= bottom and left <= right:
+                self.model.dataChanged.emit(self.model.index(top, left), self.model.index(bottom, right))
+        self._lastFlush.start()
+
+class QBatchUpdateMixin(object):
+    """
+    为数据模型提供批量更新接口的混入类。
+    使用该类的数据模型须在构造器中最先创建self._batcher = DataChangedBatcher(self)。
+    用法：
+        with model.batchUpdate():
+            ...#期间的所有数据改动只在结束时合并发出dataChanged信号
+    """
+    def batchUpdate(self):
+        """
+        返回批量更新的上下文管理器。
+        """
+        return self._batcher.batch()
+
+    def notifyDataChanged(self, top, left, bottom, right):
+        """
+        通知模型指定矩形区域内的数据发生了变化。模型内部发出dataChanged信号均经由本函数。
+        """
+        self._batcher.notify(top, left, bottom, right)
+
+    def setUpdateThrottle(self, enabled, interval = None):
+        """
+        开启或关闭dataChanged信号的节流，适用于实时数据刷新。
+        可选参数：
+            1. interval            两次发出信号的最小间隔(毫秒)，默认为显示器的刷新间隔。
+        """
+        self._batcher.setThrottle(enabled, interval)
+
+    def flushDataChanged(self):
+        """
+        立即发出所有尚未发出的dataChanged信号。
+        """
+        self._batcher.flush()
+
+class QNumpyArray2Model(QBatchUpdateMixin, qtc.QAbstractTableModel):
     """
     用于PyQt5的Numpy二维array数据模型。
     """
     editConfirmed = qtc.pyqtSignal()#确认编辑的信号。
     editRefuted = qtc.pyqtSignal()#撤销编辑的信号。
     
-    def __init__(self, npArray = None, parent=None):
+    def __init__(self, npArray = None, parent=None, viewMode = False):
         """
         构造器。
         可选参数：
-            1. npArray            二维Numpy数组。不要采用Matrix数据类型。
+            1. npArray            二维Numpy数组(也可为np.memmap或memoryview)。不要采用Matrix数据类型。
             2. parent             父对象。一般留空即可。
+            3. viewMode           是否采用零拷贝的视图模式，默认为False。
+                                  视图模式下模型直接读取外部传入的数组，不生成缓存副本，且不可编辑。适用于只读显示的大型数组。
         """
         super(QNumpyArray2Model, self).__init__(parent)
+        self._batcher = DataChangedBatcher(self)
+        self._viewMode = viewMode
         if type(npArray) is type(None):#若指定了nparray参数，则将nparray赋予nparray_orig参数；否则将一个空数组赋予nparray_orig参数
             self.setNumpyArray(np.empty((0,0)))
         else:
@@ -30,7 +206,7 @@ class QNumpyArray2Model(qtc.QAbstractTableModel):
         self._hasHeader_H = False#默认不含header信息
         self._hasHeader_V = False#默认不含header信息
         self._VHeader_Num = False#默认不将行号作为默认垂直header
-        self._editable = True
+        self._editable = not viewMode
         self._displayDecimal = None
         
         self.editConfirmed.connect(self.cacheArray)
@@ -40,25 +216,43 @@ class QNumpyArray2Model(qtc.QAbstractTableModel):
         """
         生成nparray_orig的一个缓存副本nparray，用于界面编辑。
         nparray_orig为实际外部传入的数组对象。对nparray_orig的改变会直接反应在外部，而副本nparray则不会。
+        视图模式下nparray即为nparray_orig本身，无需复制。
         """
         if self.npArray_Orig.shape[0] > 0 and self.npArray_Orig.shape[1] > 0:
-            for i in range(self.npArray_Orig.shape[0]):
-                for j in range(self.npArray_Orig.shape[1]):
-                    self.npArray[i, j] = self.npArray_Orig[i, j]        
-            self.dataChanged.emit(self.index(0, 0), self.index(self.npArray_Orig.shape[0] - 1, self.npArray_Orig.shape[1] -1))
+            if not self._viewMode:
+                np.copyto(self.npArray, self.npArray_Orig)
+            self.notifyDataChanged(0, 0, self.npArray_Orig.shape[0] - 1, self.npArray_Orig.shape[1] - 1)
         
     def setNumpyArray(self, npArray):
         """
         设置数据模型对应的二维Numpy数组。
+        传入memoryview对象时，以零拷贝方式将其转换为Numpy数组。
         """
-        if not isinstance(npArray, np.core.ndarray):
+        if isinstance(npArray, memoryview):
+            npArray = np.asarray(npArray)
+        if not isinstance(npArray, np.ndarray):
             raise TypeError("The input argument must be a numpy.ndarray object.")
         
         self.layoutAboutToBeChanged.emit()
         self.npArray_Orig = npArray
-        self.npArray = np.empty((npArray.shape[0], npArray.shape[1]), dtype = npArray.dtype)
+        self._converter = converterForDtype(npArray.dtype)#数组各列数据类型相同，共用一个转换函数
+        if self._viewMode:
+            self.npArray = npArray
+        else:
+            self.npArray = np.empty((npArray.shape[0], npArray.shape[1]), dtype = npArray.dtype)
         self.cacheArray()
         self.layoutChanged.emit()
+
+    def setViewMode(self, viewMode):
+        """
+        切换零拷贝的视图模式。
+        切换至视图模式时丢弃缓存副本(未确认的编辑将丢失)，模型变为不可编辑；切换至编辑模式时重新生成缓存副本，模型变为可编辑。
+        """
+        if viewMode == self._viewMode:
+            return
+        self._viewMode = viewMode
+        self._editable = not viewMode
+        self.setNumpyArray(self.npArray_Orig)
         
     @property
     def dtype(self):
@@ -74,9 +268,8 @@ class QNumpyArray2Model(qtc.QAbstractTableModel):
         将缓存数组nparray中的数据写入nparray_orig，确认编辑。
         """
         if self.npArray_Orig.shape[0] > 0 and self.npArray_Orig.shape[1] > 0:
-            for i in range(self.npArray_Orig.shape[0]):
-                for j in range(self.npArray_Orig.shape[1]):
-                    self.npArray_Orig[i, j] = self.npArray[i, j]
+            if not self._viewMode:
+                np.copyto(self.npArray_Orig, self.npArray)
             self.editConfirmed.emit()
         
     def refuteEdit(self):
@@ -89,8 +282,9 @@ class QNumpyArray2Model(qtc.QAbstractTableModel):
         """
         PyQt5数据模型必须重写的关键函数。
         返回模型索引对象(Index)。
+        索引仅记录行号及列号，不携带单元格数据。
         """
-        return self.createIndex(row, column, self.npArray[row, column])
+        return self.createIndex(row, column)
         
     def rowCount(self, parent=qtc.QModelIndex()):
         """
@@ -111,21 +305,19 @@ class QNumpyArray2Model(qtc.QAbstractTableModel):
         PyQt5数据模型必须重写的关键函数。
         返回在指定的Role下的模型数据。
         其中DisplayRole为视图(View)中显示的数据；EditRole为传给编辑器的数据；TextAlignmentRole为数据显示时的对齐方式。
+        其余角色直接返回空值，不检查索引。
         """
-        if not index.isValid() or \
-           not 0 <= index.row() < self.npArray.shape[0] or \
-           not 0 <= index.column() < self.npArray.shape[1]:
-            return qtc.QVariant()
-        
-        if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
+        if role in TEXT_ROLES:
+            row, column = index.row(), index.column()
+            if not 0 <= row < self.npArray.shape[0] or not 0 <= column < self.npArray.shape[1]:
+                return EMPTY_VARIANT
             if self._displayDecimal == None:
-                return str(self.npArray[index.row(), index.column()])
+                return str(self.npArray[row, column])
             else:
-                return str(round(self.npArray[index.row(), index.column()], self._displayDecimal))
+                return str(round(self.npArray[row, column], self._displayDecimal))
         elif role == qtc.Qt.TextAlignmentRole:
-            return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter
-        else:
-            return qtc.QVariant()
+            return CELL_ALIGNMENT
+        return EMPTY_VARIANT
         
     def flags(self, index):
         """
@@ -141,20 +333,38 @@ class QNumpyArray2Model(qtc.QAbstractTableModel):
         PyQt5可编辑数据模型必须重写的关键函数。
         将编辑器传入的值写入缓存数组nparray。
         """
-        if self.dtype() == int:#由于编辑器传入值均为str类型，需进行相应的数据类型转换及校验。
-            value_dtype, ok = str2int(value)
-        elif self.dtype() == float:
-            value_dtype, ok = str2float(value)
-        elif self.dtype() == str:
-            value_dtype, ok = value, True
-        elif self.dtype() == object:
-            value_dtype, ok = value, True
+        if self._viewMode:#视图模式下不可编辑
+            return False
+        value_dtype, ok = self._converter(value)#由于编辑器传入值均为str类型，需进行相应的数据类型转换及校验。
         if ok:
             self.npArray[index.row(), index.column()] = value_dtype
-            self.dataChanged.emit(index, index)
+            self.notifyDataChanged(index.row(), index.column(), index.row(), index.column())
             return True
         return False
     
+    def pasteBlock(self, top, left, block):
+        """
+        将一个二维数据块(一般为从剪贴板粘贴的字符串)批量写入缓存数组nparray。
+        数据块以向量化方式转换为数组的数据类型，超出数组范围的部分被忽略，转换失败的单元格保持不变。
+        必要参数：
+            1. top, left            数据块左上角对应的行号及列号。
+            2. block                二维数组或嵌套列表。
+        返回与写入区域形状相同的布尔掩码，标记各单元格是否写入成功。
+        """
+        if self._viewMode:#视图模式下不可编辑
+            return np.zeros((0, 0), dtype = bool)
+        block = np.asarray(block, dtype = object)
+        if block.ndim == 1:
+            block = block.reshape(1, -1)
+        height = max(min(block.shape[0], self.npArray.shape[0] - top), 0)
+        width = max(min(block.shape[1], self.npArray.shape[1] - left), 0)
+        block = block[:height, :width]
+        converted, ok = convertArray(block.ravel(), self.npArray.dtype)
+        converted, ok = converted.reshape(height, width), ok.reshape(height, width)
+        np.copyto(self.npArray[top:top + height, left:left + width], converted, where = ok)
+        self.notifyDataChanged(top, left, top + height - 1, left + width - 1)
+        return ok
+    
     def headerData(self, section, orientation, role = qtc.Qt.DisplayRole):
         """
         PyQt5数据模型必须重写的关键函数。
@@ -166,21 +376,21 @@ class QNumpyArray2Model(qtc.QAbstractTableModel):
             if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
                 return str(self.headerArray_H[section])
             elif role == qtc.Qt.TextAlignmentRole:
-                return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter
+                return CELL_ALIGNMENT
             else:
                 return hdata
         elif orientation == qtc.Qt.Vertical and self._hasHeader_V:
             if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
                 return str(self.headerArray_V[section])
             elif role == qtc.Qt.TextAlignmentRole:
-                return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter
+                return CELL_ALIGNMENT
             else:
                 return hdata
         elif orientation == qtc.Qt.Vertical and self._VHeader_Num:
             if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
                 return str(section)
             elif role == qtc.Qt.TextAlignmentRole:
-                return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter
+                return CELL_ALIGNMENT
             else:
                 return hdata        
         return qtc.QVariant()
@@ -215,8 +425,8 @@ class QNumpyArray2Model(qtc.QAbstractTableModel):
 class QNumpyMatrixModel(QNumpyArray2Model):
     
     
-    def __init__(self, npArray=None, parent=None):
-        super(QNumpyMatrixModel, self).__init__(npArray, parent)
+    def __init__(self, npArray=None, parent=None, viewMode = False):
+        super(QNumpyMatrixModel, self).__init__(npArray, parent, viewMode)
         self.headerArray=np.empty(self.rank(), dtype = str)
     
     def setNumpyArray(self, npArray):
@@ -247,7 +457,7 @@ class QNumpyMatrixModel(QNumpyArray2Model):
                 elif orientation == qtc.Qt.Vertical:
                     return str(self.headerArray[section])
             elif role == qtc.Qt.TextAlignmentRole:
-                return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter
+                return CELL_ALIGNMENT
             else:
                 return hdata
         return qtc.QVariant()
@@ -269,27 +479,32 @@ class QNumpyMatrixModel(QNumpyArray2Model):
         else:
             raise TypeError('The input argument must be a numpy.ndarray object.')
         
-class QNumpyArray1Model(qtc.QAbstractTableModel):
+class QNumpyArray1Model(QBatchUpdateMixin, qtc.QAbstractTableModel):
     """
     用于PyQt5的Numpy一维array数组模型(竖向)。
     """
     editConfirmed = qtc.pyqtSignal()#确认编辑的信号。
     editRefuted = qtc.pyqtSignal()#撤销编辑的信号。
+    _transposed = False#数组是否横向显示
 
-    def __init__(self, npArray = None, parent=None):
+    def __init__(self, npArray = None, parent=None, viewMode = False):
         """
         构造器。
         可选参数：
-            1. npArray            一维Numpy数组。
+            1. npArray            一维Numpy数组(也可为np.memmap或memoryview)。
             2. parent             父对象。一般留空即可。
+            3. viewMode           是否采用零拷贝的视图模式，默认为False。
+                                  视图模式下模型直接读取外部传入的数组，不生成缓存副本，且不可编辑。适用于只读显示的大型数组。
         """
         super(QNumpyArray1Model, self).__init__(parent)
+        self._batcher = DataChangedBatcher(self)
+        self._viewMode = viewMode
         if type(npArray) is type(None):#若指定了nparray参数，则将nparray赋予nparray_orig参数；否则将一个空数组赋予nparray_orig参数
             self.setNumpyArray(np.empty(0))
         else:
             self.setNumpyArray(npArray)            
         self._hasHeader = False#默认不含header信息
-        self._editable = True
+        self._editable = not viewMode
         self._displayDecimal = None
 
         self.editConfirmed.connect(self.cacheArray)
@@ -299,30 +514,73 @@ class QNumpyArray1Model(qtc.QAbstractTableModel):
         """
         生成nparray_orig的一个缓存副本nparray，用于界面编辑。
         nparray_orig为实际外部传入的数组对象。对nparray_orig的改变会直接反应在外部，而副本nparray则不会。
+        视图模式下nparray即为nparray_orig本身，无需复制。
         """
         if self.npArray_Orig.shape[0] > 0:
-            for i in range(self.npArray_Orig.shape[0]):
-                self.npArray[i] = self.npArray_Orig[i]        
-            self.dataChanged.emit(self.index(0, 0), self.index(self.npArray_Orig.shape[0] - 1, 0))
+            if not self._viewMode:
+                np.copyto(self.npArray, self.npArray_Orig)
+            self.notifyDataChanged(0, 0, self.rowCount() - 1, self.columnCount() - 1)
         
     def setNumpyArray(self, npArray):
         """
         设置数据模型对应的一维Numpy数组。
+        传入memoryview对象时，以零拷贝方式将其转换为Numpy数组。
         """
-        if not isinstance(npArray, np.core.ndarray):
+        if isinstance(npArray, memoryview):
+            npArray = np.asarray(npArray)
+        if not isinstance(npArray, np.ndarray):
             raise TypeError("The input argument must be a numpy.ndarray object.")
         
         self.layoutAboutToBeChanged.emit()
         self.npArray_Orig = npArray
-        self.npArray = np.empty(npArray.shape[0], dtype = npArray.dtype)
+        self._converter = converterForDtype(npArray.dtype)
+        if self._viewMode:
+            self.npArray = npArray
+        else:
+            self.npArray = np.empty(npArray.shape[0], dtype = npArray.dtype)
         self.cacheArray()        
         self.layoutChanged.emit()
+
+    def setViewMode(self, viewMode):
+        """
+        切换零拷贝的视图模式。
+        切换至视图模式时丢弃缓存副本(未确认的编辑将丢失)，模型变为不可编辑；切换至编辑模式时重新生成缓存副本，模型变为可编辑。
+        """
+        if viewMode == self._viewMode:
+            return
+        self._viewMode = viewMode
+        self._editable = not viewMode
+        self.setNumpyArray(self.npArray_Orig)
         
+    def pasteBlock(self, top, left, block):
+        """
+        将一组数据(一般为从剪贴板粘贴的字符串)批量写入缓存数组nparray。
+        数据以向量化方式转换为数组的数据类型，超出数组范围的部分被忽略，转换失败的元素保持不变。
+        必要参数：
+            1. top, left            数据块起始位置对应的行号及列号。
+            2. block                数组或嵌套列表，按数组方向展开为一维。
+        返回布尔掩码，标记各元素是否写入成功。
+        """
+        if self._viewMode:#视图模式下不可编辑
+            return np.zeros(0, dtype = bool)
+        start = left if self._transposed else top
+        values = np.asarray(block, dtype = object).ravel()[:max(self.npArray.shape[0] - start, 0)]
+        converted, ok = convertArray(values, self.npArray.dtype)
+        np.copyto(self.npArray[start:start + values.shape[0]], converted, where = ok)
+        if self._transposed:
+            self.notifyDataChanged(0, start, 0, start + values.shape[0] - 1)
+        else:
+            self.notifyDataChanged(start, 0, start + values.shape[0] - 1, 0)
+        return ok
+
     def setData_Batch(self, dataArray):
+        """
+        批量写入数据。视图模式下直接写入外部传入的数组。
+        """
         if type(dataArray) is np.ndarray:
             if dataArray.shape[0] == self.rank():
                 self.npArray[:] = dataArray
-                self.dataChanged.emit(self.index(0, 0), self.index(self.rank() - 1, 0))
+                self.notifyDataChanged(0, 0, self.rank() - 1, 0)
             else:
                 raise SizeError(dataArray.shape[0])
         else:
@@ -359,8 +617,8 @@ class QNumpyArray1Model(qtc.QAbstractTableModel):
         将缓存数组nparray中的数据写入nparray_orig，确认编辑。
         """
         if self.npArray_Orig.shape[0] > 0:
-            for i in range(self.npArray_Orig.shape[0]):
-                self.npArray_Orig[i] = self.npArray[i]
+            if not self._viewMode:
+                np.copyto(self.npArray_Orig, self.npArray)
             self.editConfirmed.emit()    
         
     def refuteEdit(self):
@@ -387,8 +645,9 @@ class QNumpyArray1Model(qtc.QAbstractTableModel):
         """
         PyQt5数据模型必须重写的关键函数。
         返回模型索引对象(Index)。
+        索引仅记录行号及列号，不携带单元格数据。
         """
-        return self.createIndex(row, column, self.npArray[row])
+        return self.createIndex(row, column)
 
     def data(self, index, role=qtc.Qt.DisplayRole):
         """
@@ -396,19 +655,17 @@ class QNumpyArray1Model(qtc.QAbstractTableModel):
         返回在指定的Role下的模型数据。
         其中DisplayRole为视图(View)中显示的数据；EditRole为传给编辑器的数据；TextAlignmentRole为数据显示时的对齐方式。
         """
-        if not index.isValid() or \
-               not 0 <= index.row() <= self.npArray.shape[0]:
-            return qtc.QVariant()
-        
-        if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
+        if role in TEXT_ROLES:
+            row = index.row()
+            if not 0 <= row < self.npArray.shape[0]:
+                return EMPTY_VARIANT
             if self._displayDecimal == None:
-                return str(self.npArray[index.row()])
+                return str(self.npArray[row])
             else:
-                return str(round(self.npArray[index.row()], self._displayDecimal))
+                return str(round(self.npArray[row], self._displayDecimal))
         elif role == qtc.Qt.TextAlignmentRole:
-            return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter            
-        else:
-            return qtc.QVariant()
+            return CELL_ALIGNMENT
+        return EMPTY_VARIANT
 
     def flags(self, index):
         """
@@ -433,7 +690,7 @@ class QNumpyArray1Model(qtc.QAbstractTableModel):
                 elif orientation == qtc.Qt.Vertical:
                     return str(self.headerArray[section])
             elif role == qtc.Qt.TextAlignmentRole:
-                return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter
+                return CELL_ALIGNMENT
             else:
                 return hdata
         return qtc.QVariant()
@@ -443,17 +700,12 @@ class QNumpyArray1Model(qtc.QAbstractTableModel):
         PyQt5可编辑数据模型必须重写的关键函数。
         将编辑器传入的值写入缓存数组nparray。
         """
-        if self.dtype() == int:#由于编辑器传入值均为str类型，需进行相应的数据类型转换及校验。
-            value_dtype, ok = str2int(value)
-        elif self.dtype() == float:
-            value_dtype, ok = str2float(value)
-        elif self.dtype() == str:
-            value_dtype, ok = value, True
-        elif self.dtype() == object:
-            value_dtype, ok = value, True
+        if self._viewMode:#视图模式下不可编辑
+            return False
+        value_dtype, ok = self._converter(value)#由于编辑器传入值均为str类型，需进行相应的数据类型转换及校验。
         if ok:
             self.npArray[index.row()] = value_dtype
-            self.dataChanged.emit(index, index)
+            self.notifyDataChanged(index.row(), index.column(), index.row(), index.column())
             return True
         return False
 
@@ -461,11 +713,15 @@ class QNumpyArray1Model_Transpose(QNumpyArray1Model):
     """
     用于PyQt5的Numpy一维array数组模型(横向)。
     """
+    _transposed = True
     def setData_Batch(self, dataArray):
+        """
+        批量写入数据。视图模式下直接写入外部传入的数组。
+        """
         if type(dataArray) is np.ndarray:
             if dataArray.shape[0] == self.rank():
                 self.npArray[:] = dataArray
-                self.dataChanged.emit(self.index(0, 0), self.index(0, self.rank() - 1))
+                self.notifyDataChanged(0, 0, 0, self.rank() - 1)
             else:
                 raise SizeError(dataArray.shape[0])
         else:
@@ -505,8 +761,9 @@ class QNumpyArray1Model_Transpose(QNumpyArray1Model):
         """
         PyQt5数据模型必须重写的关键函数。
         返回模型索引对象(Index)。
+        索引仅记录行号及列号，不携带单元格数据。
         """
-        return self.createIndex(row, column, self.npArray[column])
+        return self.createIndex(row, column)
 
     def data(self, index, role=qtc.Qt.DisplayRole):
         """
@@ -514,16 +771,14 @@ class QNumpyArray1Model_Transpose(QNumpyArray1Model):
         返回在指定的Role下的模型数据。
         其中DisplayRole为视图(View)中显示的数据；EditRole为传给编辑器的数据；TextAlignmentRole为数据显示时的对齐方式。
         """
-        if not index.isValid() or \
-           not 0 <= index.column() <= self.npArray.shape[0]:
-            return qtc.QVariant()
-
-        if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
-            return str(self.npArray[index.column()])
+        if role in TEXT_ROLES:
+            column = index.column()
+            if not 0 <= column < self.npArray.shape[0]:
+                return EMPTY_VARIANT
+            return str(self.npArray[column])
         elif role == qtc.Qt.TextAlignmentRole:
-            return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter            
-        else:
-            return qtc.QVariant()
+            return CELL_ALIGNMENT
+        return EMPTY_VARIANT
 
     def headerData(self, section, orientation, role = qtc.Qt.DisplayRole):
         """
@@ -539,7 +794,7 @@ class QNumpyArray1Model_Transpose(QNumpyArray1Model):
                 elif orientation == qtc.Qt.Horizontal:
                     return str(self.headerArray[section])
             elif role == qtc.Qt.TextAlignmentRole:
-                return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter
+                return CELL_ALIGNMENT
             else:
                 return hdata
         return qtc.QVariant()
@@ -549,26 +804,202 @@ class QNumpyArray1Model_Transpose(QNumpyArray1Model):
         PyQt5可编辑数据模型必须重写的关键函数。
         将编辑器传入的值写入缓存数组nparray。
         """
-        if self.dtype() == int:#由于编辑器传入值均为str类型，需进行相应的数据类型转换及校验。
-            value_dtype, ok = str2int(value)
-        elif self.dtype() == float:
-            value_dtype, ok = str2float(value)
-        elif self.dtype() == str:
-            value_dtype, ok = value, True
-        elif self.dtype() == object:
-            value_dtype, ok = value, True
+        if self._viewMode:#视图模式下不可编辑
+            return False
+        value_dtype, ok = self._converter(value)#由于编辑器传入值均为str类型，需进行相应的数据类型转换及校验。
         if ok:
             self.npArray[index.column()] = value_dtype
-            self.dataChanged.emit(index, index)
+            self.notifyDataChanged(index.row(), index.column(), index.row(), index.column())
             return True
         return False
     
-class QDataFrameModel(qtc.QAbstractTableModel):
+class ColumnarStore(object):
+    """
+    按列存储的数据容器。
+    每一列均为一个连续的、具有确定数据类型的一维数组(浮点、整型、布尔、时间)；分类(categorical)列以整型编码数组及类别数组存储。
+    各列数组均为DataFrame对应列的视图，不复制数据；只有指定了floatDtype时，浮点列才被转换为该类型的副本(如np.float32，占用原数据一半的内存)。
+    用作QDataFrameModel的列式存储后端。DataFrame的数值改变或增删行后，需调用updateCells()、insertRows()或removeRows()同步。
+    """
+    def __init__(self, columns, index, arrays, categories, floatDtype = None):
+        """
+        构造器。一般通过fromDataFrame()生成。
+        必要参数：
+            1. columns            列名称(pandas.Index)。
+            2. index              行索引(pandas.Index)。
+            3. arrays             由各列数组组成的列表。
+            4. categories         由各列类别数组组成的列表，非分类列对应None。
+        可选参数：
+            1. floatDtype         浮点列的存储类型，默认为None，即直接使用DataFrame中的数组。
+        """
+        self.columns = columns
+        self.index = index
+        self.arrays = arrays
+        self.categories = categories
+        self.floatDtype = floatDtype
+        self._buffers = [None] * len(arrays)#转换类型后的浮点列按倍数扩容的缓冲区，arrays中对应的数组为其前若干行的视图
+
+    @classmethod
+    def fromDataFrame(cls, dataFrame, floatDtype = None):
+        """
+        由DataFrame对象生成列式存储。
+        可选参数：
+            1. floatDtype            浮点列的存储类型，如np.float32。默认为None，即保持原类型(不复制数据)。
+        """
+        store = cls(dataFrame.columns, dataFrame.index, [None] * dataFrame.shape[1], [None] * dataFrame.shape[1], floatDtype)
+        for j in range(dataFrame.shape[1]):
+            store.refreshColumn(dataFrame, j)
+        return store
+
+    @property
+    def shape(self):
+        return (len(self.index), len(self.arrays))
+
+    def isConverted(self, series):
+        """
+        判断列是否需要转换类型(即以副本存储)。
+        """
+        return self.floatDtype is not None and isinstance(series.dtype, np.dtype) and series.dtype.kind == 'f' and series.dtype != self.floatDtype
+
+    def refreshColumn(self, dataFrame, column):
+        """
+        按DataFrame的当前内容重新生成指定列。视图的开销为常数；转换类型的列需要重新转换。
+        """
+        series = dataFrame.iloc[:, column]
+        self.categories[column] = None
+        self._buffers[column] = None
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            self.arrays[column] = series.cat.codes.to_numpy()
+            self.categories[column] = np.asarray(series.cat.categories, dtype = object)
+        elif self.isConverted(series):
+            self._buffers[column] = series.to_numpy(dtype = self.floatDtype)
+            self.arrays[column] = self._buffers[column]
+        elif isinstance(series.dtype, np.dtype):
+            self.arrays[column] = series.to_numpy()
+        else:#扩展类型(如字符串、带时区的时间)直接使用其数组
+            self.arrays[column] = series.array
+
+    def updateCells(self, dataFrame, column, rows, values):
+        """
+        DataFrame中指定列的若干行被修改后调用，同步列式存储。
+        """
+        if self._buffers[column] is not None:
+            self.arrays[column][rows] = values
+        else:#视图可能因写时复制而失效，重新取得视图
+            self.refreshColumn(dataFrame, column)
+
+    def insertRows(self, dataFrame, first, last):
+        """
+        DataFrame中插入了first至last行后调用。
+        视图列的开销为常数；转换类型的列在末尾追加时只转换新增的行，缓冲区按倍数扩容。
+        """
+        self.index = dataFrame.index
+        count = last - first + 1
+        for j in range(len(self.arrays)):
+            buffer = self._buffers[j]
+            if buffer is None or first != self.arrays[j].shape[0]:
+                self.refreshColumn(dataFrame, j)
+                continue
+            rows = first + count
+            if rows > buffer.shape[0]:
+                grown = np.empty(max(2 * buffer.shape[0], rows), dtype = buffer.dtype)
+                grown[:first] = buffer[:first]
+                buffer = self._buffers[j] = grown
+            buffer[first:rows] = dataFrame.iloc[first:rows, j].to_numpy(dtype = buffer.dtype)
+            self.arrays[j] = buffer[:rows]
+
+    def removeRows(self, dataFrame, first, last):
+        """
+        DataFrame中删除了first至last行后调用。
+        """
+        self.index = dataFrame.index
+        for j in range(len(self.arrays)):
+            if self._buffers[j] is None:
+                self.refreshColumn(dataFrame, j)
+            else:
+                rows = self.arrays[j].shape[0]
+                buffer = self._buffers[j]
+                buffer[first:rows - (last - first + 1)] = buffer[last + 1:rows]
+                self.arrays[j] = buffer[:rows - (last - first + 1)]
+
+    def value(self, row, column):
+        """
+        读取指定单元格的数值。
+        """
+        if self.categories[column] is None:
+            value = self.arrays[column][row]
+            return pd.Timestamp(value) if self.arrays[column].dtype.kind == 'M' else value#与pandas的显示格式保持一致
+        code = self.arrays[column][row]
+        return self.categories[column][code] if code >= 0 else np.nan
+
+    def toDataFrame(self):
+        """
+        将列式存储转换回DataFrame对象。
+        """
+        data = {}
+        for j, array in enumerate(self.arrays):
+            if self.categories[j] is None:
+                data[j] = array
+            else:
+                data[j] = pd.Categorical.from_codes(array, self.categories[j])
+        dataFrame = pd.DataFrame(data, index = self.index)
+        dataFrame.columns = self.columns
+        return dataFrame
+
+class DisplayStringCache(object):
+    """
+    单元格显示字符串的LRU缓存。
+    键为(行号, 列号, 小数位数)，值为格式化后的显示字符串。
+    """
+    def __init__(self, capacity = 65536):
+        """
+        构造器。
+        可选参数：
+            1. capacity            缓存的最大条目数，默认为65536。
+        """
+        self.capacity = capacity
+        self._entries = collections.OrderedDict()
+        self._decimals = set()#曾经使用过的小数位数，用于按单元格失效
+
+    def get(self, key):
+        """
+        读取缓存。未命中时返回None。
+        """
+        text = self._entries.get(key)
+        if text is not None:
+            self._entries.move_to_end(key)
+        return text
+
+    def put(self, key, text):
+        """
+        写入缓存。超出容量时淘汰最久未使用的条目。
+        """
+        self._entries[key] = text
+        self._decimals.add(key[2])
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last = False)
+
+    def invalidate(self, row, column):
+        """
+        使指定单元格的全部缓存条目失效。
+        """
+        for decimals in self._decimals:
+            self._entries.pop((row, column, decimals), None)
+
+    def clear(self):
+        self._entries.clear()
+        self._decimals.clear()
+
+class QDataFrameModel(QBatchUpdateMixin, qtc.QAbstractTableModel):
     """
     用于PyQt5的Pandas.DataFrame数据模型。
     """
     editConfirmed = qtc.pyqtSignal()#确认编辑的信号。
     editRefuted = qtc.pyqtSignal()#撤销编辑的信号。
+    maxRemoveRanges = 64#批量删除行时，逐段发出删除信号的最大区间个数
+    dataFileCache = DataFileCache()#已解析数据文件的磁盘缓存，设为None时不使用缓存
+    journalDir = os.path.join(os.path.expanduser('~'), '.AssistantBoring', 'journals')#数据文件编辑日志的保存目录(见attachFileJournal)，设为None时不记录日志
+    optimizeDtypesOnImport = False#从文件读取数据时是否压缩各列的数据类型(见optimizeDtypes)。压缩后的浮点列精度较低，编辑时可能被转回float64
+    dtypesOptimized = qtc.pyqtSignal(str, object)#从文件读取数据并压缩数据类型后发出的信号，参数为文件路径及报告
 
     def __init__(self, dataFrame = None, parent=None):
         """
@@ -578,6 +1009,20 @@ class QDataFrameModel(qtc.QAbstractTableModel):
             2. parent               父对象。一般留空即可。
         """
         super(QDataFrameModel, self).__init__(parent)
+        self._batcher = DataChangedBatcher(self)
+        self._journal = None#编辑日志
+        self._loadToken = 0#当前分块读取的标识
+        self._tailReader = None#跟踪读取的CSV文件
+        self._followTimer = None
+        self._followArrays = None#跟踪读取时各列的预留容量缓冲区
+        self._followFrame = None
+        self._followColumns = None
+        self._store = None#列式存储后端，为None时直接使用缓存对象dataframe
+        self._storeFloatDtype = None
+        self._displayCache = DisplayStringCache()
+        self._structureEditing = False#是否正在进行批量结构编辑
+        self._rowCountOffset = 0#批量删除行时，尚未发出删除信号的行数
+        self._columnCountOffset = 0#批量删除列时，尚未发出删除信号的列数
         if type(dataFrame) is type(None):#若指定了dataframe参数，则将dataframe赋予dataframe_orig参数；否则将一个空DataFrame赋予dataframe_orig参数
             self.setDataFrame(pd.DataFrame())
         else:
@@ -585,21 +1030,158 @@ class QDataFrameModel(qtc.QAbstractTableModel):
         self._displayDecimal = 2
         self._editable = True
 
-        self.editConfirmed.connect(self.cacheDataFrame)
-        self.editRefuted.connect(self.cacheDataFrame)
+        for signal in (self.layoutChanged, self.modelReset, self.columnsInserted, self.columnsRemoved):
+            signal.connect(self.onStructureChanged)#结构改变后重建转换函数表及列式存储
+        self.rowsInserted.connect(self.onRowsInserted)#增删行时只更新受影响的部分
+        self.rowsRemoved.connect(self.onRowsRemoved)
+        self.onStructureChanged()
+
+    def setStorageBackend(self, backend, floatDtype = None):
+        """
+        设置数据模型的存储后端。
+        参数：
+            1. backend            'pandas'：直接从缓存对象dataframe中读取数据；
+                                  'columnar'：以ColumnarStore按列访问(各列为dataframe的视图)，并缓存单元格显示字符串。适合浏览大量数据。
+        可选参数：
+            1. floatDtype         列式存储中浮点列的数据类型，如np.float32。默认为None，即保持原类型。
+        """
+        if backend == 'pandas':
+            self._store = None
+        elif backend == 'columnar':
+            self._storeFloatDtype = floatDtype
+            self._store = ColumnarStore.fromDataFrame(self.dataFrame, floatDtype)
+        else:
+            raise ArgumentError(backend)
+        self._displayCache.clear()
+        
+    def onStructureChanged(self):
+        """
+        模型结构改变时调用的槽函数。
+        重建各列的转换函数表及列式存储。批量结构编辑期间暂不执行，待结束时统一执行。
+        """
+        if self._structureEditing:
+            return
+        self.rebuildConverters()
+        self.rebuildStorage()
+
+    def onRowsInserted(self, parent, first, last):
+        """
+        插入行后调用的槽函数。
+        各列数据类型不变时，只更新列式存储中受影响的部分；在末尾追加行时，已缓存的显示字符串仍然有效。
+        """
+        if self._structureEditing:
+            return
+        if list(self.dataFrame.dtypes) != self._columnDtypes:#如追加含缺失值的数据块使整型列变为浮点列
+            self.onStructureChanged()
+            return
+        if self._store is not None:
+            self._store.insertRows(self.dataFrame, first, last)
+        if first < self.dataFrame.shape[0] - (last - first + 1):
+            self._displayCache.clear()
+
+    def onRowsRemoved(self, parent, first, last):
+        """
+        删除行后调用的槽函数。只更新列式存储中受影响的部分。
+        """
+        if self._structureEditing:
+            return
+        if list(self.dataFrame.dtypes) != self._columnDtypes:
+            self.onStructureChanged()
+            return
+        if self._store is not None:
+            self._store.removeRows(self.dataFrame, first, last)
+        self._displayCache.clear()
+
+    def rebuildConverters(self):
+        """
+        根据缓存对象dataframe各列的数据类型，生成各列的转换函数表，供setData()及pasteBlock()使用。
+        """
+        self._columnDtypes = list(self.dataFrame.dtypes)
+        self._converters = [converterForDtype(dtype) for dtype in self._columnDtypes]
+
+    def upcastColumn(self, column, values):
+        """
+        若写入的值无法无损地存入第column列(如压缩为float32的列写入超出其精度的值)，将该列转为float64。
+        数据类型的改变视为结构改变，确认或撤销编辑时整体替换数据表。
+        必要参数：
+            1. column              列号。
+            2. values              待写入的值(数组或列表)。
+        返回是否改变了该列的数据类型。
+        """
+        dtype = self.dataFrame.dtypes.iat[column]
+        if not isinstance(dtype, np.dtype) or dtype.kind != 'f' or dtype.itemsize >= 8:
+            return False
+        values = np.asarray(values, dtype = np.float64)
+        with np.errstate(over = 'ignore'):
+            if np.array_equal(values.astype(dtype).astype(np.float64), values, equal_nan = True):
+                return False
+        self.dataFrame.isetitem(column, self.dataFrame.iloc[:, column].astype(np.float64))
+        self._structureChanged = True
+        self.rebuildConverters()
+        if self._store is not None:
+            self._store.refreshColumn(self.dataFrame, column)
+            self._displayCache.clear()
+        return True
+
+    def rebuildStorage(self):
+        """
+        根据缓存对象dataframe重建列式存储，并清空显示字符串缓存。
+        """
+        if self._store is not None:
+            self._store = ColumnarStore.fromDataFrame(self.dataFrame, self._storeFloatDtype)
+        self._displayCache.clear()
+
+    def displayText(self, row, column):
+        """
+        返回指定单元格的显示字符串。
+        使用列式存储时，优先从显示字符串缓存中读取。
+        """
+        if self._store is None:
+            return QDataFrameModel.formatValue(self.dataFrame.iat[row, column], self._displayDecimal)
+        key = (row, column, self._displayDecimal)
+        text = self._displayCache.get(key)
+        if text is None:
+            text = QDataFrameModel.formatValue(self._store.value(row, column), self._displayDecimal)
+            self._displayCache.put(key, text)
+        return text
+
+    def columnArray(self, column):
+        """
+        返回指定列的Numpy数组，用于排序、筛选等向量化运算。
+        使用列式存储时直接返回其中的数组(分类列除外)。
+        """
+        if self._store is not None and self._store.categories[column] is None and isinstance(self._store.arrays[column], np.ndarray):
+            return self._store.arrays[column]
+        return self.dataFrame.iloc[:, column].to_numpy()
+
+    def rowSource(self, chunkRows = 65536):
+        """
+        返回缓存对象dataframe的分块行数据源(DataFrameRowSource)，用于分块导出等。
+        数据块为dataframe的切片，不复制整个数据表。
+        """
+        return DataFrameRowSource(self.dataFrame, chunkRows)
+
+    @staticmethod
+    def formatValue(value, decimal):
+        """
+        将单元格数值格式化为显示字符串。数值型按指定小数位数取整。
+        """
+        try:
+            return str(round(value, decimal))
+        except TypeError:
+            return str(value)
 
     def cacheDataFrame(self):
         """
         生成dataframe_orig的一个缓存副本dataframe，用于界面编辑。
         dataframe_orig为实际外部传入的DataFrame对象。对dataframe_orig的改变会直接反应在外部，而副本dataframe则不会。
+        副本采用整块复制生成，保留原有的列名、索引及各列数据类型。
         """
+        self.dataFrame = self.dataFrame_Orig.copy(deep = True)
+        self._dirtyCells = set()#编辑缓冲区中被修改过的单元格(行号, 列号)集合
+        self._structureChanged = False#缓存副本是否被整体替换
         if self.dataFrame_Orig.shape[0] > 0 and self.dataFrame_Orig.shape[1] > 0:
-            for j in range(self.dataFrame_Orig.shape[1]):
-                self.dataFrame.rename(columns = {self.dataFrame.columns[j]: self.dataFrame_Orig.columns[j]}, inplace = True)
-                for i in range(self.dataFrame_Orig.shape[0]):
-                    self.dataFrame.iat[i, j] = self.dataFrame_Orig.iat[i, j]        
-            self.dataFrame.infer_objects()
-            self.dataChanged.emit(self.index(0, 0), self.index(self.dataFrame_Orig.shape[0] - 1, self.dataFrame_Orig.shape[1] -1))
+            self.notifyDataChanged(0, 0, self.dataFrame_Orig.shape[0] - 1, self.dataFrame_Orig.shape[1] - 1)
 
     def setDataFrame(self, dataFrame):
         """
@@ -610,7 +1192,6 @@ class QDataFrameModel(qtc.QAbstractTableModel):
 
         self.layoutAboutToBeChanged.emit()
         self.dataFrame_Orig = dataFrame
-        self.dataFrame = pd.DataFrame(np.empty((dataFrame.shape[0], dataFrame.shape[1])), index = dataFrame.index, dtype = object)
         self.cacheDataFrame()
         self.layoutChanged.emit()
         
@@ -621,33 +1202,249 @@ class QDataFrameModel(qtc.QAbstractTableModel):
         """
         self.layoutAboutToBeChanged.emit()
         if filetype == 'CSV':
-            self.dataFrame_Orig = pd.read_csv(filename, header = None, prefix = 'P')
+            dataFrame = pd.read_csv(filename, header = None).add_prefix('P')
         elif filetype == 'XLS':
-            self.dataFrame_Orig = pd.read_excel(filename, header = None, prefix = 'P')
-        self.dataFrame = pd.DataFrame(np.empty((self.dataFrame_Orig.shape[0], self.dataFrame_Orig.shape[1])))
+            dataFrame = pd.read_excel(filename, header = None).add_prefix('P')
+        else:
+            raise ArgumentError(filetype)
+        self.dataFrame_Orig = self.importStage(filename)(dataFrame)
         self.cacheDataFrame()
         self.layoutChanged.emit()
         
-    def readDataFrameFromFile(self, filename, filetype):
+    def importStage(self, filename):
+        """
+        返回从文件filename读取数据后对数据表的处理函数。
+        optimizeDtypesOnImport为True时压缩各列的数据类型并发出dtypesOptimized信号，否则原样返回。
+        """
+        def stage(dataFrame):
+            if not self.optimizeDtypesOnImport:
+                return dataFrame
+            dataFrame, report = optimizeDtypes(dataFrame)
+            self.dtypesOptimized.emit(filename, report)
+            return dataFrame
+        return stage
+
+    def readDataFrameFromFile(self, filename, filetype, columns = None, predicate = None):
         """
         从文件中读取数据，存入模型的缓存DataFrame对象。
+        可选参数：
+            1. columns            需要读取的列名列表，默认为None，即全部列。
+            2. predicate          行筛选条件(如RangePredicate或其列表)，在解析时逐块执行，默认为None，即全部行。
         """
         self.layoutAboutToBeChanged.emit()
-        if filetype == 'CSV':
-            self.dataFrame = pd.read_csv(filename, header = 'infer')
-        elif filetype == 'XLS':
-            self.dataFrame = pd.read_excel(filename, header = 'infer')
+        self.dataFrame = readDataFile(filename, filetype, self.dataFileCache, self.importStage(filename), columns, predicate)
+        self._dirtyCells = set()
+        self._structureChanged = True
         QDataFrameModel.clearDataFrameAndReshape(self.dataFrame_Orig, (self.dataFrame.shape[0], self.dataFrame.shape[1]))
         self.layoutChanged.emit()
         
+    def beginStreamingLoad(self):
+        """
+        开始分块读取数据。清空缓存对象dataframe，随后以appendDataFrameChunk()逐块追加数据。
+        读取完成后调用confirmEdit()写入dataframe_orig；中途取消时调用refuteEdit()恢复原有数据。
+        返回本次读取的标识，追加数据块时传入，使先前的读取中尚未送达的数据块被丢弃。
+        """
+        self._loadToken += 1
+        self.beginResetModel()
+        self.dataFrame = pd.DataFrame()
+        self._dirtyCells = set()
+        self._structureChanged = True
+        self.endResetModel()
+        return self._loadToken
+
+    def endStreamingLoad(self):
+        """
+        结束(或放弃)分块读取。此后送达的、属于本次读取的数据块均被丢弃。
+        """
+        self._loadToken += 1
+
+    def appendDataFrameChunk(self, chunk, token = None):
+        """
+        将一个数据块追加至缓存对象dataframe的末尾。第一个数据块决定各列的名称。
+        本函数一般作为后台读取线程的槽函数调用，因此不抛出异常：不属于当前读取的数据块及列数不一致的数据块均被丢弃。
+        必要参数：
+            1. chunk            DataFrame对象，列数须与已有数据一致。
+        可选参数：
+            1. token            beginStreamingLoad()返回的读取标识，与当前读取不符时丢弃该数据块。默认为None，即不检查。
+        """
+        if token is not None and token != self._loadToken:#已被取消或替换的读取中延迟送达的数据块
+            return
+        if chunk.shape[0] == 0:
+            return
+        if self.dataFrame.shape[1] == 0:
+            self.beginResetModel()
+            self.dataFrame = chunk.reset_index(drop = True)
+            self.endResetModel()
+            return
+        if chunk.shape[1] != self.dataFrame.shape[1]:
+            warnings.warn('Discarded a data chunk with {0} columns (expected {1}).'.format(chunk.shape[1], self.dataFrame.shape[1]))
+            return
+        position = self.rowCount()
+        chunk = chunk.set_axis(self.dataFrame.columns, axis = 1).set_axis(self.appendedRowLabels(chunk.shape[0]), axis = 0)
+        self.beginInsertRows(qtc.QModelIndex(), position, position + chunk.shape[0] - 1)
+        self.dataFrame = pd.concat([self.dataFrame, chunk])
+        self.endInsertRows()
+
+    def attachJournal(self, filename, sourceKey = '', replay = True):
+        """
+        关联编辑日志(EditJournal)。此后每次确认编辑时，被修改的单元格均以(行号, 列号, 原值, 新值)记录追加至日志。
+        应在读取原始数据后调用；若确认编辑时数据表的结构已改变(增删行列或重新读取)，日志中的行列号不再适用，日志随即被解除关联。
+        必要参数：
+            1. filename            日志文件路径，不存在时新建。
+        可选参数：
+            1. sourceKey           数据源标识(如fileIdentity(数据文件路径))。与已有日志中记录的标识不符时抛出ArgumentError，以免将日志回放至被替换的数据源。
+            2. replay              是否将已有日志回放至dataframe_orig及缓存对象dataframe，默认为True。
+        返回(已回放的单元格数, 跳过的单元格数)元组。
+        """
+        journal = EditJournal(filename, sourceKey)
+        if sourceKey and journal.sourceKey and journal.sourceKey != sourceKey:
+            raise ArgumentError(sourceKey)
+        result = (0, 0)
+        if replay:
+            self.layoutAboutToBeChanged.emit()
+            result = journal.replay(self.dataFrame_Orig)
+            self.cacheDataFrame()
+            self.layoutChanged.emit()
+        self._journal = journal
+        return result
+
+    def attachFileJournal(self, filename):
+        """
+        关联数据文件filename对应的编辑日志，并将其回放至刚读取的数据。应在读取全部行列并确认编辑后调用。
+        日志保存于journalDir目录下，以fileIdentity(filename)为键：数据文件未改变时，重新读取即可恢复此前确认的编辑；数据文件被替换后则使用新的日志。
+        journalDir为None或文件不存在时解除关联。
+        返回(已回放的单元格数, 跳过的单元格数)元组。
+        """
+        identity = fileIdentity(filename)
+        if self.journalDir is None or identity is None:
+            self.detachJournal()
+            return (0, 0)
+        os.makedirs(self.journalDir, exist_ok = True)
+        path = os.path.join(self.journalDir, hashlib.sha1(identity.encode('utf-8')).hexdigest() + '.journal')
+        return self.attachJournal(path, identity)
+
+    def detachJournal(self):
+        """
+        解除与编辑日志的关联。
+        """
+        self._journal = None
+
+    def journal(self):
+        """
+        返回关联的编辑日志，未关联时返回None。
+        """
+        return self._journal
+
+    def followFile(self, filename, interval = 1000):
+        """
+        跟踪读取持续增长的CSV文件。
+        先读取文件的已有内容，随后每隔interval毫秒只解析新追加的行，并以beginInsertRows()/endInsertRows()追加至缓存对象dataframe。
+        各列数据存放于按倍数扩容的Numpy缓冲区中，dataframe为其前若干行的视图，因此每次追加的开销只与新增行数有关。
+        必要参数：
+            1. filename            CSV文件路径，首行为表头。
+        可选参数：
+            1. interval            轮询间隔(毫秒)，默认为1000。
+        """
+        self.stopFollowing()
+        self._tailReader = CsvTailReader(filename)
+        self.beginStreamingLoad()
+        self.pollFollowedFile()
+        self._followTimer = qtc.QTimer(self)
+        self._followTimer.timeout.connect(self.pollFollowedFile)
+        self._followTimer.start(interval)
+
+    def stopFollowing(self):
+        """
+        停止跟踪读取。已读取的数据保留在缓存对象dataframe中。
+        """
+        if self._followTimer is not None:
+            self._followTimer.stop()
+            self._followTimer.deleteLater()
+        self._followTimer = None
+        self._tailReader = None
+        self._followArrays = None
+        self._followFrame = None
+
+    def isFollowing(self):
+        return self._tailReader is not None
+
+    def pollFollowedFile(self):
+        """
+        读取跟踪文件中新追加的行并追加至模型，返回新增的行数。文件被截短或替换时重新读取整个文件。
+        """
+        if self._tailReader is None:
+            return 0
+        chunk = self._tailReader.readNew()
+        if chunk is None:
+            self.beginStreamingLoad()
+            self._followArrays = None
+            chunk = self._tailReader.readNew()
+        if chunk.shape[1] == 0:
+            return 0
+        if self._followArrays is None or self._followFrame is not self.dataFrame or self.dataFrame.shape[1] != chunk.shape[1]:
+            self.adoptFollowBuffers(chunk)
+        count = chunk.shape[0]
+        if count == 0:
+            return 0
+        position = self.dataFrame.shape[0]
+        capacity = self._followArrays[0].shape[0] if self._followArrays else 0
+        for j in range(chunk.shape[1]):
+            values = chunk.iloc[:, j].to_numpy()
+            array = self._followArrays[j]
+            dtype = np.result_type(array.dtype, values.dtype) if array.dtype != object and values.dtype != object else np.dtype(object)
+            if position + count > capacity or dtype != array.dtype:
+                grown = np.empty(max(2 * capacity, position + count) if position + count > capacity else capacity, dtype = dtype)
+                grown[:position] = array[:position]
+                array = self._followArrays[j] = grown
+            array[position:position + count] = values
+        self.beginInsertRows(qtc.QModelIndex(), position, position + count - 1)
+        self.dataFrame = self._followFrame = self.followBufferView(position + count)
+        self.endInsertRows()
+        return count
+
+    def adoptFollowBuffers(self, chunk):
+        """
+        以当前缓存对象dataframe(为空时以数据块chunk的列)初始化跟踪读取的缓冲区。
+        """
+        if self.dataFrame.shape[1] != chunk.shape[1]:
+            self.beginResetModel()
+            self.dataFrame = pd.DataFrame(columns = chunk.columns)
+            self.endResetModel()
+        self._followColumns = self.dataFrame.columns
+        source = chunk if self.dataFrame.shape[0] == 0 else self.dataFrame
+        self._followArrays = []
+        for j in range(source.shape[1]):
+            values = self.dataFrame.iloc[:, j].to_numpy()
+            array = np.empty(max(2 * values.shape[0], 1024), dtype = source.iloc[:, j].to_numpy().dtype)
+            array[:values.shape[0]] = values
+            self._followArrays.append(array)
+        self._followFrame = self.dataFrame
+
+    def followBufferView(self, rows):
+        """
+        返回由各列缓冲区前rows行的视图组成的DataFrame对象(不复制数据)。
+        """
+        frame = pd.DataFrame({j: pd.Series(array[:rows], dtype = array.dtype, copy = False) for j, array in enumerate(self._followArrays)}, copy = False)
+        frame.columns = self._followColumns
+        return frame
+
     @staticmethod
     def clearDataFrameAndReshape(dataFrame, shape):
-        dataFrame.drop(range(dataFrame.shape[0]), inplace = True)
+        """
+        清空DataFrame对象，并将其原位改为指定形状，所有元素均为NaN。
+        """
+        QDataFrameModel.replaceDataFrameInPlace(dataFrame, pd.DataFrame(np.nan, index = range(shape[0]), columns = range(shape[1])))
+
+    @staticmethod
+    def replaceDataFrameInPlace(dataFrame, source):
+        """
+        以source的内容(列名、索引、数据类型及数值)原位替换dataFrame的内容。
+        dataFrame对象本身保持不变，因此外部对其的引用仍然有效。数据按列整块复制。
+        """
         dataFrame.drop(dataFrame.columns, axis = 1, inplace = True)
-        for i in range(shape[1]):
-            dataFrame.insert(i, i, [])
-        for j in range(shape[0]):
-            dataFrame.loc[j] = [np.nan for i in range(shape[1])]
+        dataFrame.drop(dataFrame.index, inplace = True)
+        for j in range(source.shape[1]):
+            dataFrame.insert(j, source.columns[j], source.iloc[:, j].copy(), allow_duplicates = True)#向空DataFrame插入Series时，其索引会一并被采用
         
     def dtype(self, column):
         return self.dataFrame.dtypes.iat[column]
@@ -655,44 +1452,88 @@ class QDataFrameModel(qtc.QAbstractTableModel):
     def rank(self):
         return min(self.dataFrame_Orig.shape)
 
+    def isStructureChanged(self):
+        """
+        判断缓存对象dataframe的结构(形状或列名)是否与dataframe_orig不一致。
+        增删行列或从文件读取数据后，结构即发生改变。此时确认编辑需整体写回。
+        """
+        return self._structureChanged or \
+               self.dataFrame.shape != self.dataFrame_Orig.shape or \
+               not self.dataFrame.columns.equals(self.dataFrame_Orig.columns)
+
+    @staticmethod
+    def groupCellsByColumn(cells):
+        """
+        将(行号, 列号)元组组成的集合按列分组，返回{列号: 行号数组}字典，以便按列批量读写。
+        """
+        groups = {}
+        for row, column in cells:
+            groups.setdefault(column, []).append(row)
+        return {column: np.array(sorted(rows), dtype = np.intp) for column, rows in groups.items()}
+
     def confirmEdit(self):
         """
         确认编辑时调用的槽函数。
         将缓存对象dataframe中的数据写入dataframe_orig，确认编辑。
+        若结构未改变，仅写回被修改过的单元格；否则将dataframe整体原位复制至dataframe_orig。
         """
-        if self.dataFrame_Orig.shape[0] > 0 and self.dataFrame_Orig.shape[1] > 0:
-            for j in range(self.dataFrame_Orig.shape[1]):
-                self.dataFrame_Orig.rename(columns = {self.dataFrame_Orig.columns[j]: self.dataFrame.columns[j]}, inplace = True)
-                for i in range(self.dataFrame_Orig.shape[0]):
-                    self.dataFrame_Orig.iat[i, j] = self.dataFrame.iat[i, j]
-            self.editConfirmed.emit()
+        if self.isStructureChanged():
+            QDataFrameModel.replaceDataFrameInPlace(self.dataFrame_Orig, self.dataFrame)
+            self._journal = None#日志中的行列号仅对应原有的数据表结构
+        else:
+            if self._journal is not None:
+                self._journal.append([(row, column, self.dataFrame_Orig.iat[row, column], self.dataFrame.iat[row, column])
+                                      for row, column in sorted(self._dirtyCells)])
+            for column, rows in QDataFrameModel.groupCellsByColumn(self._dirtyCells).items():
+                self.dataFrame_Orig.iloc[rows, column] = self.dataFrame.iloc[rows, column].to_numpy()
+        self._dirtyCells = set()
+        self._structureChanged = False
+        self.editConfirmed.emit()
 
     def refuteEdit(self):
         """
         撤销编辑时调用的槽函数。
-        """
+        若结构未改变，仅从dataframe_orig恢复被修改过的单元格；否则重新生成整个缓存副本。
+        """
+        if self.isStructureChanged():
+            self.layoutAboutToBeChanged.emit()
+            self.cacheDataFrame()
+            self.layoutChanged.emit()
+        elif self._dirtyCells:
+            for column, rows in QDataFrameModel.groupCellsByColumn(self._dirtyCells).items():
+                self.dataFrame.iloc[rows, column] = self.dataFrame_Orig.iloc[rows, column].to_numpy()
+            if self._store is not None:
+                for column, rows in QDataFrameModel.groupCellsByColumn(self._dirtyCells).items():
+                    self._store.updateCells(self.dataFrame, column, rows, self.dataFrame.iloc[rows, column].to_numpy())
+                for row, column in self._dirtyCells:
+                    self._displayCache.invalidate(row, column)
+            with self.batchUpdate():
+                for row, column in self._dirtyCells:
+                    self.notifyDataChanged(row, column, row, column)
+            self._dirtyCells = set()
         self.editRefuted.emit()
 
     def index(self, row, column, parent=qtc.QModelIndex()):
         """
         PyQt5数据模型必须重写的关键函数。
         返回模型索引对象(Index)。
+        索引仅记录行号及列号，不携带单元格数据。
         """
-        return self.createIndex(row, column, self.dataFrame.iat[row, column])
+        return self.createIndex(row, column)
 
     def rowCount(self, parent=qtc.QModelIndex()):
         """
         PyQt5数据模型必须重写的关键函数。
         返回模型的行数。
         """
-        return self.dataFrame.shape[0]
+        return self.dataFrame.shape[0] + self._rowCountOffset
 
     def columnCount(self, parent=qtc.QModelIndex()):
         """
         PyQt5数据模型必须重写的关键函数。
         返回模型的列数。
         """
-        return self.dataFrame.shape[1]
+        return self.dataFrame.shape[1] + self._columnCountOffset
 
     def data(self, index, role=qtc.Qt.DisplayRole):
         """
@@ -700,20 +1541,14 @@ class QDataFrameModel(qtc.QAbstractTableModel):
         返回在指定的Role下的模型数据。
         其中DisplayRole为视图(View)中显示的数据；EditRole为传给编辑器的数据；TextAlignmentRole为数据显示时的对齐方式。
         """
-        if not index.isValid() or \
-           not 0 <= index.row() < self.dataFrame.shape[0] or \
-           not 0 <= index.column() < self.dataFrame.shape[1]:
-            return qtc.QVariant()
-
-        if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
-            try:
-                return str(round(self.dataFrame.iat[index.row(), index.column()], self._displayDecimal))
-            except TypeError:
-                return str(self.dataFrame.iat[index.row(), index.column()])
+        if role in TEXT_ROLES:
+            row, column = index.row(), index.column()
+            if not 0 <= row < self.dataFrame.shape[0] or not 0 <= column < self.dataFrame.shape[1]:
+                return EMPTY_VARIANT
+            return self.displayText(row, column)
         elif role == qtc.Qt.TextAlignmentRole:
-            return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter
-        else:
-            return qtc.QVariant()
+            return CELL_ALIGNMENT
+        return EMPTY_VARIANT
 
     def flags(self, index):
         """
@@ -729,24 +1564,66 @@ class QDataFrameModel(qtc.QAbstractTableModel):
         PyQt5可编辑数据模型必须重写的关键函数。
         将编辑器传入的值写入缓存对象dataframe。
         """
-        if self.dtype(index.column()) == int:
-            value_dtype, ok = str2int(value)
-        elif self.dtype(index.column()) == float:
-            value_dtype, ok = str2float(value)
-        elif selt.dtype(index.column()) == bool:
-            value_dtype, ok = str2bool(value)
-        elif self.dtype(index.column()) == str:
-            value_dtype, ok = value, True
-        elif self.dtype(index.column()) == object:
-            value_dtype, ok = value, False
-        else:
-            value_dtype, ok = value, False
+        if not 0 <= index.column() < len(self._converters):
+            return False
+        value_dtype, ok = self._converters[index.column()](value)#由于编辑器传入值均为str类型，需进行相应的数据类型转换及校验。
         if ok:
-            self.dataFrame.iat[index.row(), index.column()] = value_dtype
-            self.dataChanged.emit(index, index)
+            self.upcastColumn(index.column(), [value_dtype])
+            try:
+                self.dataFrame.iat[index.row(), index.column()] = value_dtype
+            except (TypeError, ValueError):#该列的数据类型无法容纳此值
+                return False
+            if self._store is not None:
+                self._store.updateCells(self.dataFrame, index.column(), index.row(), value_dtype)
+                self._displayCache.invalidate(index.row(), index.column())
+            self._dirtyCells.add((index.row(), index.column()))
+            self.notifyDataChanged(index.row(), index.column(), index.row(), index.column())
             return True
         return False
 
+    def pasteBlock(self, top, left, block, rows = None):
+        """
+        将一个二维数据块(一般为从剪贴板粘贴的字符串)批量写入缓存对象dataframe。
+        各列以向量化方式转换为该列的数据类型，超出范围的部分被忽略，转换失败的单元格保持不变。
+        必要参数：
+            1. top, left            数据块左上角对应的行号及列号。
+            2. block                二维数组或嵌套列表。
+        可选参数：
+            1. rows                 数据块各行对应的目标行号数组(如经排序代理映射后的源行号)，此时忽略top。
+                                    默认为None，即从top开始的连续各行。
+        返回与写入区域形状相同的布尔掩码，标记各单元格是否写入成功。
+        """
+        block = np.asarray(block, dtype = object)
+        if block.ndim == 1:
+            block = block.reshape(1, -1)
+        if rows is None:
+            rows = np.arange(top, self.dataFrame.shape[0], dtype = np.intp)
+        rows = np.asarray(rows, dtype = np.intp)
+        height = max(min(block.shape[0], rows.shape[0]), 0)
+        width = max(min(block.shape[1], self.dataFrame.shape[1] - left), 0)
+        rows = rows[:height]
+        written = np.zeros((height, width), dtype = bool)
+        with self.batchUpdate():
+            for j in range(width):
+                column = left + j
+                converted, ok = convertArray(block[:height, j], self.dataFrame.dtypes.iat[column])
+                targets = rows[ok]
+                if targets.shape[0] == 0:
+                    continue
+                self.upcastColumn(column, converted[ok])
+                try:
+                    self.dataFrame.iloc[targets, column] = converted[ok]
+                except (TypeError, ValueError):#该列的数据类型无法容纳这些值，整列视为写入失败
+                    continue
+                if self._store is not None:
+                    self._store.updateCells(self.dataFrame, column, targets, converted[ok])
+                self._dirtyCells.update(zip(targets.tolist(), [column] * targets.shape[0]))
+                written[:, j] = ok
+            self._displayCache.clear()
+            for first, last in QDataFrameModel.coalesceRanges(rows):
+                self.notifyDataChanged(first, left, last, left + width - 1)
+        return written
+
     def headerData(self, section, orientation, role = qtc.Qt.DisplayRole):
         """
         PyQt5数据模型必须重写的关键函数。
@@ -754,13 +1631,15 @@ class QDataFrameModel(qtc.QAbstractTableModel):
         格式类似data()函数。
         """
         hdata = super(QDataFrameModel, self).headerData(section, orientation, role)
+        if not 0 <= section < self.dataFrame.shape[1 if orientation == qtc.Qt.Horizontal else 0]:#批量删除行列、逐段发出信号期间可能出现
+            return qtc.QVariant()
         if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
             if orientation == qtc.Qt.Horizontal:
                 return str(self.dataFrame.columns[section])
             elif orientation == qtc.Qt.Vertical:
                 return str(self.dataFrame.index[section])
         elif role == qtc.Qt.TextAlignmentRole:
-            return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter        
+            return CELL_ALIGNMENT
         else:
             return hdata
         
@@ -777,9 +1656,58 @@ class QDataFrameModel(qtc.QAbstractTableModel):
             return True
         return False
         
+    @staticmethod
+    def coalesceRanges(positions):
+        """
+        将行号(或列号)集合合并为连续区间，返回按升序排列的[(起始位置, 终止位置), ...]列表。
+        """
+        positions = np.unique(np.asarray(list(positions), dtype = np.intp))
+        if positions.shape[0] == 0:
+            return []
+        breaks = np.flatnonzero(np.diff(positions) != 1)
+        firsts = positions[np.concatenate(([0], breaks + 1))]
+        lasts = positions[np.concatenate((breaks, [positions.shape[0] - 1]))]
+        return list(zip(firsts.tolist(), lasts.tolist()))
+
+    def appendedRowLabels(self, count):
+        """
+        返回在dataframe末尾追加count行时新行的索引标签。
+        删除行后保留其余各行原有的标签，因此新标签接续现有整数标签的最大值，而非行数，以免标签重复。
+        """
+        index = self.dataFrame.index
+        start = int(index.max()) + 1 if index.shape[0] > 0 and pd.api.types.is_integer_dtype(index.dtype) else index.shape[0]
+        return pd.RangeIndex(start, start + count)
+
+    @staticmethod
+    def defaultColumn(dtype, count, defaultValue = None):
+        """
+        生成长度为count、类型为dtype的新列数据，用于批量增加行或列。
+        未指定defaultValue时，根据数据类型选择初始值。
+        """
+        if isinstance(dtype, pd.CategoricalDtype):
+            return pd.Categorical([defaultValue] * count if defaultValue is not None else np.full(count, np.nan), dtype = dtype)
+        if defaultValue is None:
+            if dtype == int:
+                defaultValue = 0
+            elif dtype == float:
+                defaultValue = 0.0
+            elif dtype == bool:
+                defaultValue = True
+            elif dtype == str:
+                defaultValue = ''
+            else:
+                try:
+                    defaultValue = dtype.type()
+                except TypeError:
+                    defaultValue = None
+        try:
+            return pd.array(np.full(count, defaultValue), dtype = dtype)
+        except (TypeError, ValueError):
+            return pd.array([defaultValue] * count, dtype = dtype)
+
     def addDataFrameRows(self, count = 1):
         """
-        向dataframe中增加数行。
+        向dataframe末尾增加数行。新增的数据块一次性生成并拼接。
         可选参数：
             1. count            增加的行数，默认为1。
         """
@@ -791,23 +1719,11 @@ class QDataFrameModel(qtc.QAbstractTableModel):
             # log an error message or warning
             return False        
         
+        block = pd.DataFrame({j: QDataFrameModel.defaultColumn(dtype, count) for j, dtype in enumerate(self.dataFrame.dtypes)},
+                             index = self.appendedRowLabels(count))#根据每列不同的数据类型设置不同的初始值。
+        block.columns = self.dataFrame.columns
         self.beginInsertRows(qtc.QModelIndex(), position, position + count - 1)
-        defaultValues = []
-        for dtype in self.dataFrame.dtypes:
-            if dtype == int:
-                val = 0
-            elif dtype == float:
-                val = 0.0
-            elif dtype == bool:
-                val = True
-            elif dtype == str:
-                val = ''
-            else:
-                val = dtype.type()
-            defaultValues.append(val)#根据每列不同的数据类型设置不同的初始值。
-        for i in range(count):
-            self.dataFrame.loc[position + i] = defaultValues
-        self.dataFrame.reset_index()#DataFrame中插入数据后必须执行的函数
+        self.dataFrame = pd.concat([self.dataFrame, block])
         self.endInsertRows()
         return True
     
@@ -820,16 +1736,29 @@ class QDataFrameModel(qtc.QAbstractTableModel):
             1. dtype                 该列的数据类型，默认为浮点型。
             2. defaultValue          该列数据的初始值，默认为None。
         """
-        elements = self.rowCount()
-        columnPosition = self.columnCount()#默认插入在最右侧
-        newColumn = pd.Series([defaultValue]*elements, index=self.dataFrame.index, dtype=dtype)#生成一个Series，随后插入
+        return self.addDataFrameColumns([columnName], dtype, defaultValue)
 
-        self.beginInsertColumns(qtc.QModelIndex(), columnPosition - 1, columnPosition - 1)        
-        try:
-            self.dataFrame.insert(columnPosition, columnName, newColumn, allow_duplicates=False)
-        except ValueError as e:
+    def addDataFrameColumns(self, columnNames, dtype = float, defaultValue = None):
+        """
+        向dataframe最右侧批量插入数列。
+        必要参数：
+            1. columnNames           由列名称组成的列表。
+        可选参数：
+            1. dtype                 各列的数据类型，默认为浮点型。
+            2. defaultValue          各列数据的初始值，默认为None。
+        若某一列名称已存在，则不插入任何列并返回False。
+        """
+        columnNames = list(columnNames)
+        if not columnNames or len(set(columnNames)) < len(columnNames) or self.dataFrame.columns.isin(columnNames).any():
             # columnName does already exist
-            return False        
+            return False
+        elements = self.rowCount()
+        columnPosition = self.columnCount()#默认插入在最右侧
+        block = pd.DataFrame({name: QDataFrameModel.defaultColumn(np.dtype(dtype), elements, defaultValue) for name in columnNames},
+                             index = self.dataFrame.index)
+        
+        self.beginInsertColumns(qtc.QModelIndex(), columnPosition, columnPosition + len(columnNames) - 1)
+        self.dataFrame = pd.concat([self.dataFrame, block], axis = 1)
         self.endInsertColumns()
         return True
     
@@ -838,55 +1767,566 @@ class QDataFrameModel(qtc.QAbstractTableModel):
         从dataframe中移除数行。
         必要参数：
             1. rows            由需要移除的行索引号组成的列表
+        被移除的行通过布尔掩码一次性删除，其余各行保留原有的索引标签(即垂直表头)，并按连续区间由后向前发出删除信号。
+        连续区间个数超过maxRemoveRanges时，改为重置模型。
         """
-        if rows:
-            position = min(rows)
-            count = len(rows)
-            self.beginRemoveRows(qtc.QModelIndex(), position, position + count - 1)        
-            removedAny = False
-            for idx, line in self.dataFrame.iterrows():
-                if idx in rows:
-                    removedAny = True
-                    self.dataFrame.drop(idx, inplace=True)
-        
-            if not removedAny:
-                return False
-
-            self.dataFrame.reset_index(inplace=True, drop=True)
-            self.endRemoveRows()
+        rows = [row for row in rows if 0 <= row < self.dataFrame.shape[0]]
+        if not rows:
+            return False
+        ranges = QDataFrameModel.coalesceRanges(rows)
+        mask = np.ones(self.dataFrame.shape[0], dtype = bool)
+        for first, last in ranges:
+            mask[first:last + 1] = False
+        if len(ranges) > self.maxRemoveRanges:#区间过于分散时，逐段发出信号的开销远大于重置模型
+            self.beginResetModel()
+            self.dataFrame = self.dataFrame.iloc[mask]
+            self.endResetModel()
             return True
-        return False            
+        self._beginStructureEdit()
+        self._rowCountOffset = self.dataFrame.shape[0] - int(mask.sum())
+        self.dataFrame = self.dataFrame.iloc[mask]
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(qtc.QModelIndex(), first, last)
+            self._rowCountOffset -= last - first + 1
+            self.endRemoveRows()
+        self._endStructureEdit()
+        return True
     
     def removeDataFrameColumns(self, columns):
         """
         从dataframe中移除数列。
         必要参数：
             1. columns            由需要移除的列的(索引号, 列名称)元组组成的列表。
+        被移除的列一次性删除，并按连续区间由后向前发出删除信号。
         """
         if columns:
-            deleted = 0
-            errored = False
-            for (position, name) in columns:
-                position = position - deleted
-                if position < 0:
-                    position = 0
-                self.beginRemoveColumns(qtc.QModelIndex(), position, position)
-                try:
-                    self.dataFrame.drop(name, axis=1, inplace=True)
-                except ValueError as e:
-                    errored = True
-                    continue
-                self.endRemoveColumns()
-                deleted += 1
-            if self.columnCount() > 0:
-                self.dataChanged.emit(self.index(0, position - 1 if position == self.columnCount() else position),
-                                      self.index(self.rowCount() - 1, self.columnCount() - 1 if position + deleted > self.columnCount() else position + deleted - 1))
-            else:
+            positions = [position for (position, name) in columns if 0 <= position < self.dataFrame.shape[1]]
+            errored = len(positions) < len(set(columns))
+            ranges = QDataFrameModel.coalesceRanges(positions)
+            if ranges:
+                mask = np.ones(self.dataFrame.shape[1], dtype = bool)
+                for first, last in ranges:
+                    mask[first:last + 1] = False
+                self._beginStructureEdit()
+                self._columnCountOffset = self.dataFrame.shape[1] - int(mask.sum())
+                self.dataFrame = self.dataFrame.iloc[:, mask]
+                for first, last in reversed(ranges):
+                    self.beginRemoveColumns(qtc.QModelIndex(), first, last)
+                    self._columnCountOffset -= last - first + 1
+                    self.endRemoveColumns()
+                self._endStructureEdit()
+            if self.columnCount() == 0:
                 self.removeDataFrameRows(range(self.rowCount()))
-                self.dataChanged.emit(qtc.QModelIndex(), qtc.QModelIndex())
                 
             if errored:
                 return False
             else:
                 return True
-        return False
\ No newline at end of file
+        return False
+
+    def _beginStructureEdit(self):
+        """
+        开始批量结构编辑。期间暂停重建转换函数表及列式存储，待结束时统一重建。
+        """
+        self._structureEditing = True
+
+    def _endStructureEdit(self):
+        """
+        结束批量结构编辑，重建转换函数表及列式存储。
+        """
+        self._structureEditing = False
+        self.onStructureChanged()
+
+class QPagedDataFrameModel(QDataFrameModel):
+    """
+    用于PyQt5的分页(虚拟)DataFrame数据模型。
+    数据保存在磁盘上的分块数据源(CsvRowSource等)中，模型只在内存中保留最近访问的若干数据块，因此可用于浏览极大的监测数据文件。
+    行数随canFetchMore()/fetchMore()逐步增加，也可在设置数据源时一次性扫描全部行。
+    本模型只读。
+    """
+    def __init__(self, source = None, parent = None, maxPages = 8, fetchRows = 1 << 20, prefetchRows = 1024):
+        """
+        构造器。
+        可选参数：
+            1. source             分块行数据源，须提供columns属性及rowCount()、isFinished()、scan()、scanAll()、readChunk()方法。
+            2. parent             父对象。一般留空即可。
+            3. maxPages           内存中最多保留的数据块个数，默认为8。
+            4. fetchRows          每次fetchMore()扫描的行数，默认为1048576。
+            5. prefetchRows       访问位置距数据块末尾小于该行数时，预先读取下一数据块，默认为1024。
+        """
+        super(QPagedDataFrameModel, self).__init__(None, parent)
+        self._editable = False
+        self._source = None
+        self._rowCount = 0
+        self._pages = collections.OrderedDict()#数据块序号 -> 各列Numpy数组组成的列表
+        self.maxPages = maxPages
+        self.fetchRows = fetchRows
+        self.prefetchRows = prefetchRows
+        if source is not None:
+            self.setDataSource(source)
+
+    def setDataSource(self, source, scanAll = False):
+        """
+        设置模型的分块行数据源。
+        可选参数：
+            1. scanAll            是否立即扫描全部行，使rowCount()直接返回总行数。默认为False。
+        """
+        self.beginResetModel()
+        self._source = source
+        self._pages.clear()
+        if scanAll:
+            source.scanAll()
+        elif source.rowCount() == 0:
+            source.scan(self.fetchRows)
+        self._rowCount = source.rowCount()
+        self.dataFrame_Orig = pd.DataFrame(columns = source.columns)
+        self.cacheDataFrame()
+        self.endResetModel()
+
+    def setDataSourceFromFile(self, filename, filetype, chunkRows = 65536, scanAll = False):
+        """
+        从文件建立分块行数据源并设置给模型。
+        CSV文件按字节偏移分块读取；Excel文件无法分块解析，读入内存后再分块提供。
+        """
+        if filetype == 'CSV':
+            source = CsvRowSource(filename, chunkRows)
+        elif filetype == 'XLS':
+            source = DataFrameRowSource(pd.read_excel(filename, header = 0), chunkRows)
+        else:
+            raise ArgumentError(filetype)
+        self.setDataSource(source, scanAll)
+
+    def rowSource(self, chunkRows = None):
+        """
+        返回模型的数据源。导出时仅包含已扫描到的行。
+        """
+        return self._source
+
+    def page(self, chunkIndex):
+        """
+        返回指定序号的数据块(各列Numpy数组组成的列表)，必要时从数据源读取并淘汰最久未使用的数据块。
+        """
+        page = self._pages.get(chunkIndex)
+        if page is None:
+            chunk = self._source.readChunk(chunkIndex)
+            page = [chunk.iloc[:, j].to_numpy() for j in range(chunk.shape[1])]
+            self._pages[chunkIndex] = page
+            while len(self._pages) > self.maxPages:
+                self._pages.popitem(last = False)
+        else:
+            self._pages.move_to_end(chunkIndex)
+        return page
+
+    def value(self, row, column):
+        """
+        读取指定单元格的数值。
+        """
+        chunkIndex, offset = divmod(row, self._source.chunkRows)
+        value = self.page(chunkIndex)[column][offset]
+        if offset >= self._source.chunkRows - self.prefetchRows and \
+           (chunkIndex + 1) * self._source.chunkRows < self._rowCount and \
+           chunkIndex + 1 not in self._pages:
+            self.page(chunkIndex + 1)
+            self._pages.move_to_end(chunkIndex)
+        return value
+
+    def canFetchMore(self, parent = qtc.QModelIndex()):
+        """
+        PyQt5增量加载数据时重写的函数。
+        数据源尚未扫描至文件末尾时返回True。
+        """
+        return self._source is not None and not self._source.isFinished()
+
+    def fetchMore(self, parent = qtc.QModelIndex()):
+        """
+        PyQt5增量加载数据时重写的函数。
+        继续扫描数据源，并将新增的行插入模型。
+        """
+        if self._source is None:
+            return
+        self._source.scan(self.fetchRows)
+        rowCount = self._source.rowCount()
+        if rowCount > self._rowCount:
+            self.beginInsertRows(qtc.QModelIndex(), self._rowCount, rowCount - 1)
+            self._rowCount = rowCount
+            self.endInsertRows()
+
+    def index(self, row, column, parent=qtc.QModelIndex()):
+        """
+        PyQt5数据模型必须重写的关键函数。
+        返回模型索引对象(Index)。
+        索引仅记录行号及列号，不携带单元格数据。
+        """
+        return self.createIndex(row, column)
+
+    def rowCount(self, parent=qtc.QModelIndex()):
+        """
+        PyQt5数据模型必须重写的关键函数。
+        返回模型的行数。
+        """
+        return self._rowCount
+
+    def columnCount(self, parent=qtc.QModelIndex()):
+        """
+        PyQt5数据模型必须重写的关键函数。
+        返回模型的列数。
+        """
+        return 0 if self._source is None else len(self._source.columns)
+
+    def data(self, index, role=qtc.Qt.DisplayRole):
+        """
+        PyQt5数据模型必须重写的关键函数。
+        返回在指定的Role下的模型数据。
+        """
+        if role in TEXT_ROLES:
+            row, column = index.row(), index.column()
+            if not 0 <= row < self._rowCount or not 0 <= column < self.columnCount():
+                return EMPTY_VARIANT
+            return QDataFrameModel.formatValue(self.value(row, column), self._displayDecimal)
+        elif role == qtc.Qt.TextAlignmentRole:
+            return CELL_ALIGNMENT
+        return EMPTY_VARIANT
+
+    def setData(self, index, value, role=qtc.Qt.EditRole):
+        """
+        本模型只读，不接受编辑。
+        """
+        return False
+
+    def headerData(self, section, orientation, role = qtc.Qt.DisplayRole):
+        """
+        PyQt5数据模型必须重写的关键函数。
+        返回表头信息。
+        """
+        if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
+            if orientation == qtc.Qt.Horizontal:
+                return str(self._source.columns[section]) if self._source is not None else qtc.QVariant()
+            elif orientation == qtc.Qt.Vertical:
+                return str(section)
+        elif role == qtc.Qt.TextAlignmentRole:
+            return CELL_ALIGNMENT
+        return super(QDataFrameModel, self).headerData(section, orientation, role)
+
+class QDataFrameSortFilterProxyModel(qtc.QAbstractProxyModel):
+    """
+    用于QDataFrameModel的排序/筛选代理模型。
+    排序直接对源模型中有类型的列数组执行np.argsort，各列的排序结果缓存复用；筛选以向量化的布尔掩码实现。
+    代理行号到源行号的映射以整型数组保存。
+    源数据被编辑后不会自动重新排序，以免编辑中的行跳动；再次调用sort()即按新数据排序。
+    源模型插入行(如分块读取或跟踪文件时逐块追加)时不重置模型：新行按筛选条件筛选后并入行映射，排序时按排序列的值插入相应位置。
+    """
+    maxInsertRanges = 64#源模型插入行时，逐段发出插入信号的最大区间个数，超过时改为发出布局改变信号
+
+    def __init__(self, parent = None):
+        """
+        构造器。
+        可选参数：
+            1. parent             父对象。一般留空即可。
+        """
+        super(QDataFrameSortFilterProxyModel, self).__init__(parent)
+        self._rows = np.empty(0, dtype = np.intp)#代理行号 -> 源行号
+        self._inverse = np.empty(0, dtype = np.intp)#源行号 -> 代理行号，未显示的行为-1
+        self._rowsBuffer = self._rows#_rows所在的缓冲区，源模型在末尾追加行时按几何级数扩充
+        self._inverseBuffer = self._inverse#_inverse所在的缓冲区
+        self._rowCountOffset = 0#逐段发出插入信号期间，尚未通知视图的行数(为负)
+        self._orderCache = {}#列号 -> 该列的升序排列(源行号数组)
+        self._rangeFilters = {}#列号 -> (下限, 上限)
+        self._filterMask = None
+        self._sortColumn = -1
+        self._sortOrder = qtc.Qt.AscendingOrder
+
+    def setSourceModel(self, sourceModel):
+        """
+        设置源模型，须为QDataFrameModel对象。
+        """
+        if not isinstance(sourceModel, QDataFrameModel):
+            raise TypeError("The input argument must be a QDataFrameModel object.")
+        oldModel = self.sourceModel()
+        if oldModel is not None:
+            oldModel.dataChanged.disconnect(self.onSourceDataChanged)
+            oldModel.rowsInserted.disconnect(self.onSourceRowsInserted)
+            for signal in self.structureSignals(oldModel):
+                signal.disconnect(self.invalidate)
+        self.beginResetModel()
+        super(QDataFrameSortFilterProxyModel, self).setSourceModel(sourceModel)
+        sourceModel.dataChanged.connect(self.onSourceDataChanged)
+        sourceModel.rowsInserted.connect(self.onSourceRowsInserted)
+        for signal in self.structureSignals(sourceModel):
+            signal.connect(self.invalidate)
+        self._rangeFilters.clear()
+        self._filterMask = None
+        self._sortColumn = -1
+        self._orderCache.clear()
+        self.updateMapping()
+        self.endResetModel()
+
+    @staticmethod
+    def structureSignals(model):
+        return (model.layoutChanged, model.modelReset, model.rowsRemoved, model.columnsInserted, model.columnsRemoved)
+
+    def invalidate(self):
+        """
+        源模型结构改变后，清空排序缓存并重新生成行映射。
+        """
+        self.beginResetModel()
+        self._orderCache.clear()
+        if self._filterMask is not None and self._filterMask.shape[0] != self.sourceModel().rowCount():
+            self._filterMask = None
+        self.updateMapping()
+        self.endResetModel()
+
+    def onSourceRowsInserted(self, parent, first, last):
+        """
+        源模型插入first至last行后调用的槽函数。不重置模型，视图的选区及滚动位置得以保留。
+        新行按当前的筛选条件筛选；未排序时按源行号顺序并入行映射(在末尾追加时摊销开销与新增行数成正比)，排序时按排序列的值归并至相应位置(在中间插入时重新排序)。
+        """
+        count = last - first + 1
+        sourceCount = self.sourceModel().rowCount()
+        self._orderCache.clear()
+        if self._filterMask is not None:#自定义掩码未涵盖新行，新行均显示
+            self._filterMask = np.insert(self._filterMask, first, np.ones(count, dtype = bool))
+        newRows = np.arange(first, last + 1, dtype = np.intp)
+        newRows = newRows[self.rowsPassingFilters(newRows)]
+        isSorted = 0 <= self._sortColumn < self.sourceModel().columnCount()
+        if not isSorted and first == self._inverse.shape[0]:
+            self.appendMapping(newRows, sourceCount)
+            return
+        rows = self._rows + count * (self._rows >= first)#插入点之后的源行号后移
+        if isSorted and first < self._inverse.shape[0]:#在中间插入时，相等的值须按源行号排列，直接重新排序
+            self.layoutAboutToBeChanged.emit()
+            self.updateMapping()
+            self.updatePersistentIndexes(rows)
+            self.layoutChanged.emit()
+            return
+        if isSorted:#在末尾追加的新行排在相等的值之后(降序时之前)
+            keys = self.sourceModel().columnArray(self._sortColumn)
+            try:
+                newRows = newRows[np.argsort(keys[newRows], kind = 'stable')]
+                if self._sortOrder == qtc.Qt.DescendingOrder:#降序为稳定升序的逆序，相等的值中源行号较大者在前
+                    newRows = newRows[::-1]
+                    positions = rows.shape[0] - np.searchsorted(keys[rows[::-1]], keys[newRows], side = 'right')
+                else:
+                    positions = np.searchsorted(keys[rows], keys[newRows], side = 'right')
+            except TypeError:#混合类型的对象列无法比较，重新排序
+                self.invalidate()
+                return
+        else:
+            positions = np.searchsorted(rows, newRows)
+        finalRows = np.insert(rows, positions, newRows)
+        ranges = QDataFrameModel.coalesceRanges(positions + np.arange(newRows.shape[0]))
+        if len(ranges) > self.maxInsertRanges:#新行过于分散时，逐段发出信号的开销远大于布局改变
+            self.layoutAboutToBeChanged.emit()
+            self.setMapping(finalRows, sourceCount)
+            self.updatePersistentIndexes(rows)
+            self.layoutChanged.emit()
+            return
+        self._rowCountOffset = -newRows.shape[0]
+        self.setMapping(finalRows, sourceCount)
+        for start, stop in ranges:#由前向后插入，各区间的行号即最终的行号
+            self.beginInsertRows(qtc.QModelIndex(), start, stop)
+            self._rowCountOffset += stop - start + 1
+            self.endInsertRows()
+
+    def appendMapping(self, newRows, sourceCount):
+        """
+        源模型在末尾追加行且未排序时，将其中显示的源行newRows追加至行映射末尾，并发出插入信号。
+        """
+        size = self._rows.shape[0]
+        total = size + newRows.shape[0]
+        if self._rowsBuffer.shape[0] < total:
+            buffer = np.empty(max(2 * total, 16), dtype = np.intp)
+            buffer[:size] = self._rows
+            self._rowsBuffer = buffer
+        if self._inverseBuffer.shape[0] < sourceCount:
+            buffer = np.empty(max(2 * sourceCount, 16), dtype = np.intp)
+            buffer[:self._inverse.shape[0]] = self._inverse
+            self._inverseBuffer = buffer
+        self._inverseBuffer[self._inverse.shape[0]:sourceCount] = -1
+        self._inverse = self._inverseBuffer[:sourceCount]
+        self._inverse[newRows] = np.arange(size, total, dtype = np.intp)
+        if total == size:
+            return
+        self.beginInsertRows(qtc.QModelIndex(), size, total - 1)
+        self._rowsBuffer[size:total] = newRows
+        self._rows = self._rowsBuffer[:total]
+        self.endInsertRows()
+
+    def setMapping(self, rows, sourceCount):
+        """
+        以源行号数组rows作为新的行映射，并生成反向映射。
+        """
+        self._rows = np.ascontiguousarray(rows, dtype = np.intp)
+        self._inverse = np.full(sourceCount, -1, dtype = np.intp)
+        self._inverse[self._rows] = np.arange(self._rows.shape[0], dtype = np.intp)
+        self._rowsBuffer = self._rows
+        self._inverseBuffer = self._inverse
+
+    def rowsPassingFilters(self, rows):
+        """
+        返回源行rows是否满足当前全部筛选条件的布尔掩码。
+        """
+        mask = np.ones(rows.shape[0], dtype = bool) if self._filterMask is None else self._filterMask[rows]
+        for column, (minimum, maximum) in self._rangeFilters.items():
+            values = self.sourceModel().columnArray(column)[rows]
+            if minimum is not None:
+                mask &= values >= minimum
+            if maximum is not None:
+                mask &= values <= maximum
+        return mask
+
+    def onSourceDataChanged(self, topLeft, bottomRight, roles = []):
+        """
+        源数据改变时，清除相关列的排序缓存，并将信号映射后转发。
+        """
+        for column in range(topLeft.column(), bottomRight.column() + 1):
+            self._orderCache.pop(column, None)
+        rows = self._inverse[topLeft.row():bottomRight.row() + 1]
+        rows = rows[rows >= 0]
+        if rows.shape[0] > 0:
+            self.dataChanged.emit(self.index(int(rows.min()), topLeft.column()), self.index(int(rows.max()), bottomRight.column()))
+
+    def columnOrder(self, column):
+        """
+        返回指定列的升序排列(源行号数组)，结果被缓存。
+        """
+        order = self._orderCache.get(column)
+        if order is None:
+            keys = self.sourceModel().columnArray(column)
+            try:
+                order = np.argsort(keys, kind = 'stable')
+            except TypeError:#混合类型的对象列按字符串排序
+                order = np.argsort(keys.astype(str), kind = 'stable')
+            self._orderCache[column] = order
+        return order
+
+    def filterMask(self):
+        """
+        返回当前所有筛选条件组合而成的布尔掩码(对应源行)。无筛选条件时返回None。
+        """
+        mask = None if self._filterMask is None else self._filterMask.copy()
+        for column, (minimum, maximum) in self._rangeFilters.items():
+            values = self.sourceModel().columnArray(column)
+            columnMask = np.ones(values.shape[0], dtype = bool)
+            if minimum is not None:
+                columnMask &= values >= minimum
+            if maximum is not None:
+                columnMask &= values <= maximum
+            mask = columnMask if mask is None else mask & columnMask
+        return mask
+
+    def updateMapping(self):
+        """
+        根据当前的筛选条件及排序方式重新生成行映射。
+        """
+        rowCount = self.sourceModel().rowCount() if self.sourceModel() is not None else 0
+        mask = self.filterMask() if rowCount > 0 else None
+        if rowCount > 0 and 0 <= self._sortColumn < self.sourceModel().columnCount():
+            rows = self.columnOrder(self._sortColumn)
+            if mask is not None:
+                rows = rows[mask[rows]]
+            if self._sortOrder == qtc.Qt.DescendingOrder:
+                rows = rows[::-1]
+        elif mask is not None:
+            rows = np.flatnonzero(mask)
+        else:
+            rows = np.arange(rowCount, dtype = np.intp)
+        self.setMapping(rows, rowCount)
+
+    def sort(self, column, order = qtc.Qt.AscendingOrder):
+        """
+        PyQt5数据模型排序时重写的函数。
+        column为-1时恢复源模型的原始顺序。
+        """
+        self.layoutAboutToBeChanged.emit()
+        oldRows = self._rows
+        self._sortColumn = column
+        self._sortOrder = order
+        self.updateMapping()
+        self.updatePersistentIndexes(oldRows)
+        self.layoutChanged.emit()
+
+    def updatePersistentIndexes(self, oldRows):
+        """
+        行映射改变后，更新视图持有的持久索引(如选区)。
+        """
+        oldIndexes = self.persistentIndexList()
+        newIndexes = []
+        for index in oldIndexes:
+            sourceRow = oldRows[index.row()] if 0 <= index.row() < oldRows.shape[0] else -1
+            row = self._inverse[sourceRow] if 0 <= sourceRow < self._inverse.shape[0] else -1
+            newIndexes.append(self.index(int(row), index.column()) if row >= 0 else qtc.QModelIndex())
+        self.changePersistentIndexList(oldIndexes, newIndexes)
+
+    def setRangeFilter(self, column, minimum = None, maximum = None):
+        """
+        设置某一列的数值范围筛选条件(含端点)，如里程范围或扭矩阈值。
+        minimum及maximum均为None时取消该列的筛选条件。
+        """
+        if minimum is None and maximum is None:
+            self._rangeFilters.pop(column, None)
+        else:
+            self._rangeFilters[column] = (minimum, maximum)
+        self.invalidateFilter()
+
+    def setFilterMask(self, mask):
+        """
+        设置任意的布尔掩码作为筛选条件，长度须与源模型行数一致。为None时取消。
+        """
+        if mask is not None:
+            mask = np.asarray(mask, dtype = bool)
+            if mask.shape[0] != self.sourceModel().rowCount():
+                raise SizeError(mask.shape[0])
+        self._filterMask = mask
+        self.invalidateFilter()
+
+    def clearFilters(self):
+        """
+        清除全部筛选条件。
+        """
+        self._rangeFilters.clear()
+        self._filterMask = None
+        self.invalidateFilter()
+
+    def invalidateFilter(self):
+        """
+        按新的筛选条件重新生成行映射。
+        """
+        self.beginResetModel()
+        self.updateMapping()
+        self.endResetModel()
+
+    def mapToSource(self, proxyIndex):
+        """
+        将代理模型索引映射为源模型索引。
+        """
+        if self.sourceModel() is None or not proxyIndex.isValid() or not 0 <= proxyIndex.row() < self._rows.shape[0]:
+            return qtc.QModelIndex()
+        return self.sourceModel().index(int(self._rows[proxyIndex.row()]), proxyIndex.column())
+
+    def mapFromSource(self, sourceIndex):
+        """
+        将源模型索引映射为代理模型索引。
+        """
+        if not sourceIndex.isValid() or not 0 <= sourceIndex.row() < self._inverse.shape[0]:
+            return qtc.QModelIndex()
+        row = self._inverse[sourceIndex.row()]
+        return self.createIndex(int(row), sourceIndex.column()) if row >= 0 else qtc.QModelIndex()
+
+    def sourceRows(self, rows):
+        """
+        将代理行号列表映射为源行号列表。
+        """
+        rows = np.asarray(list(rows), dtype = np.intp)
+        return self._rows[rows[(rows >= 0) & (rows < self._rows.shape[0])]].tolist()
+
+    def index(self, row, column, parent = qtc.QModelIndex()):
+        return self.createIndex(row, column)
+
+    def parent(self, index = None):
+        return qtc.QModelIndex()
+
+    def rowCount(self, parent = qtc.QModelIndex()):
+        return self._rows.shape[0] + self._rowCountOffset
+
+    def columnCount(self, parent = qtc.QModelIndex()):
+        return self.sourceModel().columnCount() if self.sourceModel() is not None else 0
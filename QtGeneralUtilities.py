@@ -3,6 +3,9 @@
 #本文件用于定义部分通用窗体及控件
 
 import sys
+import warnings
+import numpy as np
+import pandas as pd
 import PyQt5.QtCore as qtc
 import PyQt5.QtWidgets as qtw
 import PyQt5.QtGui as qtg
@@ -11,7 +14,7 @@ from qtconsole.rich_ipython_widget import RichIPythonWidget
 from qtconsole.inprocess import QtInProcessKernelManager
 from Ui_Console import Ui_ConsoleWidget
 
-__all__ = ['MyCustomPushButton', 'QConsoleWidget', 'ArgumentError', 'SizeError', 'MatrixSizeError', 'str2int', 'str2float', 'str2bool']
+__all__ = ['MyCustomPushButton', 'QConsoleWidget', 'ArgumentError', 'SizeError', 'MatrixSizeError', 'str2int', 'str2float', 'str2bool', 'str2str', 'str2datetime', 'converterForDtype', 'convertArray']
 
 class MyCustomPushButton(qtw.QPushButton):
     """
@@ -148,7 +151,7 @@ def str2int(str):
     try:
         ret = int(str)
         ok = True
-    except ValueError:
+    except (ValueError, TypeError, OverflowError):
         ret = str
         ok = False
     return ret, ok
@@ -160,7 +163,7 @@ def str2float(str):
     try:
         ret = float(str)
         ok = True
-    except ValueError:
+    except (ValueError, TypeError):
         ret = str
         ok = False
     return ret, ok
@@ -182,4 +185,90 @@ def str2bool(str):
         ret = str
         ok = False
     return ret, ok
-    
+
+def str2str(str):
+    """
+    字符串原样返回，用于字符串及对象类型的数据。
+    """
+    return str, True
+
+def str2datetime(str):
+    """
+    字符串转化为时间(numpy.datetime64)，附带校验。
+    """
+    try:
+        ret = pd.Timestamp(str).to_datetime64()
+        ok = not np.isnat(ret)
+    except (ValueError, TypeError):
+        ret = str
+        ok = False
+    return ret, ok
+
+def converterForDtype(dtype):
+    """
+    返回与数据类型dtype对应的转换函数(str2int、str2float等)。
+    转换函数接受一个值，返回(转换结果, 是否成功)元组。
+    整型只接受该类型取值范围内的整数；分类(categorical)类型只接受已有的类别。
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = set(dtype.categories)
+        return lambda value: (value, value in categories)
+    kind = getattr(dtype, 'kind', 'O')
+    if kind == 'b':
+        return str2bool
+    elif kind in 'iu':
+        bounds = np.iinfo(getattr(dtype, 'numpy_dtype', dtype))
+        def convert(value):
+            ret, ok = str2int(value)
+            if ok and not bounds.min <= ret <= bounds.max:#超出整型列的取值范围
+                return value, False
+            return ret, ok
+        return convert
+    elif kind == 'f':
+        return str2float
+    elif kind == 'M':
+        return str2datetime
+    return str2str
+
+def convertArray(values, dtype):
+    """
+    以向量化方式将一组值(一般为字符串)转化为数据类型dtype。
+    转换规则与converterForDtype()返回的转换函数一致，超出整型取值范围的值视为转换失败。
+    返回(转换结果数组, 布尔掩码)元组，掩码为False的元素转换失败，其在结果数组中的值无意义。
+    浮点类型的结果数组为float64，由写入方转换为目标类型，以便判断目标类型能否无损地容纳这些值。
+    """
+    values = np.asarray(values, dtype = object)
+    if isinstance(dtype, pd.CategoricalDtype):
+        return values, pd.Series(values).isin(dtype.categories).to_numpy()
+    kind = getattr(dtype, 'kind', 'O')
+    if kind == 'b':
+        texts = values.astype(str)
+        trues = (texts == 'True') | (values == 1)
+        falses = (texts == 'False') | (values == 0)
+        return trues, trues | falses
+    elif kind in 'iu':
+        numpyDtype = np.dtype(getattr(dtype, 'numpy_dtype', dtype))#可空整型(如Int64)以对应的Numpy类型转换
+        bounds = np.iinfo(numpyDtype)
+        isText = np.array([isinstance(value, str) for value in values], dtype = bool)
+        ok = isText & pd.Series(values.astype(str)).str.fullmatch(r'\s*[+-]?\d+\s*').to_numpy(dtype = bool)
+        parsed = np.array([int(value) for value in values[ok]], dtype = object)#以Python整数解析，避免超出int64时溢出
+        inRange = np.array([bounds.min <= value <= bounds.max for value in parsed], dtype = bool)
+        ok[np.flatnonzero(ok)[~inRange]] = False
+        numbers = pd.to_numeric(pd.Series(np.where(isText, np.nan, values)), errors = 'coerce').to_numpy(dtype = np.float64)
+        isNumber = ~isText & np.isfinite(numbers)#与int()一致，非字符串的数值直接截断取整
+        numbers = np.trunc(numbers)
+        isNumber &= (numbers >= bounds.min) & (numbers <= bounds.max)
+        result = np.zeros(values.shape[0], dtype = numpyDtype)
+        result[ok] = parsed[inRange].astype(np.int64) if bounds.max <= np.iinfo(np.int64).max else parsed[inRange].astype(np.uint64)
+        result[isNumber] = numbers[isNumber]
+        return result, ok | isNumber
+    elif kind == 'f':
+        numbers = pd.to_numeric(pd.Series(values), errors = 'coerce').to_numpy(dtype = np.float64)
+        ok = ~np.isnan(numbers) | (np.char.lower(np.char.strip(values.astype(str))) == 'nan')
+        return numbers, ok
+    elif kind == 'M':
+        with warnings.catch_warnings():#逐个解析格式不一致的时间字符串时会发出警告
+            warnings.simplefilter('ignore')
+            times = pd.to_datetime(pd.Series(values), errors = 'coerce')
+        return times.to_numpy().astype(dtype), times.notna().to_numpy()
+    return values, np.ones(values.shape[0], dtype = bool)
@@ -0,0 +1,361 @@
+# -*- coding:utf-8 -*-
+
+#本文件用于定义在后台线程中执行耗时任务的工作对象
+
+import os
+import PyQt5.QtCore as qtc
+import PyQt5.QtGui as qtg
+import numpy as np
+import pandas as pd
+
+from QtGeneralUtilities import ArgumentError
+from DataFileUtilities import ChunkedDataWriter, optimizeDtypes, readDataFiles, predicateColumns, projectDataFrame
+
+__all__ = ['QDataFileLoader', 'QMultiFileLoader', 'QDataExporter', 'QFigureRenderer']
+
+class QDataFileLoader(qtc.QThread):
+    """
+    监测数据文件的后台读取线程。
+    文件被分块解析，每块解析完成后即通过chunkLoaded信号发出，并报告读取进度；可随时调用cancel()取消。
+    数据块的行数从firstChunkRows开始逐块加倍，直至maxChunkRows，使接收方逐块拼接的总开销与数据量成正比。
+    给定DataFileCache对象时，命中缓存的文件整体作为一个数据块发出；未命中的文件读取完成后写入缓存。缓存中保存的是未压缩数据类型的解析结果。
+    optimize为True时逐块(命中缓存时整体)压缩各列的数据类型(见optimizeDtypes)，读取完成后以dtypesOptimized信号发出整个文件的报告。
+    各数据块的取值不同，分块读取时不将字符串列转为分类类型，以免拼接后退化为object类型。
+    给定columns或predicate时，只解析所需的列，并逐块筛选行，内存中只保留筛选结果(见readDataFile)；此时读取结果不写入缓存。
+    """
+    chunkLoaded = qtc.pyqtSignal(object)#数据块(DataFrame对象)解析完成的信号
+    progressChanged = qtc.pyqtSignal(int)#读取进度(百分比)改变的信号
+    loadFinished = qtc.pyqtSignal()#全部读取完成的信号
+    loadCanceled = qtc.pyqtSignal()#读取被取消的信号
+    loadFailed = qtc.pyqtSignal(str)#读取出错的信号，参数为错误信息
+    dtypesOptimized = qtc.pyqtSignal(object)#数据类型压缩报告的信号
+
+    def __init__(self, filename, filetype, parent = None, firstChunkRows = 10000, maxChunkRows = 1 << 20, cache = None, optimize = False, columns = None, predicate = None):
+        """
+        构造器。
+        必要参数：
+            1. filename            文件路径。
+            2. filetype            文件类型，'CSV'或'XLS'。
+        可选参数：
+            1. parent              父对象。
+            2. firstChunkRows      第一个数据块的行数，默认为10000。
+            3. maxChunkRows        数据块的最大行数，默认为1048576。
+            4. cache               DataFileCache对象，默认为None，即不使用缓存。
+            5. optimize            是否压缩各列的数据类型，默认为False。
+            6. columns             需要读取的列名列表，默认为None，即全部列。
+            7. predicate           行筛选条件(如RangePredicate或其列表)，默认为None，即全部行。
+        """
+        super(QDataFileLoader, self).__init__(parent)
+        if filetype not in ('CSV', 'XLS'):
+            raise ArgumentError(filetype)
+        self.filename = filename
+        self.filetype = filetype
+        self.firstChunkRows = firstChunkRows
+        self.maxChunkRows = maxChunkRows
+        self.cache = cache
+        self.optimize = optimize
+        self.columns = columns
+        self.predicate = predicate
+        self._report = None
+
+    def cancel(self):
+        """
+        请求取消读取。当前数据块解析完成后即停止。
+        """
+        self.requestInterruption()
+
+    def run(self):
+        """
+        线程主函数。
+        """
+        try:
+            dataFrame = None if self.cache is None else self.cache.load(self.filename)
+            if dataFrame is not None:
+                self.chunkLoaded.emit(self.optimizeChunk(self.projectChunk(dataFrame), categoryRatio = 0.5))
+            else:
+                chunks = self.loadCsv() if self.filetype == 'CSV' else self.loadExcel()
+                if self.cache is not None and chunks and not self.isPartial() and not self.isInterruptionRequested():
+                    self.cache.store(self.filename, pd.concat(chunks, ignore_index = True))
+            if self._report is not None and not self.isInterruptionRequested():
+                self.dtypesOptimized.emit(self._report)
+        except Exception as e:
+            self.loadFailed.emit(str(e))
+            return
+        if self.isInterruptionRequested():
+            self.loadCanceled.emit()
+        else:
+            self.progressChanged.emit(100)
+            self.loadFinished.emit()
+
+    def loadCsv(self):
+        """
+        分块读取CSV文件，进度按已读取的字节数计算。返回已读取的数据块(压缩数据类型前)列表。
+        """
+        chunks = []
+        size = max(os.path.getsize(self.filename), 1)
+        chunkRows = self.firstChunkRows
+        with open(self.filename, 'rb') as f:
+            reader = pd.read_csv(f, header = 'infer', iterator = True, usecols = self.usecols())
+            try:
+                while not self.isInterruptionRequested():
+                    try:
+                        chunk = reader.get_chunk(chunkRows)
+                    except StopIteration:
+                        break
+                    chunk = self.projectChunk(chunk)
+                    chunks.append(chunk)
+                    self.chunkLoaded.emit(self.optimizeChunk(chunk))
+                    self.progressChanged.emit(min(int(100 * f.tell() / size), 99))
+                    chunkRows = min(chunkRows * 2, self.maxChunkRows)
+            finally:
+                reader.close()
+        return chunks
+
+    def loadExcel(self):
+        """
+        读取Excel文件。Excel文件无法分块解析，整体读取后作为一个数据块发出。返回已读取的数据块(压缩数据类型前)列表。
+        """
+        dataFrame = pd.read_excel(self.filename, header = 0, usecols = self.usecols())
+        if self.isInterruptionRequested():
+            return []
+        dataFrame = self.projectChunk(dataFrame)
+        self.chunkLoaded.emit(self.optimizeChunk(dataFrame, categoryRatio = 0.5))
+        return [dataFrame]
+
+    def isPartial(self):
+        """
+        返回是否只读取部分列或部分行。
+        """
+        return self.columns is not None or self.predicate is not None
+
+    def usecols(self):
+        """
+        返回解析时需要读取的列(所需的列及筛选条件涉及的列)，None表示全部列。
+        """
+        return None if self.columns is None else list(dict.fromkeys(list(self.columns) + predicateColumns(self.predicate)))
+
+    def projectChunk(self, chunk):
+        """
+        按筛选条件及所需的列处理数据块。
+        """
+        return projectDataFrame(chunk, self.columns, self.predicate) if self.isPartial() else chunk
+
+    def optimizeChunk(self, chunk, categoryRatio = None):
+        """
+        optimize为True时压缩数据块各列的数据类型，并累计报告。
+        """
+        if not self.optimize:
+            return chunk
+        chunk, report = optimizeDtypes(chunk, categoryRatio = categoryRatio)
+        if self._report is None:
+            self._report = report
+        else:
+            self._report[['bytesBefore', 'bytesAfter']] += report[['bytesBefore', 'bytesAfter']].to_numpy()
+        return chunk
+
+class QMultiFileLoader(qtc.QThread):
+    """
+    多个数据文件的后台合并读取线程。
+    各文件在进程池中并行解析(见readDataFiles)，按列名对齐并排序后作为一个数据块发出。信号与QDataFileLoader一致，进度按已完成的文件数计算。
+    """
+    chunkLoaded = qtc.pyqtSignal(object)#合并后的数据(DataFrame对象)的信号
+    progressChanged = qtc.pyqtSignal(int)#读取进度(百分比)改变的信号
+    loadFinished = qtc.pyqtSignal()#全部读取完成的信号
+    loadCanceled = qtc.pyqtSignal()#读取被取消的信号
+    loadFailed = qtc.pyqtSignal(str)#读取出错的信号，参数为错误信息
+    dtypesOptimized = qtc.pyqtSignal(object)#数据类型压缩报告的信号
+
+    def __init__(self, paths, parent = None, sortBy = None, cache = None, optimize = False, processes = None, columns = None, predicate = None):
+        """
+        构造器。
+        必要参数：
+            1. paths               文件路径、目录或通配符模式(或其列表)。
+        可选参数：
+            1. parent              父对象。
+            2. sortBy              合并后排序所依据的列名，默认为None，即按第一个时间列排序。
+            3. cache               DataFileCache对象，默认为None，即不使用缓存。
+            4. optimize            是否压缩合并结果各列的数据类型，默认为False。
+            5. processes           进程数，默认为CPU核数。
+            6. columns             需要读取的列名列表，默认为None，即全部列。
+            7. predicate           行筛选条件(见readDataFile)，须可被pickle，默认为None，即全部行。
+        """
+        super(QMultiFileLoader, self).__init__(parent)
+        self.paths = paths
+        self.sortBy = sortBy
+        self.cache = cache
+        self.optimize = optimize
+        self.processes = processes
+        self.columns = columns
+        self.predicate = predicate
+
+    def cancel(self):
+        """
+        请求取消读取。正在解析的文件完成后即停止。
+        """
+        self.requestInterruption()
+
+    def run(self):
+        """
+        线程主函数。
+        """
+        report = []
+        def transform(dataFrame):
+            dataFrame, dtypeReport = optimizeDtypes(dataFrame)
+            report.append(dtypeReport)
+            return dataFrame
+        try:
+            dataFrame = readDataFiles(self.paths, self.sortBy, self.cache, transform if self.optimize else None, self.processes,
+                                      lambda done, total: self.progressChanged.emit(min(int(100 * done / total), 99)), self.isInterruptionRequested,
+                                      self.columns, self.predicate)
+        except Exception as e:
+            self.loadFailed.emit(str(e))
+            return
+        if dataFrame is None or self.isInterruptionRequested():
+            self.loadCanceled.emit()
+            return
+        self.chunkLoaded.emit(dataFrame)
+        if report:
+            self.dtypesOptimized.emit(report[0])
+        self.progressChanged.emit(100)
+        self.loadFinished.emit()
+
+class QDataExporter(qtc.QThread):
+    """
+    数据的后台导出线程。
+    从行数据源(DataFrameRowSource、CsvRowSource等)中逐块读取数据，并以ChunkedDataWriter逐块写入文件，内存占用与数据总量无关。
+    取消或出错时删除未完成的文件。
+    """
+    progressChanged = qtc.pyqtSignal(int)#导出进度(百分比)改变的信号
+    exportFinished = qtc.pyqtSignal()#导出完成的信号
+    exportCanceled = qtc.pyqtSignal()#导出被取消的信号
+    exportFailed = qtc.pyqtSignal(str)#导出出错的信号，参数为错误信息
+
+    def __init__(self, source, filename, filetype, parent = None):
+        """
+        构造器。
+        必要参数：
+            1. source              行数据源，需提供columns、chunkRows、rowCount()及readChunk()。
+            2. filename            文件路径。
+            3. filetype            文件类型，'CSV'、'XLSX'或'PARQUET'。
+        可选参数：
+            1. parent              父对象。
+        """
+        super(QDataExporter, self).__init__(parent)
+        if filetype not in ChunkedDataWriter.filetypes:
+            raise ArgumentError(filetype)
+        self.source = source
+        self.filename = filename
+        self.filetype = filetype
+
+    def cancel(self):
+        """
+        请求取消导出。当前数据块写入完成后即停止。
+        """
+        self.requestInterruption()
+
+    def run(self):
+        """
+        线程主函数。
+        """
+        try:
+            writer = ChunkedDataWriter(self.filename, self.filetype, self.source.columns)
+        except Exception as e:
+            self.exportFailed.emit(str(e))
+            return
+        try:
+            rowCount = self.source.rowCount()
+            chunkIndex = 0
+            while chunkIndex * self.source.chunkRows < rowCount and not self.isInterruptionRequested():
+                writer.write(self.source.readChunk(chunkIndex))
+                chunkIndex += 1
+                self.progressChanged.emit(min(int(100 * chunkIndex * self.source.chunkRows / rowCount), 99))
+        except Exception as e:
+            writer.abort()
+            self.exportFailed.emit(str(e))
+            return
+        if self.isInterruptionRequested():
+            writer.abort()
+            self.exportCanceled.emit()
+        else:
+            writer.close()
+            self.progressChanged.emit(100)
+            self.exportFinished.emit()
+
+class QFigureRenderer(qtc.QThread):
+    """
+    Matplotlib图形的后台渲染线程。
+    每次渲染请求给出一个绘图函数及其参数(即要显示的数据)，线程新建一个只属于自己的Figure对象，调用绘图函数后以Agg渲染器渲染，
+    并以figureRendered信号发出引用渲染结果缓冲区的QImage对象(不复制像素数据)。
+    尚未开始渲染的请求会被新的请求替换，因此连续的重绘请求只渲染最新的一次。
+    绘图函数在本线程中执行，只能操作传入的Figure对象，不能访问界面对象或pyplot。
+    """
+    figureRendered = qtc.pyqtSignal(object, object)#渲染完成的信号，参数为(QImage对象, 像素数据缓冲区)，须保持缓冲区的引用直至QImage不再使用
+    renderFailed = qtc.pyqtSignal(str)#渲染出错的信号，参数为错误信息
+
+    def __init__(self, parent = None):
+        """
+        构造器。
+        可选参数：
+            1. parent              父对象。
+        """
+        super(QFigureRenderer, self).__init__(parent)
+        self._mutex = qtc.QMutex()
+        self._condition = qtc.QWaitCondition()
+        self._pending = None#尚未开始渲染的请求
+
+    def request(self, drawFunction, width, height, args = (), kwargs = None, dpi = 100):
+        """
+        请求渲染。替换尚未开始渲染的请求。
+        必要参数：
+            1. drawFunction        绘图函数，以drawFunction(figure, *args, **kwargs)的形式调用。
+            2. width               图像宽度(像素)。
+            3. height              图像高度(像素)。
+        可选参数：
+            1. args                绘图函数的位置参数，默认为空。
+            2. kwargs              绘图函数的关键字参数，默认为空。
+            3. dpi                 分辨率，默认为100。
+        """
+        if width < 1 or height < 1 or dpi <= 0:
+            raise ArgumentError((width, height, dpi))
+        self._mutex.lock()
+        self._pending = (drawFunction, int(width), int(height), dpi, tuple(args), dict(kwargs or {}))
+        self._condition.wakeOne()
+        self._mutex.unlock()
+
+    def stop(self):
+        """
+        停止线程。正在进行的渲染完成后即退出，并等待线程结束。
+        """
+        self._mutex.lock()
+        self.requestInterruption()
+        self._pending = None
+        self._condition.wakeOne()
+        self._mutex.unlock()
+        self.wait()
+
+    def run(self):
+        """
+        线程主函数。
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        while True:
+            self._mutex.lock()
+            while self._pending is None and not self.isInterruptionRequested():
+                self._condition.wait(self._mutex)
+            pending, self._pending = self._pending, None
+            self._mutex.unlock()
+            if self.isInterruptionRequested():
+                return
+            drawFunction, width, height, dpi, args, kwargs = pending
+            try:
+                figure = Figure(figsize = (width / dpi, height / dpi), dpi = dpi)
+                canvas = FigureCanvasAgg(figure)#每次渲染使用新的画布及缓冲区，已发出的图像不会被之后的渲染覆盖
+                drawFunction(figure, *args, **kwargs)
+                canvas.draw()
+                buffer = np.asarray(canvas.buffer_rgba())
+                image = qtg.QImage(buffer.data, buffer.shape[1], buffer.shape[0], buffer.strides[0], qtg.QImage.Format_RGBA8888)
+            except Exception as e:
+                self.renderFailed.emit(str(e))
+                continue
+            self.figureRendered.emit(image, buffer)
@@ -0,0 +1,258 @@
+# -*- coding:utf-8 -*-
+
+#本文件用于定义时间序列的降采样等绘图用信号处理工具
+
+import os
+import struct
+import numpy as np
+
+from QtGeneralUtilities import ArgumentError, SizeError
+
+__all__ = ['MinMaxPyramid', 'minMaxDecimate', 'lttbDecimate', 'decimate', 'visibleSlice']
+
+def visibleSlice(x, lower, upper):
+    """
+    返回单调不减的x中位于[lower, upper]范围内的采样点的切片，两端各多保留一个点，使曲线延伸至坐标轴边缘。
+    """
+    start = max(int(np.searchsorted(x, lower, side = 'left')) - 1, 0)
+    stop = min(int(np.searchsorted(x, upper, side = 'right')) + 1, x.shape[0])
+    return slice(start, stop)
+
+def minMaxDecimate(x, y, bins):
+    """
+    最值包络降采样。
+    将x的范围等分为bins个区间，每个区间保留y的最小值与最大值(各区间输出两个点，忽略NaN)，保证任何尖峰都不会丢失。
+    必要参数：
+        1. x                   单调不减的横坐标数组(数值)。
+        2. y                   纵坐标数组。
+        3. bins                区间数，一般为坐标轴的像素宽度。
+    返回(横坐标数组, 纵坐标数组)元组，点数不超过2 * bins。
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype = np.float64)
+    if x.shape[0] != y.shape[0]:
+        raise SizeError(y.shape[0])
+    if bins < 1:
+        raise ArgumentError(bins)
+    if x.shape[0] <= 2 * bins:
+        return x, y
+    edges = np.linspace(x[0], x[-1], bins + 1)
+    starts = np.unique(np.searchsorted(x, edges[:-1], side = 'left'))#去除空区间
+    stops = np.append(starts[1:], x.shape[0])
+    with np.errstate(invalid = 'ignore'):
+        minima = np.fmin.reduceat(y, starts)
+        maxima = np.fmax.reduceat(y, starts)
+    xs = np.empty(2 * starts.shape[0], dtype = x.dtype)
+    ys = np.empty(2 * starts.shape[0], dtype = np.float64)
+    xs[0::2] = x[starts]
+    xs[1::2] = x[stops - 1]
+    ys[0::2] = minima
+    ys[1::2] = maxima
+    return xs, ys
+
+def lttbDecimate(x, y, threshold):
+    """
+    最大三角形三桶(Largest-Triangle-Three-Buckets, LTTB)降采样。
+    保留首末两点，其余采样点等分为threshold - 2个桶，每个桶保留与前一个已选点及下一个桶的平均点构成的三角形面积最大的点。
+    与最值包络相比，输出的是原始采样点，曲线形状更自然，但可能丢失个别尖峰。
+    必要参数：
+        1. x                   单调不减的横坐标数组(数值)。
+        2. y                   纵坐标数组。
+        3. threshold           输出的点数，不小于3。
+    返回(横坐标数组, 纵坐标数组)元组。
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype = np.float64)
+    if x.shape[0] != y.shape[0]:
+        raise SizeError(y.shape[0])
+    if threshold < 3:
+        raise ArgumentError(threshold)
+    n = x.shape[0]
+    if n <= threshold:
+        return x, y
+    xf = x.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)#中间各桶的边界
+    selected = np.empty(threshold, dtype = np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        nextStart, nextStop = edges[bucket + 1], edges[bucket + 2] if bucket + 2 < edges.shape[0] else n
+        nextStop = max(nextStop, nextStart + 1)
+        meanX = xf[nextStart:nextStop].mean()
+        meanY = np.nanmean(y[nextStart:nextStop]) if nextStop > nextStart else y[-1]
+        areas = np.abs((xf[previous] - meanX) * (y[start:stop] - y[previous]) - (xf[previous] - xf[start:stop]) * (meanY - y[previous]))
+        previous = start + (int(np.nanargmax(areas)) if not np.all(np.isnan(areas)) else 0)
+        selected[bucket + 1] = previous
+    return x[selected], y[selected]
+
+def decimate(x, y, bins, method = 'minmax'):
+    """
+    按指定方法降采样。
+    必要参数：
+        1. x                   单调不减的横坐标数组(数值)。
+        2. y                   纵坐标数组。
+        3. bins                目标分辨率，一般为坐标轴的像素宽度。
+    可选参数：
+        1. method              降采样方法，'minmax'(最值包络，输出不超过2 * bins个点)或'lttb'(输出bins个点)，默认为'minmax'。
+    """
+    if method == 'minmax':
+        return minMaxDecimate(x, y, bins)
+    elif method == 'lttb':
+        return lttbDecimate(x, y, max(bins, 3))
+    raise ArgumentError(method)
+
+class MinMaxPyramid(object):
+    """
+    等间隔采样序列(如振动加速度记录)的多分辨率最值金字塔。
+    第k层(k = 1, 2, ...)保存每2^k个连续采样点的(最小值, 最大值)，最高层的块数不超过minBlocks。
+    金字塔保存在单独的文件中并以np.memmap映射，文件头格式(小端序)：
+        magic(4字节, b'ABPY')  version(uint16)  层数(uint16)  数值类型(8字节)  采样点数(int64)  数据源标识长度(uint32)  数据源标识
+    其后为各层的数据(与数据源的数值类型相同)，各层数据起始于64字节对齐处。
+    查询时选取块数介于目标分辨率的1至2倍之间的层，因此任意缩放程度下返回的点数都只与分辨率有关，与数据长度无关。
+    """
+    magic = b'ABPY'
+    version = 1
+    headerFormat = struct.Struct('<4sHH8sqI')
+    alignment = 64
+
+    def __init__(self, filename, values = None):
+        """
+        构造器。打开已有的金字塔文件。
+        必要参数：
+            1. filename            金字塔文件路径。
+        可选参数：
+            1. values              数据源(一维数组)，默认为None。查询最精细的分辨率时直接返回数据源中的采样点，未给定时以第1层代替。
+        """
+        self.filename = filename
+        self.values = values
+        with open(filename, 'rb') as f:
+            header = f.read(self.headerFormat.size)
+            if len(header) < self.headerFormat.size:
+                raise ArgumentError(filename)
+            magic, version, levels, dtype, sampleCount, keyLength = self.headerFormat.unpack(header)
+            if magic != self.magic or version != self.version:
+                raise ArgumentError(filename)
+            self.sourceKey = f.read(keyLength).decode('utf-8')
+        self.dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+        self.sampleCount = sampleCount
+        counts = self.levelCounts(sampleCount, levels)
+        dataOffset = self.dataOffset(keyLength)
+        self.levels = []
+        if sum(counts) > 0:
+            data = np.memmap(filename, dtype = self.dtype, mode = 'r', offset = dataOffset, shape = (2 * sum(counts),))
+            position = 0
+            for count in counts:
+                self.levels.append(data[position:position + 2 * count].reshape(count, 2))
+                position += 2 * count
+
+    @staticmethod
+    def levelCounts(sampleCount, levels):
+        """
+        返回各层的块数。
+        """
+        return [-(-sampleCount >> level) for level in range(1, levels + 1)]
+
+    @classmethod
+    def dataOffset(cls, keyLength):
+        return -(-(cls.headerFormat.size + keyLength) // cls.alignment) * cls.alignment
+
+    @classmethod
+    def build(cls, values, filename, sourceKey = '', minBlocks = 1024, chunkSize = 1 << 22):
+        """
+        由数据源逐块计算金字塔并写入文件，返回MinMaxPyramid对象。内存占用只与chunkSize有关，可用于内存映射的超长记录。
+        必要参数：
+            1. values              数据源(一维数组，可为内存映射的跨步视图)。
+            2. filename            金字塔文件路径。
+        可选参数：
+            1. sourceKey           数据源标识(如文件路径、修改时间及大小)，用于判断金字塔是否过期，默认为空。
+            2. minBlocks           最高层的最大块数，默认为1024。
+            3. chunkSize           每次处理的采样点数，默认为4194304。
+        """
+        if values.ndim != 1:
+            raise SizeError(values.shape)
+        sampleCount = values.shape[0]
+        levels = 0
+        while (sampleCount >> levels) > minBlocks:
+            levels += 1
+        levels = max(levels, 1 if sampleCount > 1 else 0)
+        counts = cls.levelCounts(sampleCount, levels)
+        key = sourceKey.encode('utf-8')
+        dataOffset = cls.dataOffset(len(key))
+        dtype = values.dtype.newbyteorder('<') if values.dtype.byteorder == '>' else values.dtype
+        with open(filename + '.tmp', 'wb') as f:
+            f.write(cls.headerFormat.pack(cls.magic, cls.version, levels, dtype.str.encode('ascii'), sampleCount, len(key)) + key)
+            f.truncate(dataOffset + 2 * sum(counts) * dtype.itemsize)
+        if sum(counts) > 0:
+            data = np.memmap(filename + '.tmp', dtype = dtype, mode = 'r+', offset = dataOffset, shape = (2 * sum(counts),))
+            chunkSize = max(chunkSize & ~1, 2)#每次处理偶数个元素，使各块恰好完整
+            source = values
+            position = 0
+            for level, count in enumerate(counts):
+                target = data[position:position + 2 * count].reshape(count, 2)
+                for start in range(0, source.shape[0], chunkSize):
+                    block = np.asarray(source[start:start + chunkSize])
+                    if level == 0:#第1层由采样点计算
+                        lows = highs = block
+                    else:
+                        lows, highs = block[:, 0], block[:, 1]
+                    if lows.shape[0] % 2:#末尾不足一块时以最后一个值补齐
+                        lows = np.append(lows, lows[-1:])
+                        highs = np.append(highs, highs[-1:])
+                    target[start // 2:start // 2 + lows.shape[0] // 2, 0] = np.fmin(lows[0::2], lows[1::2])
+                    target[start // 2:start // 2 + highs.shape[0] // 2, 1] = np.fmax(highs[0::2], highs[1::2])
+                source = target
+                position += 2 * count
+            data.flush()
+            del data, source, target
+        os.replace(filename + '.tmp', filename)
+        return cls(filename, values)
+
+    @classmethod
+    def forArray(cls, values, filename, sourceKey = '', **kwargs):
+        """
+        打开数据源对应的金字塔文件；文件不存在或已过期(采样点数、数值类型或数据源标识不一致)时重新计算。
+        参数同build()。
+        """
+        try:
+            pyramid = cls(filename, values)
+        except (OSError, ArgumentError, ValueError):
+            pyramid = None
+        if pyramid is None or pyramid.sampleCount != values.shape[0] or pyramid.dtype != values.dtype or pyramid.sourceKey != sourceKey:
+            pyramid = None#释放内存映射后再覆盖文件
+            pyramid = cls.build(values, filename, sourceKey, **kwargs)
+        return pyramid
+
+    def extrema(self):
+        """
+        返回全部数据的(最小值, 最大值)元组，无数据时返回None。
+        """
+        if self.levels:
+            top = self.levels[-1]
+            return np.nanmin(top[:, 0]), np.nanmax(top[:, 1])
+        if self.values is not None and self.values.shape[0] > 0:
+            return np.nanmin(self.values), np.nanmax(self.values)
+        return None
+
+    def query(self, start, stop, bins):
+        """
+        返回[start, stop)区间内按分辨率bins降采样的最值包络，即(采样点序号数组, 数值数组)元组。
+        选取每块不超过区间长度 / bins个采样点的最粗的层，返回的点数不超过4 * bins + 4；区间足够短时返回原始采样点。
+        """
+        start = min(max(int(start), 0), self.sampleCount)
+        stop = min(max(int(stop), start), self.sampleCount)
+        span = stop - start
+        level = min(max(span // max(int(bins), 1), 1).bit_length() - 1, len(self.levels))
+        if level == 0 and self.values is not None:
+            return np.arange(start, stop), np.asarray(self.values[start:stop])
+        level = max(level, 1)
+        if level > len(self.levels):
+            return np.empty(0, dtype = np.int64), np.empty(0, dtype = self.dtype)
+        blockSize = 1 << level
+        first, last = start >> level, -(-stop >> level)
+        blocks = np.asarray(self.levels[level - 1][first:last])
+        indices = np.empty(2 * blocks.shape[0], dtype = np.int64)
+        indices[0::2] = np.arange(first, last) * blockSize
+        indices[1::2] = np.minimum(indices[0::2] + blockSize - 1, self.sampleCount - 1)
+        return indices, blocks.ravel()
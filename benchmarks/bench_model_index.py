@@ -0,0 +1,101 @@
+# -*- coding:utf-8 -*-
+
+#数据模型索引及data()调用开销的微基准测试
+#模拟视图重绘时对100k个单元格依次创建索引并查询各角色数据的过程，对比旧实现(以单元格数值作为索引内部指针)与现实现的耗时。
+#用法：python benchmarks/bench_model_index.py [行数] [列数]
+
+import os, sys, time
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import PyQt5.QtCore as qtc
+
+from QtDataModels import QNumpyArray2Model, QDataFrameModel
+
+#视图绘制单元格时查询的角色
+PAINT_ROLES = (qtc.Qt.DisplayRole, qtc.Qt.TextAlignmentRole, qtc.Qt.FontRole, qtc.Qt.ForegroundRole,
+               qtc.Qt.BackgroundRole, qtc.Qt.DecorationRole, qtc.Qt.CheckStateRole, qtc.Qt.ToolTipRole)
+
+class LegacyNumpyArray2Model(QNumpyArray2Model):
+    """
+    复现旧实现的index()及data()。
+    """
+    def index(self, row, column, parent=qtc.QModelIndex()):
+        return self.createIndex(row, column, self.npArray[row, column])
+
+    def data(self, index, role=qtc.Qt.DisplayRole):
+        if not index.isValid() or \
+           not 0 <= index.row() < self.npArray.shape[0] or \
+           not 0 <= index.column() < self.npArray.shape[1]:
+            return qtc.QVariant()
+        if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
+            if self._displayDecimal == None:
+                return str(self.npArray[index.row(), index.column()])
+            else:
+                return str(round(self.npArray[index.row(), index.column()], self._displayDecimal))
+        elif role == qtc.Qt.TextAlignmentRole:
+            return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter
+        else:
+            return qtc.QVariant()
+
+class LegacyDataFrameModel(QDataFrameModel):
+    """
+    复现旧实现的index()及data()。
+    """
+    def index(self, row, column, parent=qtc.QModelIndex()):
+        return self.createIndex(row, column, self.dataFrame.iat[row, column])
+
+    def data(self, index, role=qtc.Qt.DisplayRole):
+        if not index.isValid() or \
+           not 0 <= index.row() < self.dataFrame.shape[0] or \
+           not 0 <= index.column() < self.dataFrame.shape[1]:
+            return qtc.QVariant()
+        if role == qtc.Qt.DisplayRole or role == qtc.Qt.EditRole:
+            try:
+                return str(round(self.dataFrame.iat[index.row(), index.column()], self._displayDecimal))
+            except TypeError:
+                return str(self.dataFrame.iat[index.row(), index.column()])
+        elif role == qtc.Qt.TextAlignmentRole:
+            return qtc.Qt.AlignHCenter | qtc.Qt.AlignVCenter
+        else:
+            return qtc.QVariant()
+
+def sweepIndex(model, rows, columns):
+    """
+    依次创建全部单元格的索引，返回耗时(秒)。
+    """
+    start = time.perf_counter()
+    for i in range(rows):
+        for j in range(columns):
+            model.index(i, j)
+    return time.perf_counter() - start
+
+def sweepPaint(model, rows, columns):
+    """
+    依次创建全部单元格的索引并查询PAINT_ROLES中的各角色，返回耗时(秒)。
+    """
+    start = time.perf_counter()
+    for i in range(rows):
+        for j in range(columns):
+            index = model.index(i, j)
+            for role in PAINT_ROLES:
+                model.data(index, role)
+    return time.perf_counter() - start
+
+def main(rows = 2000, columns = 50):
+    array = np.random.rand(rows, columns)
+    dataFrame = pd.DataFrame(array)
+    cases = [('QNumpyArray2Model', LegacyNumpyArray2Model(array), QNumpyArray2Model(array)),
+             ('QDataFrameModel', LegacyDataFrameModel(dataFrame), QDataFrameModel(dataFrame))]
+    print('viewport sweep: {0} x {1} = {2} cells, {3} roles per cell'.format(rows, columns, rows * columns, len(PAINT_ROLES)))
+    for name, legacy, current in cases:
+        for label, sweep in (('index', sweepIndex), ('index+data', sweepPaint)):
+            before = sweep(legacy, rows, columns)
+            after = sweep(current, rows, columns)
+            print('{0:<20}{1:<12}before {2:8.3f} s ({3:6.2f} us/cell)   after {4:8.3f} s ({5:6.2f} us/cell)   x{6:.2f}'.format(
+                name, label, before, before / (rows * columns) * 1e6, after, after / (rows * columns) * 1e6, before / after))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,79 @@
+# -*- coding:utf-8 -*-
+
+#程序启动(首个窗口绘制完成)耗时的基准测试
+#模拟主窗口：多个选项卡中共放置若干QMatplotlibWidget，只有第一个选项卡可见。每次测试在新的子进程中进行，包含模块导入的开销。
+#对比旧实现(导入时即导入matplotlib、pyplot及mplot3d，并为每个窗体创建画布)与现实现(延迟导入，只为显示的窗体创建画布)。
+#用法：python benchmarks/bench_startup.py [窗体数] [选项卡数] [重复次数]
+
+import os, sys, time, subprocess
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def child(mode, widgets, tabs):
+    """
+    在子进程中构造并显示窗口，输出(导入耗时, 首个窗口绘制完成的耗时, 可见选项卡中的画布全部就绪的耗时)。
+    """
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    import PyQt5.QtCore as qtc
+    import PyQt5.QtWidgets as qtw
+    if mode == 'eager':#复现旧实现的模块级导入
+        import matplotlib
+        matplotlib.use("Qt5Agg")
+        import matplotlib.pyplot
+        from mpl_toolkits.mplot3d import Axes3D
+    import QtBaseWidgets
+    imported = time.perf_counter()
+    app = qtw.QApplication([])
+    window = qtw.QTabWidget()
+    pages = [qtw.QWidget() for i in range(tabs)]
+    for i, page in enumerate(pages):
+        qtw.QVBoxLayout(page)
+        window.addTab(page, str(i))
+    plots = []
+    for i in range(widgets):
+        widget = QtBaseWidgets.QMatplotlibWidget(pages[i % tabs])
+        pages[i % tabs].layout().addWidget(widget)
+        if mode == 'eager':#旧实现在构造时即创建画布
+            widget.ensureCanvas()
+        plots.append(widget)
+    times = {}
+    class PaintFilter(qtc.QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == qtc.QEvent.Paint and 'painted' not in times:
+                times['painted'] = time.perf_counter()
+            return False
+    paintFilter = PaintFilter()
+    window.installEventFilter(paintFilter)
+    def poll():
+        if 'painted' in times and all(plot._canvas is not None for plot in plots if plot.isVisible()):
+            times['ready'] = time.perf_counter()
+            app.quit()
+    timer = qtc.QTimer()
+    timer.timeout.connect(poll)
+    timer.start(1)
+    window.resize(1280, 800)
+    window.show()
+    app.exec_()
+    print('{0} {1} {2}'.format(imported - start, times['painted'] - start, times['ready'] - start))
+
+def main(widgets = 20, tabs = 4, repeat = 3):
+    print('startup: {0} plot widgets on {1} tabs, median of {2} runs'.format(widgets, tabs, repeat))
+    results = {}
+    for mode in ('eager', 'lazy'):
+        runs = []
+        for i in range(repeat):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, str(widgets), str(tabs)],
+                                    capture_output = True, text = True, check = True).stdout.split()
+            runs.append(tuple(float(value) for value in output[-3:]))
+        runs.sort(key = lambda run: run[1])
+        results[mode] = runs[len(runs) // 2]
+    for mode, label in (('eager', 'before'), ('lazy', 'after')):
+        print('{0:<8}import {1:7.3f} s   first window painted {2:7.3f} s   visible plots ready {3:7.3f} s'.format(label, *results[mode]))
+    print('time to first window x{0:.2f}'.format(results['eager'][1] / results['lazy'][1]))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main(*[int(arg) for arg in sys.argv[1:4]])